@@ -30,6 +30,13 @@ from .models import (
     Squadron,
     UserProfile,
     AirframeDefaults,
+    DiscordOutbox,
+    ImageRendition,
+    MediaBlob,
+    Debrief,
+    FlightDebrief,
+    MissionFileMetadata,
+    MissionFileUnit,
 )
 
 # Define the admin class
@@ -256,6 +263,83 @@ class WebHookAdmin(ImportExportModelAdmin, admin.ModelAdmin):
 admin.site.register(WebHook, WebHookAdmin)
 
 
+class DiscordOutboxAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "mission",
+        "action",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "last_error",
+    )
+    list_filter = ("status", "action")
+
+
+admin.site.register(DiscordOutbox, DiscordOutboxAdmin)
+
+
+class ImageRenditionAdmin(admin.ModelAdmin):
+    list_display = ("id", "source", "status", "source_size", "attempts", "last_error")
+    list_filter = ("status",)
+    search_fields = ("source",)
+
+
+admin.site.register(ImageRendition, ImageRenditionAdmin)
+
+
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "ref_count", "size", "sha256", "date_modified")
+    search_fields = ("name", "sha256")
+
+
+admin.site.register(MediaBlob, MediaBlobAdmin)
+
+
+class DebriefAdmin(admin.ModelAdmin):
+    list_display = ("id", "source", "status", "title", "object_count", "last_error")
+    list_filter = ("status",)
+    search_fields = ("source", "title")
+
+
+admin.site.register(Debrief, DebriefAdmin)
+
+
+class FlightDebriefAdmin(admin.ModelAdmin):
+    list_display = ("id", "debrief", "callsign", "flight", "kills", "losses")
+    search_fields = ("callsign", "group")
+
+
+admin.site.register(FlightDebrief, FlightDebriefAdmin)
+
+
+class MissionFileMetadataAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "source",
+        "status",
+        "theatre",
+        "start",
+        "client_slots",
+        "size",
+        "last_error",
+    )
+    list_filter = ("status", "theatre")
+    search_fields = ("source", "sha256")
+
+
+admin.site.register(MissionFileMetadata, MissionFileMetadataAdmin)
+
+
+class MissionFileUnitAdmin(admin.ModelAdmin):
+    list_display = ("id", "metadata", "coalition", "unit_type", "count", "client_slots")
+    list_filter = ("coalition",)
+    search_fields = ("unit_type",)
+
+
+admin.site.register(MissionFileUnit, MissionFileUnitAdmin)
+
+
 class UserProfileAdmin(ImportExportModelAdmin, admin.ModelAdmin):
     list_display = (
         "user",
@@ -4,3 +4,17 @@ from django.apps import AppConfig
 class OpticsappConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "optics.opticsapp"
+
+    def ready(self):
+        # Connect the cache invalidation and queueing receivers in every process.
+        from .services import (
+            file_metadata,
+            flight_plan,
+            media,
+            renditions,
+            roles,
+            tacview,
+            threat_exposure,
+            versions,
+            webhooks,
+        )
@@ -1,6 +1,15 @@
+import calendar
+import time
+from functools import wraps
+
+from django.conf import settings
 from django.http import HttpResponse
 from django.shortcuts import redirect
 from django.contrib import messages
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .services.rollup import rollup_version
 
 
 def unauthenticated_user(view_func):
@@ -16,14 +25,71 @@ def unauthenticated_user(view_func):
 def allowed_users(allowed_roles=[]):
     def decorator(view_func):
         def wrapper_func(request, *args, **kwargs):
-            group = None
-            if request.user.groups.exists():
-                group = request.user .groups.all()[0].name
-
-            if group in allowed_roles:
+            if request.roles.groups.intersection(allowed_roles):
                 return view_func(request, *args, **kwargs)
             else:
                 #messages.error(request, "Access rights not sufficient.")
                 return HttpResponse('Unauthorised to view this page.')
         return wrapper_func
     return decorator
+
+
+def conditional_page(page_rollup, stale_after=300):
+    """
+    Answers If-None-Match / If-Modified-Since with a 304 before the view runs.
+
+    ``page_rollup(link_id)`` returns the counts and latest ``date_modified`` of
+    everything the page displays in one query. The ETag also covers the user, their
+    groups and their CSRF cookie, since pages depend on all three, and a
+    ``stale_after`` seconds time bucket so relative dates ("in 2 hours") are
+    re-rendered now and then.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper_func(request, link_id, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view_func(request, link_id, *args, **kwargs)
+
+            values = page_rollup(link_id)
+            if values is None:
+                # Let the view report the missing object.
+                return view_func(request, link_id, *args, **kwargs)
+
+            bucket = int(time.time() // stale_after)
+            etag = quote_etag(
+                rollup_version(
+                    values,
+                    view_func.__name__,
+                    request.user.id,
+                    sorted(request.roles.groups),
+                    request.COOKIES.get(settings.CSRF_COOKIE_NAME),
+                    bucket,
+                )
+            )
+            modified = [
+                calendar.timegm(value.utctimetuple())
+                for name, value in values.items()
+                if name.endswith("modified") and value is not None
+            ]
+            last_modified = max(modified + [bucket * stale_after])
+
+            # Pending messages would be lost on a 304.
+            if not len(messages.get_messages(request)):
+                response = get_conditional_response(
+                    request, etag=etag, last_modified=last_modified
+                )
+                if response is not None:
+                    patch_cache_control(response, private=True, no_cache=True)
+                    return response
+
+            response = view_func(request, link_id, *args, **kwargs)
+            if response.status_code == 200:
+                response.headers.setdefault("ETag", etag)
+                response.headers.setdefault("Last-Modified", http_date(last_modified))
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        return wrapper_func
+
+    return decorator
+
@@ -104,6 +104,33 @@ class MissionFileForm(ModelForm):
         fields = "__all__"
 
 
+class MissionFileSearchForm(forms.Form):
+    COALITIONS = (
+        ("", "Any coalition"),
+        ("blue", "Blue"),
+        ("red", "Red"),
+        ("neutral", "Neutral"),
+    )
+
+    theatre = forms.ChoiceField(required=False)
+    unit = forms.CharField(required=False, max_length=100, label="Unit type")
+    coalition = forms.ChoiceField(choices=COALITIONS, required=False)
+    start_after = forms.DateField(
+        required=False, widget=DateInput, label="Starts on or after"
+    )
+    start_before = forms.DateField(
+        required=False, widget=DateInput, label="Starts on or before"
+    )
+
+    def __init__(self, *args, theatres=(), **kwargs):
+        super(MissionFileSearchForm, self).__init__(*args, **kwargs)
+        self.fields["theatre"].choices = [("", "Any theatre")] + [
+            (theatre, theatre) for theatre in theatres
+        ]
+        for field in self.fields:
+            self.fields[field].widget.attrs.update({"class": "form-control"})
+
+
 class PackageForm(ModelForm):
     def __init__(self, *args, **kwargs):
         super(PackageForm, self).__init__(*args, **kwargs)
@@ -183,6 +210,8 @@ class FlightForm(ModelForm):
             "fuel_fob",
             "fuel_joker",
             "fuel_bingo",
+            "planned_speed",
+            "fuel_flow",
         ]
         exclude = (
             "modified_by",
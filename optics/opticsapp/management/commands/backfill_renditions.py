@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from optics.opticsapp.services.renditions import (
+    VARIANTS,
+    RenditionWorker,
+    backfill,
+    savings,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Queues renditions for images uploaded before the rendition pipeline and "
+        "reports the bytes they save."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--build",
+            action="store_true",
+            help="Build the queued renditions here instead of in the worker.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Queued {backfill()} images.")
+
+        if options["build"]:
+            worker = RenditionWorker()
+            while worker.run_pending():
+                pass
+
+        totals = savings()
+        original = totals["original"]
+        self.stdout.write(
+            f"{totals['images']} images with renditions, {original} bytes as uploaded."
+        )
+        for variant in VARIANTS:
+            for image_format, size in sorted(totals.get(variant, {}).items()):
+                saved = 1 - size / original if original else 0
+                self.stdout.write(
+                    f"  {variant} {image_format}: {size} bytes ({saved:.0%} smaller)"
+                )
@@ -0,0 +1,108 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from optics.opticsapp.models import (
+    Aircraft,
+    Airframe,
+    Campaign,
+    Flight,
+    Mission,
+    Package,
+    Target,
+    Waypoint,
+)
+from optics.opticsapp.services.mission_copy import MissionGraphCopier
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the per-row Mission.new copy with the bulk MissionGraphCopier. "
+        "All rows are created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--packages", type=int, default=6)
+        parser.add_argument("--flights", type=int, default=5, help="Flights per package.")
+        parser.add_argument("--aircraft", type=int, default=2, help="Aircraft per flight.")
+        parser.add_argument("--waypoints", type=int, default=8, help="Waypoints per flight.")
+        parser.add_argument("--targets", type=int, default=10)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                mission, user = self.build_mission(options)
+
+                self.run("per-row Mission.new", lambda: mission.new(mission.campaign, user))
+                self.run(
+                    "bulk MissionGraphCopier",
+                    lambda: MissionGraphCopier(user).copy_mission(mission, mission.campaign),
+                )
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, label, copy):
+        with CaptureQueriesContext(connection) as context:
+            start_time = time.perf_counter()
+            copy()
+            duration = time.perf_counter() - start_time
+
+        self.stdout.write(
+            f"{label:<25} {duration * 1000:8.1f} ms {len(context.captured_queries):6d} queries"
+        )
+
+    def build_mission(self, options):
+        user = User.objects.create(username="benchmark-mission-copy")
+        airframe = Airframe.objects.create(name="Benchmark Airframe")
+        campaign = Campaign.objects.create(name="Benchmark Campaign")
+        mission = Mission.objects.create(campaign=campaign, name="Benchmark Mission")
+
+        targets = Target.objects.bulk_create(
+            [Target(mission=mission, name=f"Target {i}") for i in range(options["targets"])]
+        )
+        packages = Package.objects.bulk_create(
+            [Package(mission=mission, name=f"Package {i}") for i in range(options["packages"])]
+        )
+        flights = Flight.objects.bulk_create(
+            [
+                Flight(package=package, airframe=airframe, callsign=f"{package.name} {i}")
+                for package in packages
+                for i in range(options["flights"])
+            ]
+        )
+        Aircraft.objects.bulk_create(
+            [
+                Aircraft(type=airframe, flight=flight)
+                for flight in flights
+                for i in range(options["aircraft"])
+            ]
+        )
+        Waypoint.objects.bulk_create(
+            [
+                Waypoint(flight=flight, name=f"WP{i}", number=i)
+                for flight in flights
+                for i in range(options["waypoints"])
+            ]
+        )
+        if targets:
+            Flight.targets.through.objects.bulk_create(
+                [
+                    Flight.targets.through(flight_id=flight.id, target_id=target.id)
+                    for flight in flights
+                    for target in targets[:2]
+                ]
+            )
+
+        self.stdout.write(
+            f"Mission with {len(packages)} packages, {len(flights)} flights, "
+            f"{len(targets)} targets."
+        )
+        return mission, user
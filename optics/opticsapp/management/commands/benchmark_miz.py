@@ -0,0 +1,134 @@
+import glob
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from optics.opticsapp.services.lua import tokens
+from optics.opticsapp.services.miz import MizFile, flight_groups
+
+POINT = """
+                [{number}] =
+                {{
+                    ["alt"] = 6096,
+                    ["type"] = "Turning Point",
+                    ["ETA"] = {eta},
+                    ["x"] = {x},
+                    ["y"] = {y},
+                    ["task"] =
+                    {{
+                        ["id"] = "ComboTask",
+                        ["params"] =
+                        {{
+                            ["tasks"] =
+                            {{
+                                [1] = {{ ["id"] = "WrappedAction", ["number"] = 1, }},
+                            }}, -- end of ["tasks"]
+                        }}, -- end of ["params"]
+                    }}, -- end of ["task"]
+                }}, -- end of [{number}]"""
+GROUP = """
+        [{number}] =
+        {{
+            ["name"] = "Synthetic-{number}",
+            ["task"] = "CAP",
+            ["frequency"] = 251,
+            ["units"] =
+            {{
+                [1] = {{ ["type"] = "F-16C_50", ["skill"] = "Client", }},
+            }}, -- end of ["units"]
+            ["route"] =
+            {{
+                ["points"] =
+                {{{points}
+                }}, -- end of ["points"]
+            }}, -- end of ["route"]
+        }}, -- end of [{number}]"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Times the streaming .miz parser over the sample missions in media/ and, "
+        "with --synthetic, over a generated mission of the given size."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths",
+            nargs="*",
+            help="Missions to read, by default every .miz in media/.",
+        )
+        parser.add_argument(
+            "--synthetic",
+            type=int,
+            default=0,
+            metavar="MB",
+            help="Also read a generated mission table of about this many megabytes.",
+        )
+
+    def handle(self, *args, **options):
+        paths = options["paths"] or sorted(
+            glob.glob(os.path.join(settings.MEDIA_ROOT, "*.miz"))
+        )
+        self.stdout.write(
+            f"{'mission':<40} {'MB':>6} {'tokens':>8} {'tokenize':>9} "
+            f"{'parse':>8} {'MB/s':>6} {'peak MB':>8} {'groups':>6}"
+        )
+        for path in paths:
+            self.run(os.path.basename(path), path)
+
+        if options["synthetic"]:
+            with tempfile.NamedTemporaryFile(suffix=".miz") as file:
+                self.write_synthetic(file, options["synthetic"])
+                self.run(f"synthetic {options['synthetic']} MB", file.name)
+
+    def run(self, label, path):
+        with zipfile.ZipFile(path) as archive:
+            size = archive.getinfo("mission").file_size
+            start_time = time.perf_counter()
+            with archive.open("mission") as raw:
+                count = sum(1 for _ in tokens(io.TextIOWrapper(raw, encoding="utf-8")))
+            tokenize = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        mission = MizFile(path).mission()
+        duration = time.perf_counter() - start_time
+
+        # Measured separately, tracing slows the parser down several times.
+        tracemalloc.start()
+        MizFile(path).mission()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        self.stdout.write(
+            f"{label[:40]:<40} {size / 1e6:6.1f} {count:8d} {tokenize:8.2f}s "
+            f"{duration:7.2f}s {size / 1e6 / duration:6.1f} {peak / 1e6:8.1f} "
+            f"{len(list(flight_groups(mission))):6d}"
+        )
+
+    def write_synthetic(self, file, megabytes):
+        points = "".join(
+            POINT.format(number=i, eta=i * 120, x=-280000 + i * 5000, y=680000)
+            for i in range(1, 11)
+        )
+
+        with zipfile.ZipFile(file, "w", zipfile.ZIP_DEFLATED) as archive:
+            with archive.open("mission", "w") as mission:
+                mission.write(
+                    b'mission =\n{\n    ["theatre"] = "Caucasus",\n'
+                    b'    ["coalition"] = { ["blue"] = { ["country"] = { [1] = {\n'
+                    b'    ["plane"] = { ["group"] = {'
+                )
+                written, number = 0, 1
+                while written < megabytes * 1e6:
+                    chunk = GROUP.format(number=number, points=points).encode()
+                    mission.write(chunk)
+                    written += len(chunk)
+                    number += 1
+                mission.write(b"\n    }, }, }, }, }, },\n}\n")
+        file.flush()
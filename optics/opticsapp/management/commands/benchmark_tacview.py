@@ -0,0 +1,114 @@
+import glob
+import math
+import os
+import tempfile
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from optics.opticsapp.services.tacview import (
+    flight_summaries,
+    read_recording,
+    track_archive,
+)
+
+HEADER = (
+    "FileType=text/acmi/tacview\n"
+    "FileVersion=2.2\n"
+    "0,ReferenceTime=2023-03-09T12:00:00Z\n"
+    "0,Title=Synthetic\n"
+    "0,ReferenceLongitude=41\n"
+    "0,ReferenceLatitude=42\n"
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Times the streaming Tacview reader over the sample recordings in media/ "
+        "and, with --synthetic, over a generated ACMI recording of the given size."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths",
+            nargs="*",
+            help="Recordings to read, by default every Tacview file in media/.",
+        )
+        parser.add_argument(
+            "--synthetic",
+            type=int,
+            default=0,
+            metavar="MB",
+            help="Also read a generated recording of about this many megabytes.",
+        )
+        parser.add_argument(
+            "--aircraft",
+            type=int,
+            default=40,
+            help="Aircraft in the generated recording, reporting 10 times a second.",
+        )
+
+    def handle(self, *args, **options):
+        paths = options["paths"] or sorted(
+            glob.glob(os.path.join(settings.MEDIA_ROOT, "Tacview-*"))
+        )
+        self.stdout.write(
+            f"{'recording':<40} {'MB':>6} {'samples':>9} {'read':>8} {'MB/s':>6} "
+            f"{'peak MB':>8} {'tracks KB':>9} {'flights':>7}"
+        )
+        for path in paths:
+            self.run(os.path.basename(path), path)
+
+        if options["synthetic"]:
+            with tempfile.NamedTemporaryFile(suffix=".txt.acmi") as file:
+                self.write_synthetic(file, options["synthetic"], options["aircraft"])
+                self.run(f"synthetic {options['synthetic']} MB", file.name)
+
+    def run(self, label, path):
+        size = os.path.getsize(path)
+        start_time = time.perf_counter()
+        with open(path, "rb") as file:
+            recording = read_recording(file)
+        duration = time.perf_counter() - start_time
+        aircraft = recording.aircraft()
+        archive = track_archive(aircraft)
+        flights = flight_summaries(recording, aircraft)
+
+        # Measured separately, tracing slows the reader down several times.
+        tracemalloc.start()
+        with open(path, "rb") as file:
+            read_recording(file)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        self.stdout.write(
+            f"{label[:40]:<40} {size / 1e6:6.1f} {recording.sample_count:9d} "
+            f"{duration:7.2f}s {size / 1e6 / duration:6.1f} {peak / 1e6:8.1f} "
+            f"{len(archive) / 1e3:9.0f} {len(flights):7d}"
+        )
+
+    def write_synthetic(self, file, megabytes, aircraft):
+        file.write(HEADER.encode())
+        for number in range(aircraft):
+            file.write(
+                f"{number + 1:x},T=0|0|0,Type=Air+FixedWing,Name=F-16C_50,"
+                f"Pilot=Colt {number // 4 + 1}-{number % 4 + 1},"
+                f"Group=Colt {number // 4 + 1},Coalition=Enemies\n".encode()
+            )
+
+        written, frame = 0, 0
+        while written < megabytes * 1e6:
+            frame += 1
+            lines = [f"#{frame / 10:.2f}"]
+            for number in range(aircraft):
+                angle = frame / 3000 + number
+                lines.append(
+                    f"{number + 1:x},T={math.cos(angle):.7f}|{math.sin(angle):.7f}"
+                    f"|{6000 + number * 10:.2f}|0.1|2.3|{frame % 360:.1f}"
+                )
+            chunk = ("\n".join(lines) + "\n").encode()
+            file.write(chunk)
+            written += len(chunk)
+        file.flush()
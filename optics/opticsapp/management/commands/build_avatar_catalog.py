@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from optics.opticsapp.services.avatars import avatar_catalog
+
+
+class Command(BaseCommand):
+    help = "Lists the avatar images in S3 again and caches the manifest."
+
+    def handle(self, *args, **options):
+        manifest = avatar_catalog.build()
+        self.stdout.write(f"Cataloged {len(manifest['files'])} avatars.")
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from optics.opticsapp.services.mission_cards import (
+    merge_pdfs,
+    render_mission_cards,
+    stream_zip,
+)
+
+
+class Command(BaseCommand):
+    help = "Renders every flight's mission card to a ZIP or one merged PDF."
+
+    def add_arguments(self, parser):
+        parser.add_argument("mission_id", type=int)
+        parser.add_argument("output", help="Path of the ZIP or PDF file to write.")
+        parser.add_argument("--format", choices=["zip", "pdf"], default="zip")
+        parser.add_argument("--workers", type=int, default=None)
+
+    def handle(self, *args, **options):
+        cards = render_mission_cards(
+            options["mission_id"], max_workers=options["workers"]
+        )
+
+        with open(options["output"], "wb") as output:
+            if options["format"] == "pdf":
+                output.write(merge_pdfs(list(cards)))
+            else:
+                for chunk in stream_zip(cards):
+                    output.write(chunk)
+
+        self.stdout.write(f"Wrote {options['output']}")
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from optics.opticsapp.services.discord import DiscordDispatcher
+from optics.opticsapp.services.file_metadata import MetadataWorker
+from optics.opticsapp.services.renditions import RenditionWorker
+from optics.opticsapp.services.tacview import DebriefWorker
+
+WORKERS = {
+    "discord": DiscordDispatcher,
+    "renditions": RenditionWorker,
+    "debriefs": DebriefWorker,
+    "metadata": MetadataWorker,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Processes a background queue: Discord deliveries, image renditions, "
+        "Tacview debriefs or mission file metadata."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("queue", choices=sorted(WORKERS))
+        parser.add_argument(
+            "--once", action="store_true", help="Drain the queue once and exit."
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to sleep when the queue is empty.",
+        )
+        parser.add_argument("--batch-size", type=int)
+        parser.add_argument(
+            "--backfill",
+            action="store_true",
+            help="First queue what was stored before the worker existed.",
+        )
+
+    def handle(self, *args, **options):
+        worker = WORKERS[options["queue"]]()
+        if options["backfill"]:
+            if not hasattr(worker, "backfill"):
+                raise CommandError(f"The {options['queue']} queue has no backfill.")
+            self.stdout.write(f"Queued {worker.backfill()} entries.")
+        worker.run(
+            once=options["once"],
+            interval=options["interval"],
+            batch_size=options["batch_size"],
+        )
@@ -0,0 +1,75 @@
+from collections import Counter
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from optics.opticsapp.models import MediaBlob
+from optics.opticsapp.services.media import FILE_FIELDS, delete_files, sha256_of
+
+
+class Command(BaseCommand):
+    help = (
+        "Recounts the references to every stored file shared by targets, imagery "
+        "and mission files, creating rows for files stored before the count existed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hash",
+            action="store_true",
+            help="Read files without a SHA-256 so later identical uploads reuse them.",
+        )
+        parser.add_argument(
+            "--delete-unreferenced",
+            action="store_true",
+            help="Delete the files of rows no longer referenced.",
+        )
+
+    def handle(self, *args, **options):
+        counts = Counter()
+        for model, field in FILE_FIELDS.items():
+            counts.update(
+                name
+                for name in model.objects.values_list(field, flat=True).iterator()
+                if name
+            )
+
+        with transaction.atomic():
+            blobs = {
+                blob.name: blob for blob in MediaBlob.objects.select_for_update()
+            }
+            MediaBlob.objects.bulk_create(
+                [
+                    MediaBlob(name=name, ref_count=count)
+                    for name, count in counts.items()
+                    if name not in blobs
+                ]
+            )
+            stale = [
+                blob for blob in blobs.values() if blob.ref_count != counts[blob.name]
+            ]
+            for blob in stale:
+                blob.ref_count = counts[blob.name]
+            MediaBlob.objects.bulk_update(stale, ["ref_count"])
+        self.stdout.write(
+            f"{len(counts)} files referenced, {len(counts.keys() - blobs.keys())} "
+            f"added, {len(stale)} recounted."
+        )
+
+        if options["hash"]:
+            unhashed = MediaBlob.objects.filter(sha256__isnull=True, ref_count__gt=0)
+            for blob in unhashed.iterator():
+                with default_storage.open(blob.name, "rb") as file:
+                    blob.sha256, blob.size = sha256_of(file)
+                blob.save(update_fields=["sha256", "size", "date_modified"])
+                self.stdout.write(f"Hashed {blob.name}.")
+
+        unreferenced = MediaBlob.objects.filter(ref_count__lte=0)
+        if options["delete_unreferenced"]:
+            names = list(unreferenced.values_list("name", flat=True))
+            unreferenced.delete()
+            delete_files(names)
+            self.stdout.write(f"Deleted {len(names)} unreferenced files.")
+        else:
+            self.stdout.write(f"{unreferenced.count()} unreferenced files kept.")
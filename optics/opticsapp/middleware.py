@@ -0,0 +1,17 @@
+from django.utils.functional import SimpleLazyObject
+
+from .services.roles import roles_for
+
+
+class RolesMiddleware:
+    """
+    Sets ``request.roles`` to the user's profile and group names, loaded on first
+    use. Must come after ``AuthenticationMiddleware``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.roles = SimpleLazyObject(lambda: roles_for(request.user))
+        return self.get_response(request)
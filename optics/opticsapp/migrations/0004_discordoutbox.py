@@ -0,0 +1,87 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("opticsapp", "0003_mission_is_draft"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DiscordOutbox",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[("SYNC", "Create or update"), ("DELETE", "Delete")],
+                        default="SYNC",
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("SENDING", "Sending"),
+                            ("SENT", "Sent"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="PENDING",
+                        max_length=10,
+                    ),
+                ),
+                ("webhook_payload", models.JSONField(blank=True, default=dict)),
+                ("event_payload", models.JSONField(blank=True, default=dict)),
+                (
+                    "discord_msg_id",
+                    models.CharField(blank=True, max_length=20, null=True),
+                ),
+                (
+                    "discord_api_id",
+                    models.CharField(blank=True, max_length=20, null=True),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("claimed_at", models.DateTimeField(blank=True, null=True)),
+                ("last_error", models.TextField(blank=True, default="")),
+                ("date_created", models.DateTimeField(auto_now_add=True)),
+                ("date_modified", models.DateTimeField(auto_now=True)),
+                (
+                    "mission",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="opticsapp.mission",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Discord Outbox Entry",
+                "verbose_name_plural": "Discord Outbox",
+                "ordering": ["id"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "next_attempt_at"],
+                        name="discord_outbox_due_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,75 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("opticsapp", "0004_discordoutbox"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="aircraft",
+            name="date_modified",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="support",
+            name="date_modified",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="target",
+            name="date_modified",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="threat",
+            name="date_modified",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="waypoint",
+            name="date_modified",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name="PdfArtifact",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=64, unique=True)),
+                ("path", models.CharField(max_length=255)),
+                ("size", models.PositiveIntegerField(default=0)),
+                ("date_created", models.DateTimeField(auto_now_add=True)),
+                ("last_accessed", models.DateTimeField(db_index=True)),
+            ],
+            options={
+                "verbose_name": "PDF Artifact",
+                "ordering": ["last_accessed"],
+            },
+        ),
+    ]
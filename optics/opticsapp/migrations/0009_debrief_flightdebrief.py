@@ -0,0 +1,112 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("opticsapp", "0008_mediablob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Debrief",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("source", models.CharField(max_length=255)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("WORKING", "Working"),
+                            ("DONE", "Done"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="PENDING",
+                        max_length=10,
+                    ),
+                ),
+                ("title", models.CharField(blank=True, default="", max_length=255)),
+                ("duration", models.FloatField(default=0)),
+                ("object_count", models.PositiveIntegerField(default=0)),
+                ("sample_count", models.PositiveIntegerField(default=0)),
+                (
+                    "tracks",
+                    models.FileField(blank=True, null=True, upload_to="debriefs/"),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("claimed_at", models.DateTimeField(blank=True, null=True)),
+                ("last_error", models.TextField(blank=True, default="")),
+                ("date_created", models.DateTimeField(auto_now_add=True)),
+                ("date_modified", models.DateTimeField(auto_now=True)),
+                (
+                    "mission_file",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="debrief",
+                        to="opticsapp.missionfile",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Debrief",
+                "ordering": ["id"],
+                "indexes": [models.Index(fields=["status"], name="debrief_status_idx")],
+            },
+        ),
+        migrations.CreateModel(
+            name="FlightDebrief",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("group", models.CharField(max_length=255)),
+                ("callsign", models.CharField(max_length=100)),
+                ("airframe", models.CharField(blank=True, default="", max_length=100)),
+                ("coalition", models.CharField(blank=True, default="", max_length=20)),
+                ("airborne", models.FloatField(default=0)),
+                ("max_altitude", models.FloatField(default=0)),
+                ("distance", models.FloatField(default=0)),
+                ("kills", models.PositiveIntegerField(default=0)),
+                ("losses", models.PositiveIntegerField(default=0)),
+                ("aircraft", models.JSONField(blank=True, default=list)),
+                (
+                    "debrief",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="flights",
+                        to="opticsapp.debrief",
+                    ),
+                ),
+                (
+                    "flight",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="debriefs",
+                        to="opticsapp.flight",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Flight Debrief",
+                "ordering": ["coalition", "callsign", "id"],
+            },
+        ),
+    ]
@@ -0,0 +1,116 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("opticsapp", "0009_debrief_flightdebrief"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MissionFileMetadata",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("source", models.CharField(max_length=255)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("WORKING", "Working"),
+                            ("DONE", "Done"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="PENDING",
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "sha256",
+                    models.CharField(
+                        blank=True, db_index=True, default="", max_length=64
+                    ),
+                ),
+                ("size", models.PositiveBigIntegerField(blank=True, null=True)),
+                ("theatre", models.CharField(blank=True, default="", max_length=50)),
+                ("start", models.DateTimeField(blank=True, null=True)),
+                ("blue_units", models.PositiveIntegerField(default=0)),
+                ("red_units", models.PositiveIntegerField(default=0)),
+                ("neutral_units", models.PositiveIntegerField(default=0)),
+                ("client_slots", models.PositiveIntegerField(default=0)),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("claimed_at", models.DateTimeField(blank=True, null=True)),
+                ("last_error", models.TextField(blank=True, default="")),
+                ("date_created", models.DateTimeField(auto_now_add=True)),
+                ("date_modified", models.DateTimeField(auto_now=True)),
+                (
+                    "mission_file",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="metadata",
+                        to="opticsapp.missionfile",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Mission File Metadata",
+                "verbose_name_plural": "Mission File Metadata",
+                "ordering": ["id"],
+            },
+        ),
+        migrations.CreateModel(
+            name="MissionFileUnit",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("coalition", models.CharField(max_length=10)),
+                ("unit_type", models.CharField(max_length=100)),
+                ("type_key", models.CharField(db_index=True, max_length=100)),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("client_slots", models.PositiveIntegerField(default=0)),
+                (
+                    "metadata",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="units",
+                        to="opticsapp.missionfilemetadata",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Mission File Unit",
+                "ordering": ["coalition", "unit_type"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="missionfilemetadata",
+            index=models.Index(fields=["status"], name="file_metadata_status_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="missionfilemetadata",
+            index=models.Index(
+                fields=["theatre", "start"], name="file_metadata_theatre_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="missionfilemetadata",
+            index=models.Index(fields=["start"], name="file_metadata_start_idx"),
+        ),
+    ]
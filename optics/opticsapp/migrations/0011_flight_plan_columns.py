@@ -0,0 +1,90 @@
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def fill_columns(apps, schema_editor):
+    # The same parsing as the pre_save receivers, for the rows saved before. The
+    # MGRS and angle parsing is not copied here: it is imported from the app, and
+    # only when there are rows to fill, so migrating an empty database does not
+    # depend on services.coordinates. Existing databases need parse_position and
+    # parse_elevation with these signatures until they have run this migration.
+    for model_name, elevation in (("Waypoint", "elevation"), ("Target", "elev")):
+        model = apps.get_model("opticsapp", model_name)
+        rows = model.objects.only("id", "lat", "long", elevation).order_by("id")
+        if not rows.exists():
+            continue
+        from ..services.coordinates import parse_elevation, parse_position
+
+        fields = ["lat_deg", "long_deg", f"{elevation}_ft"]
+        batch = []
+        for row in rows.iterator(chunk_size=BATCH_SIZE):
+            row.lat_deg, row.long_deg = parse_position(row.lat, row.long)
+            setattr(row, f"{elevation}_ft", parse_elevation(getattr(row, elevation)))
+            batch.append(row)
+            if len(batch) == BATCH_SIZE:
+                model.objects.bulk_update(batch, fields)
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("opticsapp", "0010_missionfilemetadata_missionfileunit"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="flight",
+            name="fuel_flow",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Fuel burned per hour in lbs, for the leg fuel.",
+                null=True,
+                verbose_name="Fuel Flow (lbs/hr)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="flight",
+            name="planned_speed",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Planned ground speed in knots, for the leg times.",
+                null=True,
+                verbose_name="Planned Speed (kts)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="target",
+            name="elev_ft",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="target",
+            name="lat_deg",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="target",
+            name="long_deg",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="waypoint",
+            name="elevation_ft",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="waypoint",
+            name="lat_deg",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="waypoint",
+            name="long_deg",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_columns, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("opticsapp", "0011_flight_plan_columns"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="threat",
+            name="lat",
+            field=models.CharField(
+                blank=True,
+                help_text="Enter threat latitude, or an MGRS grid reference.",
+                max_length=30,
+                null=True,
+                verbose_name="Threat Latitude",
+            ),
+        ),
+        migrations.AddField(
+            model_name="threat",
+            name="lat_deg",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="threat",
+            name="long",
+            field=models.CharField(
+                blank=True,
+                help_text="Enter threat longitude.",
+                max_length=30,
+                null=True,
+                verbose_name="Threat Longitude",
+            ),
+        ),
+        migrations.AddField(
+            model_name="threat",
+            name="long_deg",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+    ]
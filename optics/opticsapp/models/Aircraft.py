@@ -40,6 +40,7 @@ class Aircraft(models.Model):
 
     flight_lead = models.BooleanField(default=False, verbose_name="Flight Lead")
     package_lead = models.BooleanField(default=False, verbose_name="Package Lead")
+    date_modified = models.DateTimeField(auto_now=True)
 
     # Metadata
 
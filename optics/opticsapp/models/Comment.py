@@ -9,6 +9,7 @@ class Comment(models.Model):
 	user = models.ForeignKey(User, on_delete=models.CASCADE)
 	comment = models.TextField()
 	date_created = models.DateTimeField(auto_now_add=True)
+	date_modified = models.DateTimeField(auto_now=True)
 
 	# Below the mandatory fields for generic relation
 	content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
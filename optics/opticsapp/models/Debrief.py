@@ -0,0 +1,54 @@
+from django.db import models
+
+
+class Debrief(models.Model):
+    """
+    What was read from an uploaded Tacview recording.
+
+    Rows are queued when a Tacview MissionFile is saved and built later by the
+    "run_worker debriefs" management command. The aircraft tracks are kept in the
+    ``tracks`` NumPy archive, the per-flight summaries in FlightDebrief.
+    """
+
+    # Values
+    PENDING = "PENDING"
+    WORKING = "WORKING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+    STATUSES = (
+        (PENDING, "Pending"),
+        (WORKING, "Working"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    )
+
+    # Fields
+
+    mission_file = models.OneToOneField(
+        "MissionFile", on_delete=models.CASCADE, related_name="debrief"
+    )
+    # Stored name of the recording the debrief was queued for.
+    source = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    title = models.CharField(max_length=255, blank=True, default="")
+    duration = models.FloatField(default=0)
+    object_count = models.PositiveIntegerField(default=0)
+    sample_count = models.PositiveIntegerField(default=0)
+    tracks = models.FileField(upload_to="debriefs/", null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_modified = models.DateTimeField(auto_now=True)
+
+    # Metadata
+
+    class Meta:
+        ordering = ["id"]
+        verbose_name = "Debrief"
+        indexes = [models.Index(fields=["status"], name="debrief_status_idx")]
+
+    # Methods
+
+    def __str__(self):
+        return f"{self.source} ({self.status})"
@@ -0,0 +1,66 @@
+from django.db import models
+from django.utils import timezone
+
+
+class DiscordOutbox(models.Model):
+    """
+    A pending Discord webhook/Scheduled Event call for a mission.
+
+    Rows are written inside the request/response cycle and delivered later by the
+    "run_worker discord" management command.
+    """
+
+    # Values
+    SYNC = "SYNC"
+    DELETE = "DELETE"
+    ACTIONS = (
+        (SYNC, "Create or update"),
+        (DELETE, "Delete"),
+    )
+
+    PENDING = "PENDING"
+    SENDING = "SENDING"
+    SENT = "SENT"
+    FAILED = "FAILED"
+    STATUSES = (
+        (PENDING, "Pending"),
+        (SENDING, "Sending"),
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+    )
+
+    # Fields
+
+    mission = models.ForeignKey(
+        "Mission", on_delete=models.SET_NULL, null=True, blank=True
+    )
+    action = models.CharField(max_length=10, choices=ACTIONS, default=SYNC)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    webhook_payload = models.JSONField(default=dict, blank=True)
+    event_payload = models.JSONField(default=dict, blank=True)
+    # Discord ids captured when a delete is queued, the mission row may be gone by delivery.
+    discord_msg_id = models.CharField(max_length=20, blank=True, null=True)
+    discord_api_id = models.CharField(max_length=20, blank=True, null=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_modified = models.DateTimeField(auto_now=True)
+
+    # Metadata
+
+    class Meta:
+        ordering = ["id"]
+        verbose_name = "Discord Outbox Entry"
+        verbose_name_plural = "Discord Outbox"
+        indexes = [
+            models.Index(
+                fields=["status", "next_attempt_at"], name="discord_outbox_due_idx"
+            )
+        ]
+
+    # Methods
+
+    def __str__(self):
+        return f"{self.action} mission {self.mission_id} ({self.status})"
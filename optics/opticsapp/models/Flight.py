@@ -72,6 +72,18 @@ class Flight(models.Model):
         blank=True,
         verbose_name="Fuel BINGO",
     )
+    planned_speed = models.PositiveIntegerField(
+        help_text="Planned ground speed in knots, for the leg times.",
+        null=True,
+        blank=True,
+        verbose_name="Planned Speed (kts)",
+    )
+    fuel_flow = models.PositiveIntegerField(
+        help_text="Fuel burned per hour in lbs, for the leg fuel.",
+        null=True,
+        blank=True,
+        verbose_name="Fuel Flow (lbs/hr)",
+    )
     comments = GenericRelation(Comment)
     created_by = models.ForeignKey(
         User,
@@ -113,6 +125,8 @@ class Flight(models.Model):
             fuel_fob=self.fuel_fob,
             fuel_joker=self.fuel_joker,
             fuel_bingo=self.fuel_bingo,
+            planned_speed=self.planned_speed,
+            fuel_flow=self.fuel_flow,
             created_by=user,
             modified_by=user,
         )
@@ -130,9 +144,12 @@ class Flight(models.Model):
                 waypoint.copyToFlight(new_flight_instance)
 
     def copy(self, user):
+        # Avoid a circular import, the copy service imports the models.
+        from ..services.mission_copy import MissionGraphCopier
+
         packageID = self.package.id
 
-        self.new(self.package, user)
+        MissionGraphCopier(user).copy_flights([self], self.package)
 
         return packageID
 
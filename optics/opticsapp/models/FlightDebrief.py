@@ -0,0 +1,61 @@
+from django.db import models
+
+FEET_PER_METRE = 3.28084
+METRES_PER_NM = 1852
+
+
+class FlightDebrief(models.Model):
+    """
+    The summary of one DCS group in a Tacview recording, matched to the planned
+    Flight with the same callsign when there is one.
+    """
+
+    # Fields
+
+    debrief = models.ForeignKey(
+        "Debrief", on_delete=models.CASCADE, related_name="flights"
+    )
+    flight = models.ForeignKey(
+        "Flight",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="debriefs",
+    )
+    group = models.CharField(max_length=255)
+    callsign = models.CharField(max_length=100)
+    airframe = models.CharField(max_length=100, blank=True, default="")
+    coalition = models.CharField(max_length=20, blank=True, default="")
+    # Longest time airborne and highest altitude (metres MSL) of the group's
+    # aircraft, and the distance (metres) flown by the one that flew furthest.
+    airborne = models.FloatField(default=0)
+    max_altitude = models.FloatField(default=0)
+    distance = models.FloatField(default=0)
+    kills = models.PositiveIntegerField(default=0)
+    losses = models.PositiveIntegerField(default=0)
+    # [{"id", "pilot", "airborne", "max_altitude", "distance", "kills", "lost"}]
+    aircraft = models.JSONField(default=list, blank=True)
+
+    # Metadata
+
+    class Meta:
+        ordering = ["coalition", "callsign", "id"]
+        verbose_name = "Flight Debrief"
+
+    # Methods
+
+    def __str__(self):
+        return self.callsign
+
+    @property
+    def airborne_display(self):
+        minutes = round(self.airborne / 60)
+        return f"{minutes // 60}:{minutes % 60:02d}"
+
+    @property
+    def max_altitude_feet(self):
+        return round(self.max_altitude * FEET_PER_METRE)
+
+    @property
+    def distance_nm(self):
+        return round(self.distance / METRES_PER_NM, 1)
@@ -19,8 +19,4 @@ class FlightImagery(models.Model):
 		null=True,
 		blank=True,
 	)
-
-	# Override the delete class to ensure the image is deleted from the file system
-	def delete(self):
-		self.image.delete()
-		super().delete()
\ No newline at end of file
+	date_modified = models.DateTimeField(auto_now=True)
@@ -0,0 +1,48 @@
+from django.db import models
+
+
+class ImageRendition(models.Model):
+    """
+    Resized WebP and JPEG/PNG variants of an uploaded image.
+
+    One row per stored file, so mission copies sharing a file share its renditions.
+    Rows are queued when the image is saved and built later by the
+    "run_worker renditions" management command.
+    """
+
+    # Values
+    PENDING = "PENDING"
+    WORKING = "WORKING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+    STATUSES = (
+        (PENDING, "Pending"),
+        (WORKING, "Working"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    )
+
+    # Fields
+
+    source = models.CharField(max_length=255, unique=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    source_size = models.PositiveIntegerField(default=0)
+    # {variant: {"width", "height", format: {"name", "size"}}}
+    variants = models.JSONField(default=dict, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_modified = models.DateTimeField(auto_now=True)
+
+    # Metadata
+
+    class Meta:
+        ordering = ["id"]
+        verbose_name = "Image Rendition"
+        indexes = [models.Index(fields=["status"], name="image_rendition_status_idx")]
+
+    # Methods
+
+    def __str__(self):
+        return f"{self.source} ({self.status})"
@@ -0,0 +1,27 @@
+from django.db import models
+
+
+class MediaBlob(models.Model):
+    """
+    A stored file and the number of rows pointing at it.
+
+    Targets and imagery/file rows of copied missions share their files, so a file
+    is only deleted once the last reference is gone. New uploads are stored under
+    the SHA-256 of their content, and uploading the same content again reuses the
+    stored file.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    # Unknown for files stored before uploads were hashed.
+    sha256 = models.CharField(max_length=64, null=True, blank=True, db_index=True)
+    size = models.PositiveBigIntegerField(null=True, blank=True)
+    ref_count = models.IntegerField(default=0)
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["name"]
+        verbose_name = "Media Blob"
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count})"
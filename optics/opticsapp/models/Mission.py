@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Count, Prefetch
 from django.utils import timezone
 from datetime import datetime, timedelta
 from django_resized import ResizedImageField
@@ -8,12 +9,52 @@ from django.urls import reverse
 
 # Required for Generic Keys for Comments
 from django.contrib.contenttypes.fields import GenericRelation
-import requests
 
 from .Comment import *
 from .WebHook import *
 
 
+class MissionQuerySet(models.QuerySet):
+    def with_detail(self):
+        """
+        Loads the full mission graph displayed on the mission page in a fixed number of queries.
+
+        Packages carry a ``flight_count`` annotation so the template does not need to
+        count each package's flights individually.
+        """
+        from .MissionFile import MissionFile
+        from .Package import Package
+        from .Support import Support
+        from .Threat import Threat
+
+        return self.select_related(
+            "campaign", "created_by__profile", "modified_by"
+        ).prefetch_related(
+            Prefetch(
+                "package_set",
+                queryset=Package.objects.annotate(flight_count=Count("flight")),
+            ),
+            "target_set",
+            Prefetch(
+                "threat_set",
+                queryset=Threat.objects.select_related("threat_name", "threat_type"),
+            ),
+            Prefetch(
+                "support_set",
+                queryset=Support.objects.select_related("support_type"),
+            ),
+            "missionimagery_set",
+            Prefetch(
+                "missionfile_set",
+                queryset=MissionFile.objects.select_related("uploaded_by"),
+            ),
+            Prefetch(
+                "comments",
+                queryset=Comment.objects.select_related("user__profile"),
+            ),
+        )
+
+
 class Mission(models.Model):
     # Fields
 
@@ -165,6 +206,8 @@ class Mission(models.Model):
         verbose_name="Draft Mode",
     )
 
+    objects = MissionQuerySet.as_manager()
+
     # Metadata
 
     class Meta:
@@ -176,47 +219,17 @@ class Mission(models.Model):
         return self.name
 
     def delete_discord_event(self):
-        bot_token = WebHook.objects.get(service_name__exact="bot token").url
-        api_url = WebHook.objects.get(service_name__exact="Discord Event").url
-        api_headers = {
-            "Authorization": bot_token,
-            "Content-Type": "application/json",
-            "User-Agent": "DiscordBot (https://your.bot/url) Python/3.9 aiohttp/3.8.1",
-        }
+        # Avoid a circular import, the Discord service imports the models.
+        from ..services.discord import enqueue_delete
 
-        webhook_url = WebHook.objects.get(service_name__exact="Discord").url
-        params = {"wait": "true"}
-
-        if self.discord_msg_id:
-            delete_url = webhook_url + (f"/messages/{self.discord_msg_id}")
-            api_delete_url = f"{api_url}/{self.discord_api_id}"
-            webhook_result = requests.delete(delete_url, params=params)
-            api_result = requests.delete(api_delete_url, headers=api_headers)
-
-            try:
-                webhook_result.raise_for_status()
-            except requests.exceptions.HTTPError as err:
-                print(err)
-            else:
-                print(
-                    "Payload delivered successfully, code {}.".format(
-                        webhook_result.status_code
-                    )
-                )
-
-            try:
-                api_result.raise_for_status()
-            except requests.exceptions.HTTPError as err:
-                print(err)
-            else:
-                print(
-                    "Payload delivered successfully, code {}.".format(
-                        api_result.status_code
-                    )
-                )
+        # Delivered by "run_worker discord", not in the request cycle.
+        enqueue_delete(self)
         return True
 
     def create_discord_event(self, image_url, request):
+        # Avoid a circular import, the Discord service imports the models.
+        from ..services.discord import enqueue_sync
+
         # Create message should be
         # POST/webhooks/{webhook.id}/{webhook.token}
 
@@ -227,10 +240,6 @@ class Mission(models.Model):
 
         # New Discord Event API Specific Variables
 
-        bot_token = WebHook.objects.get(service_name__exact="bot token").url
-        api_url = WebHook.objects.get(service_name__exact="Discord Event").url
-        channel_id = WebHook.objects.get(service_name__exact="channel id").url
-
         if self.mission_date and self.mission_time:
             mission_start_time = datetime.combine(self.mission_date, self.mission_time)
         else:
@@ -239,9 +248,6 @@ class Mission(models.Model):
         # mission_start_time = datetime.combine(self.mission_date, self.mission_time)
         mission_end_time = mission_start_time + timedelta(hours=2)
 
-        # Webhook Specific Variables
-        url = WebHook.objects.get(service_name__exact="Discord").url
-
         # Webhook Specific Embed Variables
         title = self.campaign.name
         mission_name = self.name
@@ -270,16 +276,9 @@ class Mission(models.Model):
             "scheduled_end_time": mission_end_time.isoformat(),
             "entity_type": 2,
             "privacy_level": "2",
-            "channel_id": channel_id,
-        }
-        api_headers = {
-            "Authorization": bot_token,
-            "Content-Type": "application/json",
-            "User-Agent": "DiscordBot (https://your.bot/url) Python/3.9 aiohttp/3.8.1",
         }
 
         # Webhook Request Data
-        params = {"wait": "true"}
         data = {"content": "OPTICS Generated Mission Event", "username": "OPTICS Bot"}
         data["embeds"] = [
             {
@@ -303,51 +302,9 @@ class Mission(models.Model):
             }
         ]
 
-        # Check to see if a message id has been logged already. If so we are going to perform an edit.
-
-        if self.discord_msg_id:
-            webhook_patch_url = url + (f"/messages/{self.discord_msg_id}")
-            api_patch_url = f"{api_url}/{self.discord_api_id}"
-            webhook_result = requests.patch(webhook_patch_url, json=data, params=params)
-            api_result = requests.patch(
-                api_patch_url, json=api_data, headers=api_headers
-            )
-        else:
-            webhook_result = requests.post(url, json=data, params=params)
-            api_result = requests.post(api_url, json=api_data, headers=api_headers)
-
-        # Check the response for Webhook
-
-        try:
-            webhook_result.raise_for_status()
-            webhook_jsonResponse = webhook_result.json()
-        except requests.exceptions.HTTPError as err:
-            print(err)
-        else:
-            print(
-                "Payload delivered successfully, code {}.".format(
-                    webhook_result.status_code
-                )
-            )
-            print(webhook_jsonResponse["id"])
-            self.discord_msg_id = webhook_jsonResponse["id"]
-            self.save()
-
-        # Check the response for the API Event
-        try:
-            api_result.raise_for_status()
-            api_jsonResponse = api_result.json()
-        except requests.exceptions.HTTPError as err:
-            print(err)
-        else:
-            print(
-                "Payload delivered successfully, code {}.".format(
-                    api_result.status_code
-                )
-            )
-            print(api_jsonResponse["id"])
-            self.discord_api_id = api_jsonResponse["id"]
-            self.save()
+        # The dispatcher decides between POST and PATCH from the ids stored on the
+        # mission at delivery time and adds the configured channel id.
+        enqueue_sync(self, data, api_data)
 
         return True
 
@@ -370,7 +327,7 @@ class Mission(models.Model):
         mission_packages = self.package_set.all()
         if mission_packages:
             for package in mission_packages:
-                package.copyToMission(new_mission_instance, user)
+                package.new(new_mission_instance, user)
 
         mission_targets = self.target_set.all()
         if mission_targets:
@@ -391,10 +348,13 @@ class Mission(models.Model):
 
     def copy(self, user):
         campaignID = self.campaign.id
-        self.new(self.campaign, user)
+        self.copyToCampaign(self.campaign, user)
         return campaignID
 
-    def copyToCampaign(self, campaign):
+    def copyToCampaign(self, campaign, user=None):
+        # Avoid a circular import, the copy service imports the models.
+        from ..services.mission_copy import MissionGraphCopier
+
         campaignID = self.campaign.id
-        self.new(campaign)
+        MissionGraphCopier(user).copy_mission(self, campaign)
         return campaignID
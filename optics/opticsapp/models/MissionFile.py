@@ -28,12 +28,8 @@ class MissionFile (models.Model):
 								on_delete=models.SET_NULL, 
 								verbose_name='File Uploader')
 	date_uploaded = models.DateTimeField(auto_now_add=True)
+	date_modified = models.DateTimeField(auto_now=True)
 	
 	class Meta:
 		ordering = ['-date_uploaded']
 		verbose_name = 'Mission File'
-	
-	# Override the delete class to ensure the file is deleted from the file system
-	def delete(self):
-		self.mission_file.delete()
-		super().delete()
\ No newline at end of file
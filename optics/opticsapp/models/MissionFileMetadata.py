@@ -0,0 +1,64 @@
+from django.db import models
+
+
+class MissionFileMetadata(models.Model):
+    """
+    What is known about an uploaded MissionFile without downloading it.
+
+    Rows are queued when a MissionFile is saved and filled later by the
+    "run_worker metadata" management command. Every file gets its hash and size;
+    .miz files and Liberation saves also get their theatre, start and units, with
+    a MissionFileUnit row per unit type for searching.
+    """
+
+    # Values
+    PENDING = "PENDING"
+    WORKING = "WORKING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+    STATUSES = (
+        (PENDING, "Pending"),
+        (WORKING, "Working"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    )
+
+    # Fields
+
+    mission_file = models.OneToOneField(
+        "MissionFile", on_delete=models.CASCADE, related_name="metadata"
+    )
+    # Stored name of the file the metadata was queued for.
+    source = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    sha256 = models.CharField(max_length=64, blank=True, default="", db_index=True)
+    size = models.PositiveBigIntegerField(null=True, blank=True)
+    theatre = models.CharField(max_length=50, blank=True, default="")
+    # The in-game date and time the mission starts at.
+    start = models.DateTimeField(null=True, blank=True)
+    blue_units = models.PositiveIntegerField(default=0)
+    red_units = models.PositiveIntegerField(default=0)
+    neutral_units = models.PositiveIntegerField(default=0)
+    client_slots = models.PositiveIntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_modified = models.DateTimeField(auto_now=True)
+
+    # Metadata
+
+    class Meta:
+        ordering = ["id"]
+        verbose_name = "Mission File Metadata"
+        verbose_name_plural = "Mission File Metadata"
+        indexes = [
+            models.Index(fields=["status"], name="file_metadata_status_idx"),
+            models.Index(fields=["theatre", "start"], name="file_metadata_theatre_idx"),
+            models.Index(fields=["start"], name="file_metadata_start_idx"),
+        ]
+
+    # Methods
+
+    def __str__(self):
+        return f"{self.source} ({self.status})"
@@ -0,0 +1,28 @@
+from django.db import models
+
+
+class MissionFileUnit(models.Model):
+    """The units of one type and coalition in a mission file."""
+
+    # Fields
+
+    metadata = models.ForeignKey(
+        "MissionFileMetadata", on_delete=models.CASCADE, related_name="units"
+    )
+    coalition = models.CharField(max_length=10)
+    unit_type = models.CharField(max_length=100)
+    # The type lower-cased without punctuation, so "F-14B" is found as "f14".
+    type_key = models.CharField(max_length=100, db_index=True)
+    count = models.PositiveIntegerField(default=0)
+    client_slots = models.PositiveIntegerField(default=0)
+
+    # Metadata
+
+    class Meta:
+        ordering = ["coalition", "unit_type"]
+        verbose_name = "Mission File Unit"
+
+    # Methods
+
+    def __str__(self):
+        return f"{self.count} x {self.unit_type} ({self.coalition})"
@@ -13,12 +13,8 @@ class MissionImagery(models.Model):
         null=True,
         blank=True,
     )
+    date_modified = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-mission"]
         verbose_name_plural = "Mission Imagery"
-
-    # Override the delete class to ensure the image is deleted from the file system
-    def delete(self):
-        self.image.delete()
-        super().delete()
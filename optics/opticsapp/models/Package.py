@@ -82,6 +82,9 @@ class Package(models.Model):
         return missionID
 
     def copyToMission(self, mission, user):
+        # Avoid a circular import, the copy service imports the models.
+        from ..services.mission_copy import MissionGraphCopier
+
         missionID = self.mission.id
-        self.new(mission, user)
+        MissionGraphCopier(user).copy_packages([self], mission)
         return missionID
@@ -0,0 +1,18 @@
+from django.db import models
+
+
+class PdfArtifact(models.Model):
+    """Index of rendered PDFs held in the PDF cache storage, used for LRU eviction."""
+
+    key = models.CharField(max_length=64, unique=True)
+    path = models.CharField(max_length=255)
+    size = models.PositiveIntegerField(default=0)
+    date_created = models.DateTimeField(auto_now_add=True)
+    last_accessed = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ["last_accessed"]
+        verbose_name = "PDF Artifact"
+
+    def __str__(self):
+        return self.path
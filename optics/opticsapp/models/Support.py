@@ -68,6 +68,7 @@ class Support(models.Model):
 		null=True, 
 		blank=True
 	)
+	date_modified = models.DateTimeField(auto_now=True)
 
 
 	def new(self, missionObject):
@@ -49,11 +49,24 @@ class Target(models.Model):
 		null=True,
 		blank=True,
 	)
+	# Numeric copies of lat, long and elev, read from the text on save.
+	lat_deg = models.FloatField(
+		null=True,
+		blank=True,
+		editable=False
+	)
+	long_deg = models.FloatField(
+		null=True,
+		blank=True,
+		editable=False
+	)
+	elev_ft = models.FloatField(
+		null=True,
+		blank=True,
+		editable=False
+	)
+	date_modified = models.DateTimeField(auto_now=True)
 
-	# Override the delete class to ensure the image is deleted from the file system
-	def delete(self):
-		self.target_image.delete()
-		super().delete()
 	# Metadata
 
 	class Meta:
@@ -35,6 +35,32 @@ class Threat(models.Model):
 		help_text="Enter Threat Description/Situation.",
 		default="Threat description to be added here.",
 	)
+	lat = models.CharField(
+		max_length=30,
+		help_text="Enter threat latitude, or an MGRS grid reference.",
+		verbose_name="Threat Latitude",
+		null=True,
+		blank=True,
+	)
+	long = models.CharField(
+		max_length=30,
+		help_text="Enter threat longitude.",
+		verbose_name="Threat Longitude",
+		null=True,
+		blank=True,
+	)
+	# Numeric copies of lat and long, read from the text on save.
+	lat_deg = models.FloatField(
+		null=True,
+		blank=True,
+		editable=False
+	)
+	long_deg = models.FloatField(
+		null=True,
+		blank=True,
+		editable=False
+	)
+	date_modified = models.DateTimeField(auto_now=True)
 
 
 	def new(self, missionObject):
@@ -44,6 +70,8 @@ class Threat(models.Model):
 			name = self.name,
 			threat_type = self.threat_type,
 			description = self.description,
+			lat = self.lat,
+			long = self.long,
 		)
 		
 		new_threat_instance.save()
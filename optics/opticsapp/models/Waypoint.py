@@ -61,6 +61,23 @@ class Waypoint(models.Model):
 		null=True, 
 		blank=True
 	)
+	# Numeric copies of lat, long and elevation, read from the text on save.
+	lat_deg = models.FloatField(
+		null=True,
+		blank=True,
+		editable=False
+	)
+	long_deg = models.FloatField(
+		null=True,
+		blank=True,
+		editable=False
+	)
+	elevation_ft = models.FloatField(
+		null=True,
+		blank=True,
+		editable=False
+	)
+	date_modified = models.DateTimeField(auto_now=True)
 
 	
 	def new(self, flightObject):
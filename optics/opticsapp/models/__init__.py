@@ -25,3 +25,11 @@ from .WaypointType import *
 from .SupportType import *
 from .ThreatType import *
 from .AirframeDefaults import *
+from .DiscordOutbox import *
+from .PdfArtifact import *
+from .ImageRendition import *
+from .MediaBlob import *
+from .Debrief import *
+from .FlightDebrief import *
+from .MissionFileMetadata import *
+from .MissionFileUnit import *
@@ -0,0 +1,107 @@
+import logging
+import threading
+import time
+
+import boto3
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+AVATAR_PREFIX = "assets/img/avatars/"
+IMAGE_EXTENSIONS = (".gif", ".jpeg", ".jpg", ".png", ".webp")
+
+
+class AvatarCatalog:
+    """
+    The avatar images under ``static/assets/img/avatars/``, listed from S3 once and
+    kept in the cache.
+
+    The manifest never expires from the cache. Once it is older than ``ttl``
+    seconds it is still served while one background thread, across all processes
+    sharing the cache, lists the bucket again. A single S3 client is created per
+    process and reused by every listing.
+    """
+
+    manifest_key = "avatars:manifest"
+    refresh_key = "avatars:refreshing"
+
+    def __init__(self, alias="default", ttl=3600, refresh_timeout=300):
+        self.alias = alias
+        self.ttl = ttl
+        self.refresh_timeout = refresh_timeout
+        self._client = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, "AVATAR_CATALOG", {})
+        return cls(alias=options.get("ALIAS", "default"), ttl=options.get("TTL", 3600))
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                # boto3 clients, unlike resources, are safe to share between threads.
+                self._client = boto3.session.Session().client(
+                    "s3",
+                    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                    region_name=settings.AWS_S3_REGION_NAME,
+                )
+            return self._client
+
+    @property
+    def location(self):
+        options = settings.STORAGES["staticfiles"].get("OPTIONS", {})
+        return options.get("location", "")
+
+    def list_avatars(self):
+        """Lists the avatar images as static file names, e.g. ``assets/img/...``."""
+        root = f"{self.location}/" if self.location else ""
+        paginator = self.client.get_paginator("list_objects_v2")
+        names = []
+        for page in paginator.paginate(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME, Prefix=root + AVATAR_PREFIX
+        ):
+            for obj in page.get("Contents", []):
+                if obj["Key"].lower().endswith(IMAGE_EXTENSIONS):
+                    names.append(obj["Key"][len(root) :])
+        return sorted(names)
+
+    def build(self):
+        manifest = {"built": time.time(), "files": self.list_avatars()}
+        self.cache.set(self.manifest_key, manifest, None)
+        logger.info(f"Built the avatar catalog with {len(manifest['files'])} files.")
+        return manifest
+
+    def files(self):
+        manifest = self.cache.get(self.manifest_key)
+        if manifest is None:
+            return self.build()["files"]
+        if time.time() - manifest["built"] > self.ttl:
+            self.refresh_in_background()
+        return manifest["files"]
+
+    def refresh_in_background(self):
+        # add() only succeeds for the first caller until the refresh finishes.
+        if not self.cache.add(self.refresh_key, True, self.refresh_timeout):
+            return None
+        thread = threading.Thread(target=self.refresh, daemon=True)
+        thread.start()
+        return thread
+
+    def refresh(self):
+        try:
+            self.build()
+        except Exception:
+            logger.exception("Failed to refresh the avatar catalog.")
+        finally:
+            self.cache.delete(self.refresh_key)
+
+
+avatar_catalog = AvatarCatalog.from_settings()
@@ -0,0 +1,33 @@
+from django.db.models import Count
+
+from ..models import Campaign
+from .versions import versioned_cache
+
+
+def campaign_cards(user, is_admin, status=None):
+    """
+    The campaigns shown on the campaign list, as one query.
+
+    Each campaign carries its mission and comment counts, the cache version its
+    card fragment is keyed on and whether ``user`` may edit it. ``status`` filters
+    by status name; None lists every campaign.
+    """
+    campaigns = (
+        Campaign.objects.select_related("status", "dcs_map", "created_by__profile")
+        .annotate(
+            mission_count=Count("mission", distinct=True),
+            comment_count=Count("comments", distinct=True),
+        )
+        .order_by("status", "name")
+    )
+    if status is not None:
+        campaigns = campaigns.filter(status__name__iexact=status)
+
+    campaigns = list(campaigns)
+    versions = versioned_cache.versions(
+        "campaign", [campaign.id for campaign in campaigns]
+    )
+    for campaign in campaigns:
+        campaign.cache_version = versions[campaign.id]
+        campaign.can_edit = is_admin or campaign.created_by_id == user.id
+    return campaigns
@@ -0,0 +1,266 @@
+import math
+import re
+
+import numpy as np
+
+# WGS84 ellipsoid.
+SEMI_MAJOR_AXIS = 6378137.0
+FLATTENING = 1 / 298.257223563
+# Mean radius, for great-circle distances.
+EARTH_RADIUS = 6371008.8
+FEET_PER_METRE = 3.28084
+
+
+class TransverseMercator:
+    """
+    The projection of a DCS theatre's flat x (north) / y (east) map coordinates,
+    in metres.
+    """
+
+    def __init__(
+        self, central_meridian, false_easting, false_northing, scale_factor=0.9996
+    ):
+        self.central_meridian = central_meridian
+        self.false_easting = false_easting
+        self.false_northing = false_northing
+        self.scale_factor = scale_factor
+
+    def to_lat_long(self, x, y):
+        """Returns the WGS84 latitude and longitude in degrees of a map point."""
+        e2 = FLATTENING * (2 - FLATTENING)
+        ep2 = e2 / (1 - e2)
+        k0 = self.scale_factor
+
+        # Footpoint latitude, from the meridian distance (Snyder 8-18 to 8-21).
+        meridian = (x - self.false_northing) / k0
+        mu = meridian / (
+            SEMI_MAJOR_AXIS * (1 - e2 / 4 - 3 * e2**2 / 64 - 5 * e2**3 / 256)
+        )
+        e1 = (1 - math.sqrt(1 - e2)) / (1 + math.sqrt(1 - e2))
+        phi1 = (
+            mu
+            + (3 * e1 / 2 - 27 * e1**3 / 32) * math.sin(2 * mu)
+            + (21 * e1**2 / 16 - 55 * e1**4 / 32) * math.sin(4 * mu)
+            + (151 * e1**3 / 96) * math.sin(6 * mu)
+            + (1097 * e1**4 / 512) * math.sin(8 * mu)
+        )
+
+        sin1, cos1, tan1 = math.sin(phi1), math.cos(phi1), math.tan(phi1)
+        c1 = ep2 * cos1**2
+        t1 = tan1**2
+        n1 = SEMI_MAJOR_AXIS / math.sqrt(1 - e2 * sin1**2)
+        r1 = SEMI_MAJOR_AXIS * (1 - e2) / (1 - e2 * sin1**2) ** 1.5
+        d = (y - self.false_easting) / (n1 * k0)
+
+        lat = phi1 - (n1 * tan1 / r1) * (
+            d**2 / 2
+            - (5 + 3 * t1 + 10 * c1 - 4 * c1**2 - 9 * ep2) * d**4 / 24
+            + (61 + 90 * t1 + 298 * c1 + 45 * t1**2 - 252 * ep2 - 3 * c1**2)
+            * d**6
+            / 720
+        )
+        long = (
+            d
+            - (1 + 2 * t1 + c1) * d**3 / 6
+            + (5 - 2 * c1 + 28 * t1 - 3 * c1**2 + 8 * ep2 + 24 * t1**2) * d**5 / 120
+        ) / cos1
+        return math.degrees(lat), self.central_meridian + math.degrees(long)
+
+
+# Projection of each theatre, as named in a mission's "theatre" value.
+THEATRES = {
+    "Caucasus": TransverseMercator(33, -99516.9999999732, -4998114.999999984),
+    "PersianGulf": TransverseMercator(57, 75755.99999999645, -2894933.0000000377),
+    "Syria": TransverseMercator(39, 282801.00000003993, -3879865.9999999935),
+    "Nevada": TransverseMercator(-117, -193996.80999964548, -4410028.063999966),
+    "Normandy": TransverseMercator(-3, -195526.00000000204, -5484812.999999951),
+    "TheChannel": TransverseMercator(3, 99376.00000000288, -5636889.00000001),
+    "MarianaIslands": TransverseMercator(147, 238417.99999989968, -1491840.000000048),
+    "Falklands": TransverseMercator(-57, 147639.99999997593, 5815417.000000032),
+    "SinaiMap": TransverseMercator(33, 169221.9999999585, -3325312.9999999693),
+}
+
+
+def format_ddm(value, positive, negative, degree_digits):
+    """Formats degrees as degrees and decimal minutes, e.g. N 42°10.500'."""
+    hemisphere = positive if value >= 0 else negative
+    # Rounded to thousandths of a minute first, so 59.9999' carries to a degree.
+    thousandths = round(abs(value) * 60000)
+    degrees, thousandths = divmod(thousandths, 60000)
+    return f"{hemisphere} {degrees:0{degree_digits}d}°{thousandths / 1000:06.3f}'"
+
+
+def format_lat(value):
+    return format_ddm(value, "N", "S", 2)
+
+
+def format_long(value):
+    return format_ddm(value, "E", "W", 3)
+
+
+def great_circle(lat1, long1, lat2, long2):
+    """
+    Returns the great-circle distance in metres between points given in degrees.
+
+    Takes scalars or NumPy arrays, so a whole track is measured in one call.
+    """
+    lat1, long1, lat2, long2 = map(np.radians, (lat1, long1, lat2, long2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((long2 - long1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(a))
+
+
+def initial_bearing(lat1, long1, lat2, long2):
+    """
+    Returns the initial true bearing in degrees from the first point to the second.
+
+    Takes scalars or NumPy arrays, like great_circle.
+    """
+    lat1, long1, lat2, long2 = map(np.radians, (lat1, long1, lat2, long2))
+    y = np.sin(long2 - long1) * np.cos(lat2)
+    x = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(
+        long2 - long1
+    )
+    return np.degrees(np.arctan2(y, x)) % 360
+
+
+# ---------------- Parsing -------------------------
+
+# Degrees, then optional minutes and seconds; only the last part may have decimals.
+ANGLE = re.compile(
+    r"""
+    (?P<degrees>\d+(?:\.\d+)?)\s*[°º:\s]?\s*
+    (?:(?P<minutes>\d+(?:\.\d+)?)\s*['′:\s]?\s*
+    (?:(?P<seconds>\d+(?:\.\d+)?)\s*(?:"|″|'')?)?)?
+    """,
+    re.VERBOSE,
+)
+MGRS = re.compile(
+    r"(?P<zone>\d{1,2})\s*(?P<band>[C-HJ-NP-X])\s*"
+    r"(?P<column>[A-HJ-NP-Z])(?P<row>[A-HJ-NP-V])\s*"
+    r"(?P<easting>\d{0,5})\s*(?P<northing>\d{0,5})"
+)
+ELEVATION = re.compile(
+    r"(?P<flight_level>FL)?\s*(?P<value>-?\d[\d,]*(?:\.\d+)?)\s*"
+    r"(?P<unit>M\b|METRES?\b|METERS?\b)?"
+)
+
+MGRS_BANDS = "CDEFGHJKLMNPQRSTUVWX"
+MGRS_COLUMNS = "ABCDEFGHJKLMNPQRSTUVWXYZ"
+MGRS_ROWS = "ABCDEFGHJKLMNPQRSTUV"
+
+
+def parse_angle(text, positive, negative, limit):
+    """
+    Reads degrees from DD (42.1779), DDM (N 42°10.673') or DMS (N 42°10'40.4")
+    text, with the hemisphere letter before or after the value or a leading sign.
+    Returns None when the text is not an angle.
+    """
+    text = (text or "").strip().upper()
+    sign = 1
+    if text[:1] in (positive, negative, "-", "+"):
+        sign = -1 if text[0] in (negative, "-") else 1
+        text = text[1:].strip()
+    elif text[-1:] in (positive, negative):
+        sign = -1 if text[-1] == negative else 1
+        text = text[:-1].strip()
+
+    match = ANGLE.fullmatch(text)
+    if not match:
+        return None
+    parts = [match["degrees"], match["minutes"], match["seconds"]]
+    given = [part for part in parts if part is not None]
+    if any("." in part for part in given[:-1]):
+        return None
+    degrees, minutes, seconds = (float(part or 0) for part in parts)
+    if minutes >= 60 or seconds >= 60:
+        return None
+    value = degrees + minutes / 60 + seconds / 3600
+    if value > limit:
+        return None
+    return sign * value
+
+
+def parse_lat(text):
+    return parse_angle(text, "N", "S", 90)
+
+
+def parse_long(text):
+    return parse_angle(text, "E", "W", 180)
+
+
+def meridian_arc(lat):
+    """Returns the distance in metres along a meridian from the equator to ``lat``."""
+    phi = math.radians(lat)
+    return 111132.954 * lat - 16038.509 * math.sin(2 * phi) + 16.833 * math.sin(4 * phi)
+
+
+def parse_mgrs(text):
+    """
+    Reads an MGRS grid reference (37T GG 12345 67890, 37TGG1234567890) into a
+    ``(lat, long)`` pair of degrees. Returns None when the text is not one.
+    """
+    match = MGRS.fullmatch((text or "").strip().upper())
+    if not match:
+        return None
+    zone, band = int(match["zone"]), match["band"]
+    easting, northing = match["easting"], match["northing"]
+    if not northing and len(easting) % 2 == 0:
+        half = len(easting) // 2
+        easting, northing = easting[:half], easting[half:]
+    if not 1 <= zone <= 60 or len(easting) != len(northing):
+        return None
+
+    # The 100 km square letters repeat every three zones across and 2000 km up.
+    column = MGRS_COLUMNS.index(match["column"]) - (zone - 1) % 3 * 8
+    row = (MGRS_ROWS.index(match["row"]) - (5 if zone % 2 == 0 else 0)) % 20
+    if not 0 <= column < 8:
+        return None
+    scale = 10 ** (5 - len(easting))
+    x = (column + 1) * 100000 + int(easting or 0) * scale
+    y = row * 100000 + int(northing or 0) * scale
+
+    southern = band < "N"
+    false_northing = 10000000 if southern else 0
+    band_lat = -80 + MGRS_BANDS.index(band) * 8
+    band_northing = meridian_arc(band_lat) * 0.9996 + false_northing
+    # The row letters repeat every 2000 km, the band says which repeat it is.
+    while y < band_northing - 100000:
+        y += 2000000
+
+    utm = TransverseMercator(zone * 6 - 183, 500000, false_northing)
+    return utm.to_lat_long(y, x)
+
+
+def parse_position(lat, long):
+    """
+    Reads a waypoint or target position into a ``(lat, long)`` pair of degrees.
+    The latitude field may also hold a whole MGRS reference. Returns
+    ``(None, None)`` when the position cannot be read.
+    """
+    for grid in (f"{lat or ''} {long or ''}", lat):
+        position = parse_mgrs(grid)
+        if position is not None:
+            return position
+    lat, long = parse_lat(lat), parse_long(long)
+    if lat is None or long is None:
+        return None, None
+    return lat, long
+
+
+def parse_elevation(text):
+    """
+    Reads an elevation into feet: 20000, 20,000 ft, FL200, 6096 m or 1500 AGL.
+    Returns None when there is no number to read.
+    """
+    match = ELEVATION.match((text or "").strip().upper())
+    if not match:
+        return None
+    value = float(match["value"].replace(",", ""))
+    if match["flight_level"]:
+        return value * 100
+    if match["unit"]:
+        return value * FEET_PER_METRE
+    return value
@@ -0,0 +1,92 @@
+from django.db.models import Count, Prefetch
+
+from ..models import Aircraft, Campaign, Comment, Flight, Mission, Package, Waypoint
+from .versions import versioned_cache
+
+
+def comments():
+    return Comment.objects.select_related("user__profile")
+
+
+def load_campaign(campaign_id):
+    return (
+        Campaign.objects.select_related(
+            "status", "dcs_map", "created_by__profile", "modified_by"
+        )
+        .prefetch_related(
+            Prefetch("mission_set", queryset=Mission.objects.order_by("number")),
+            Prefetch("comments", queryset=comments()),
+        )
+        .get(id=campaign_id)
+    )
+
+
+def load_package(package_id):
+    return (
+        Package.objects.select_related("mission__campaign")
+        .prefetch_related(
+            Prefetch(
+                "flight_set",
+                queryset=Flight.objects.select_related("task", "airframe").annotate(
+                    aircraft_count=Count("aircraft")
+                ),
+            ),
+            Prefetch("comments", queryset=comments()),
+            "packageimagery_set",
+        )
+        .get(id=package_id)
+    )
+
+
+def load_flight(flight_id):
+    return (
+        Flight.objects.select_related("package__mission__campaign", "task", "airframe")
+        .prefetch_related(
+            Prefetch(
+                "aircraft_set",
+                queryset=Aircraft.objects.select_related("type", "pilot", "rio_wso"),
+            ),
+            Prefetch(
+                "waypoint_set",
+                queryset=Waypoint.objects.select_related("waypoint_type").order_by(
+                    "number"
+                ),
+            ),
+            "targets",
+            Prefetch("comments", queryset=comments()),
+            "flightimagery_set",
+        )
+        .get(id=flight_id)
+    )
+
+
+def load_mission(mission_id):
+    return Mission.objects.with_detail().get(id=mission_id)
+
+
+# Each detail page's object graph, cached for the current version of its node.
+# A missing object raises DoesNotExist from the loader and nothing is cached.
+
+
+def campaign_detail(campaign_id):
+    return versioned_cache.get_or_set(
+        "campaign", campaign_id, lambda: load_campaign(campaign_id), "detail"
+    )
+
+
+def mission_detail(mission_id):
+    return versioned_cache.get_or_set(
+        "mission", mission_id, lambda: load_mission(mission_id), "detail"
+    )
+
+
+def package_detail(package_id):
+    return versioned_cache.get_or_set(
+        "package", package_id, lambda: load_package(package_id), "detail"
+    )
+
+
+def flight_detail(flight_id):
+    return versioned_cache.get_or_set(
+        "flight", flight_id, lambda: load_flight(flight_id), "detail"
+    )
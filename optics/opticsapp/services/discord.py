@@ -0,0 +1,230 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import DiscordOutbox, Mission
+from .queue_worker import QueueWorker
+from .webhooks import webhook_registry
+
+USER_AGENT = "DiscordBot (https://your.bot/url) Python/3.9 aiohttp/3.8.1"
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Rate limited by Discord, retry after {retry_after}s.")
+        self.retry_after = retry_after
+
+
+class PermanentError(Exception):
+    pass
+
+
+# ---------------- Outbox -------------------------
+
+
+def enqueue_sync(mission, webhook_payload, event_payload):
+    """
+    Queues a create/update of the mission's Discord message and Scheduled Event.
+
+    Repeated edits while an entry is still pending are coalesced into that entry, so
+    the dispatcher sends a single PATCH carrying the latest payload.
+    """
+    with transaction.atomic():
+        coalesced = DiscordOutbox.objects.filter(
+            mission=mission, action=DiscordOutbox.SYNC, status=DiscordOutbox.PENDING
+        ).update(
+            webhook_payload=webhook_payload,
+            event_payload=event_payload,
+            date_modified=timezone.now(),
+        )
+        if not coalesced:
+            DiscordOutbox.objects.create(
+                mission=mission,
+                action=DiscordOutbox.SYNC,
+                webhook_payload=webhook_payload,
+                event_payload=event_payload,
+            )
+
+
+def enqueue_delete(mission):
+    """Queues removal of the mission's Discord message and Scheduled Event."""
+    with transaction.atomic():
+        # Nothing left to update on Discord once the mission is going away.
+        DiscordOutbox.objects.filter(
+            mission=mission, action=DiscordOutbox.SYNC, status=DiscordOutbox.PENDING
+        ).delete()
+        if mission.discord_msg_id or mission.discord_api_id:
+            DiscordOutbox.objects.create(
+                mission=mission,
+                action=DiscordOutbox.DELETE,
+                discord_msg_id=mission.discord_msg_id,
+                discord_api_id=mission.discord_api_id,
+            )
+
+
+# ---------------- Dispatcher -------------------------
+
+
+class DiscordDispatcher(QueueWorker):
+    """
+    Delivers DiscordOutbox entries with retry and exponential backoff.
+
+    Discord 429 responses are retried after the advertised ``retry_after``, other
+    client errors fail the entry permanently and anything else, such as server and
+    connection errors or a malformed response, backs off exponentially.
+    """
+
+    model = DiscordOutbox
+    label = "Discord outbox entry [{entry.id}]"
+    working = DiscordOutbox.SENDING
+    permanent_errors = (PermanentError,)
+    batch_size = 20
+    max_attempts = 8
+    retry_fields = QueueWorker.retry_fields + ["next_attempt_at"]
+
+    def __init__(
+        self, session=None, base_delay=5, max_delay=3600, timeout=10, **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.session = session or webhook_registry.session
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+
+    def due(self, now):
+        return Q(status=DiscordOutbox.PENDING, next_attempt_at__lte=now)
+
+    def handle(self, entry):
+        if entry.action == DiscordOutbox.DELETE:
+            self.deliver_delete(entry)
+        else:
+            self.deliver_sync(entry)
+        entry.status = DiscordOutbox.SENT
+        entry.last_error = ""
+        entry.save(update_fields=["status", "attempts", "last_error", "date_modified"])
+
+    def retry_delay(self, entry, error):
+        if isinstance(error, RateLimited):
+            return error.retry_after
+        if entry.attempts >= self.max_attempts:
+            return None
+        return min(self.base_delay * 2 ** (entry.attempts - 1), self.max_delay)
+
+    def retry(self, entry, delay, error):
+        entry.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        super().retry(entry, delay, error)
+
+    def idle(self):
+        self.purge_sent()
+
+    def purge_sent(self, older_than=timedelta(days=7)):
+        return DiscordOutbox.objects.filter(
+            status=DiscordOutbox.SENT, date_modified__lt=timezone.now() - older_than
+        ).delete()[0]
+
+    # Delivery
+
+    def config(self):
+        return {
+            "bot_token": webhook_registry.get("bot token"),
+            "api_url": webhook_registry.get("Discord Event"),
+            "channel_id": webhook_registry.get("channel id"),
+            "webhook_url": webhook_registry.get("Discord"),
+        }
+
+    def api_headers(self, config):
+        return {
+            "Authorization": config["bot_token"],
+            "Content-Type": "application/json",
+            "User-Agent": USER_AGENT,
+        }
+
+    def deliver_sync(self, entry):
+        mission = (
+            Mission.objects.filter(id=entry.mission_id)
+            .values("discord_msg_id", "discord_api_id")
+            .first()
+        )
+        if mission is None:
+            return
+
+        config = self.config()
+        params = {"wait": "true"}
+
+        # Each half is written back as soon as it succeeds, so a retry PATCHes
+        # what was already created rather than posting a duplicate.
+        if mission["discord_msg_id"]:
+            self.send(
+                "PATCH",
+                f"{config['webhook_url']}/messages/{mission['discord_msg_id']}",
+                json=entry.webhook_payload,
+                params=params,
+            )
+        else:
+            response = self.send(
+                "POST", config["webhook_url"], json=entry.webhook_payload, params=params
+            )
+            self.write_back(entry.mission_id, "discord_msg_id", response.json()["id"])
+
+        event_payload = dict(entry.event_payload, channel_id=config["channel_id"])
+        if mission["discord_api_id"]:
+            self.send(
+                "PATCH",
+                f"{config['api_url']}/{mission['discord_api_id']}",
+                json=event_payload,
+                headers=self.api_headers(config),
+            )
+        else:
+            response = self.send(
+                "POST",
+                config["api_url"],
+                json=event_payload,
+                headers=self.api_headers(config),
+            )
+            self.write_back(entry.mission_id, "discord_api_id", response.json()["id"])
+
+    def deliver_delete(self, entry):
+        config = self.config()
+        # A 404 means an earlier attempt already removed it.
+        if entry.discord_msg_id:
+            self.send(
+                "DELETE",
+                f"{config['webhook_url']}/messages/{entry.discord_msg_id}",
+                params={"wait": "true"},
+                allow_missing=True,
+            )
+        if entry.discord_api_id:
+            self.send(
+                "DELETE",
+                f"{config['api_url']}/{entry.discord_api_id}",
+                headers=self.api_headers(config),
+                allow_missing=True,
+            )
+
+    def write_back(self, mission_id, field, value):
+        updated = Mission.objects.filter(id=mission_id).update(**{field: value})
+        if not updated:
+            # The mission was deleted while its create was in flight.
+            DiscordOutbox.objects.create(action=DiscordOutbox.DELETE, **{field: value})
+
+    def send(self, method, url, allow_missing=False, **kwargs):
+        response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+
+        if response.status_code == 429:
+            raise RateLimited(self.retry_after(response))
+        if allow_missing and response.status_code == 404:
+            return response
+        if 400 <= response.status_code < 500:
+            raise PermanentError(
+                f"{method} {url} returned {response.status_code}: {response.text[:200]}"
+            )
+        response.raise_for_status()
+        return response
+
+    def retry_after(self, response):
+        try:
+            return float(response.json()["retry_after"])
+        except (ValueError, KeyError, TypeError):
+            return float(response.headers.get("Retry-After", self.base_delay))
@@ -0,0 +1,204 @@
+import mimetypes
+import posixpath
+import re
+import zlib
+
+from django.conf import settings
+from django.http import (
+    FileResponse,
+    HttpResponse,
+    HttpResponseRedirect,
+    StreamingHttpResponse,
+)
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import content_disposition_header, http_date, quote_etag
+from storages.backends.s3 import S3Storage
+
+# Text formats worth compressing on the way out. Tacview exports XML or plain text
+# ACMI, Liberation saves JSON.
+TEXT_TYPES = {
+    ".xml": "application/xml",
+    ".json": "application/json",
+    ".liberation": "application/json",
+    ".txt": "text/plain",
+    ".csv": "text/csv",
+    ".lua": "text/plain",
+}
+GZIP_RE = re.compile(r"\bgzip\b")
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class UnsatisfiableRange(Exception):
+    pass
+
+
+def download_options():
+    options = {"REDIRECT": True, "EXPIRES": 300, "CHUNK_SIZE": 64 * 1024}
+    options.update(getattr(settings, "DOWNLOADS", {}))
+    return options
+
+
+def text_type(name):
+    """Returns the content type of text files worth compressing, else None."""
+    name = name.lower()
+    if name.endswith(".txt.acmi"):
+        return "text/plain"
+    return TEXT_TYPES.get(posixpath.splitext(name)[1])
+
+
+def accepts_gzip(request):
+    return bool(GZIP_RE.search(request.headers.get("Accept-Encoding", "")))
+
+
+def parse_range(header, size):
+    """
+    Returns the inclusive ``(start, end)`` of a single byte range, or None when the
+    whole file should be sent instead (no header, several ranges, bad syntax).
+    """
+    match = RANGE_RE.match((header or "").strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        # A suffix range, the last N bytes.
+        start, end = max(size - int(last), 0), size - 1
+    if start >= size or end < start:
+        raise UnsatisfiableRange(size)
+    return start, end
+
+
+def read_range(file, start, end, chunk_size):
+    try:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = file.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def gzip_chunks(file, chunk_size):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    try:
+        while chunk := file.read(chunk_size):
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+    finally:
+        file.close()
+
+
+def presigned_url(storage, name, disposition, expires):
+    """
+    A GET URL of ``name`` signed against the bucket itself, valid for ``expires``
+    seconds and saved as ``disposition``. ``storage.url()`` returns an unsigned
+    URL on AWS_S3_CUSTOM_DOMAIN (CloudFront), which ignores both.
+    """
+    return storage.connection.meta.client.generate_presigned_url(
+        "get_object",
+        Params={
+            "Bucket": storage.bucket_name,
+            "Key": posixpath.join(storage.location, name),
+            "ResponseContentDisposition": disposition,
+        },
+        ExpiresIn=expires,
+    )
+
+
+def serve_file(request, field_file, filename, version, last_modified):
+    """
+    Answers a download of ``field_file`` as ``filename``.
+
+    ``version`` changes whenever the row points at another file and is the base of
+    the ETag, so browsers revalidate with a cheap 304. Text files are gzipped for
+    clients accepting it unless a byte range was asked for. Other files are
+    redirected to a short-lived presigned S3 URL, which serves ranges itself, or
+    streamed in chunks with Range support when the storage is not S3.
+    """
+    options = download_options()
+    storage, name = field_file.storage, field_file.name
+    content_type = text_type(name)
+    compress = (
+        content_type is not None
+        and accepts_gzip(request)
+        and "Range" not in request.headers
+    )
+    etag = quote_etag(f"{version}-gzip" if compress else version)
+    disposition = content_disposition_header(True, filename)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        if compress:
+            response = StreamingHttpResponse(
+                gzip_chunks(storage.open(name, "rb"), options["CHUNK_SIZE"]),
+                content_type=content_type,
+            )
+            response["Content-Encoding"] = "gzip"
+        elif isinstance(storage, S3Storage) and options["REDIRECT"]:
+            response = HttpResponseRedirect(
+                presigned_url(storage, name, disposition, options["EXPIRES"])
+            )
+            # The presigned URL expires, it must not be reused from a cache.
+            patch_cache_control(response, private=True, no_store=True)
+            return response
+        else:
+            response = ranged_response(
+                request, storage, name, content_type, etag, last_modified, options
+            )
+        response["Content-Disposition"] = disposition
+
+    if content_type is not None:
+        patch_vary_headers(response, ["Accept-Encoding"])
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def ranged_response(
+    request, storage, name, content_type, etag, last_modified, options
+):
+    size = storage.size(name)
+    content_type = (
+        content_type or mimetypes.guess_type(name)[0] or "application/octet-stream"
+    )
+    # A stale If-Range validator asks for the whole, changed file.
+    if_range = request.headers.get("If-Range")
+    byte_range = None
+    if if_range in (None, etag, http_date(last_modified)):
+        try:
+            byte_range = parse_range(request.headers.get("Range"), size)
+        except UnsatisfiableRange:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    if byte_range is None:
+        response = FileResponse(storage.open(name, "rb"), content_type=content_type)
+        response.block_size = options["CHUNK_SIZE"]
+        response["Content-Length"] = size
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            read_range(storage.open(name, "rb"), start, end, options["CHUNK_SIZE"]),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = end - start + 1
+    response["Accept-Ranges"] = "bytes"
+    return response
@@ -0,0 +1,251 @@
+import collections
+from datetime import datetime, time, timedelta
+from datetime import timezone as dt_timezone
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from ..models import MediaBlob, MissionFile, MissionFileMetadata, MissionFileUnit
+from .liberation import THEATRE_SUFFIX, LiberationError, read_save
+from .lua import items
+from .media import sha256_of
+from .miz import PLAYER_SKILLS, MizError, MizFile, normalize, weather_fields
+from .queue_worker import QueueWorker
+
+UNIT_CATEGORIES = ("plane", "helicopter", "vehicle", "ship", "static")
+# DCS coalition names and the MissionFileUnit coalition each is counted under.
+COALITIONS = {"blue": "blue", "red": "red", "neutrals": "neutral"}
+
+# The parts of the mission table the metadata is read from; routes, tasks and the
+# rest of each group are skipped without being built.
+METADATA_SELECT = {
+    "theatre": True,
+    "date": True,
+    "start_time": True,
+    "coalition": {
+        "*": {
+            "country": {
+                "*": {
+                    category: {
+                        "group": {"*": {"units": {"*": {"type": True, "skill": True}}}}
+                    }
+                    for category in UNIT_CATEGORIES
+                }
+            }
+        }
+    },
+}
+
+
+def unit_counts(rows):
+    """
+    Totals ``(coalition, unit type, is client)`` rows into
+    ``{(coalition, unit type): [count, client slots]}``.
+    """
+    counts = collections.defaultdict(lambda: [0, 0])
+    for coalition, unit_type, client in rows:
+        entry = counts[coalition, unit_type]
+        entry[0] += 1
+        entry[1] += int(client)
+    return counts
+
+
+def miz_metadata(file):
+    """Reads the theatre, start and units of a .miz from its mission table only."""
+    mission = MizFile(file).read("mission", {"mission": METADATA_SELECT})
+    mission = mission.get("mission", {})
+
+    def units():
+        for name, coalition in mission.get("coalition", {}).items():
+            for country in items(coalition.get("country", {})):
+                for category in UNIT_CATEGORIES:
+                    for group in items(country.get(category, {}).get("group", {})):
+                        for unit in items(group.get("units", {})):
+                            yield (
+                                COALITIONS.get(name, name),
+                                str(unit.get("type", "")),
+                                unit.get("skill") in PLAYER_SKILLS,
+                            )
+
+    return {
+        "theatre": str(mission.get("theatre", "")),
+        "start": weather_fields(mission).get("mission_game_date"),
+        "units": unit_counts(units()),
+    }
+
+
+def liberation_metadata(file):
+    """Reads the theatre, start and planned aircraft of a Liberation save."""
+    game = read_save(file)
+    try:
+        start = game.conditions.start_time
+        if start is not None:
+            start = start.replace(tzinfo=dt_timezone.utc)
+        rows = [
+            (
+                coalition,
+                flight.squadron.aircraft.dcs_unit_type._saved_name,
+                pilot is not None and getattr(pilot, "player", False),
+            )
+            for coalition, ato in (("blue", game.blue_ato), ("red", game.red_ato))
+            for package in ato.packages
+            for flight in package.flights
+            for pilot in flight.roster.pilots
+        ]
+        theatre = type(game.theater)._saved_name.removesuffix(THEATRE_SUFFIX)
+    except (AttributeError, TypeError) as err:
+        raise LiberationError(f"Could not read the save: {err}")
+    return {"theatre": theatre, "start": start, "units": unit_counts(rows)}
+
+
+READERS = {"MIZ": miz_metadata, "LIB": liberation_metadata}
+
+
+def file_metadata(file, file_type):
+    """
+    Reads what the search needs from an open mission ``file``: the theatre, start
+    and units for the types in READERS, nothing for the others.
+    """
+    reader = READERS.get(file_type)
+    if reader is None:
+        return {"theatre": "", "start": None, "units": {}}
+    return reader(file)
+
+
+def queue(mission_file):
+    """Queues the metadata of ``mission_file``, unless its file was already read."""
+    source = mission_file.mission_file.name
+    requeued = (
+        MissionFileMetadata.objects.filter(mission_file=mission_file)
+        .exclude(source=source)
+        .update(
+            source=source,
+            status=MissionFileMetadata.PENDING,
+            attempts=0,
+            claimed_at=None,
+            last_error="",
+        )
+    )
+    if not requeued:
+        MissionFileMetadata.objects.bulk_create(
+            [MissionFileMetadata(mission_file=mission_file, source=source)],
+            ignore_conflicts=True,
+        )
+
+
+@receiver(post_save, sender=MissionFile)
+def mission_file_saved(sender, instance, **kwargs):
+    if instance.mission_file:
+        transaction.on_commit(lambda: queue(instance))
+
+
+def backfill():
+    """Queues every uploaded file that has no metadata row yet."""
+    pending = [
+        MissionFileMetadata(
+            mission_file=mission_file, source=mission_file.mission_file.name
+        )
+        for mission_file in MissionFile.objects.filter(metadata__isnull=True)
+        .exclude(mission_file="")
+        .exclude(mission_file__isnull=True)
+        .only("id", "mission_file")
+    ]
+    MissionFileMetadata.objects.bulk_create(pending, ignore_conflicts=True)
+    return len(pending)
+
+
+def start_of_day(date):
+    return datetime.combine(date, time.min, tzinfo=dt_timezone.utc)
+
+
+def search(
+    theatre=None, unit=None, coalition=None, start_after=None, start_before=None
+):
+    """
+    Returns the read metadata matching every given filter, newest start first.
+    ``unit`` matches unit types starting with it, ignoring case and punctuation.
+    """
+    results = MissionFileMetadata.objects.filter(
+        status=MissionFileMetadata.DONE
+    ).select_related("mission_file__mission")
+    if theatre:
+        results = results.filter(theatre=theatre)
+    # Whole days as ranges of the column, so the start index can be used.
+    if start_after:
+        results = results.filter(start__gte=start_of_day(start_after))
+    if start_before:
+        results = results.filter(start__lt=start_of_day(start_before + timedelta(1)))
+    if unit or coalition:
+        units = MissionFileUnit.objects.all()
+        if unit:
+            units = units.filter(type_key__startswith=normalize(unit))
+        if coalition:
+            units = units.filter(coalition=coalition)
+        results = results.filter(id__in=units.values("metadata_id"))
+    return results.order_by("-start", "-id")
+
+
+# ---------------- Worker -------------------------
+
+
+class MetadataWorker(QueueWorker):
+    """Reads the metadata of queued mission files, retrying failed reads a few times."""
+
+    model = MissionFileMetadata
+    label = "Metadata of {entry.source}"
+    permanent_errors = (FileNotFoundError, MizError, LiberationError)
+    claim_timeout = timedelta(minutes=15)
+    # The hash and size are kept when only the contents could not be read.
+    fail_fields = QueueWorker.fail_fields + ["sha256", "size"]
+
+    def __init__(self, storage=default_storage, **kwargs):
+        super().__init__(**kwargs)
+        self.storage = storage
+
+    def handle(self, entry):
+        with self.storage.open(entry.source, "rb") as file:
+            self.save(entry, file)
+
+    def backfill(self):
+        return backfill()
+
+    def save(self, entry, file):
+        # Uploads are hashed when they are stored, the hash is only computed here
+        # for files stored before that.
+        blob = MediaBlob.objects.filter(name=entry.source, sha256__isnull=False).first()
+        if blob is not None and blob.size is not None:
+            entry.sha256, entry.size = blob.sha256, blob.size
+        else:
+            entry.sha256, entry.size = sha256_of(file)
+        metadata = file_metadata(file, entry.mission_file.file_type)
+
+        units = [
+            MissionFileUnit(
+                metadata=entry,
+                coalition=coalition[:10],
+                unit_type=unit_type[:100],
+                type_key=normalize(unit_type)[:100],
+                count=count,
+                client_slots=clients,
+            )
+            for (coalition, unit_type), (count, clients) in sorted(
+                metadata["units"].items()
+            )
+        ]
+        totals = collections.Counter()
+        for unit in units:
+            totals[unit.coalition] += unit.count
+        with transaction.atomic():
+            MissionFileUnit.objects.filter(metadata=entry).delete()
+            MissionFileUnit.objects.bulk_create(units)
+            entry.status = MissionFileMetadata.DONE
+            entry.theatre = metadata["theatre"][:50]
+            entry.start = metadata["start"]
+            entry.blue_units = totals["blue"]
+            entry.red_units = totals["red"]
+            entry.neutral_units = totals["neutral"]
+            entry.client_slots = sum(unit.client_slots for unit in units)
+            entry.last_error = ""
+            entry.save()
@@ -0,0 +1,147 @@
+import numpy as np
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from ..models import Target, Threat, Waypoint
+from .coordinates import great_circle, initial_bearing, parse_elevation, parse_position
+from .versions import versioned_cache
+
+METRES_PER_NM = 1852
+
+
+def waypoint_columns(lat, long, elevation):
+    """The numeric Waypoint columns read from its position and elevation text."""
+    lat_deg, long_deg = parse_position(lat, long)
+    return {
+        "lat_deg": lat_deg,
+        "long_deg": long_deg,
+        "elevation_ft": parse_elevation(elevation),
+    }
+
+
+def target_columns(lat, long, elev):
+    """The numeric Target columns read from its position and elevation text."""
+    lat_deg, long_deg = parse_position(lat, long)
+    return {"lat_deg": lat_deg, "long_deg": long_deg, "elev_ft": parse_elevation(elev)}
+
+
+# The columns are set on every save; bulk_create and bulk_update send no signals,
+# so the importers set them from the same functions.
+
+
+@receiver(pre_save, sender=Waypoint)
+def waypoint_position(sender, instance, **kwargs):
+    columns = waypoint_columns(instance.lat, instance.long, instance.elevation)
+    for name, value in columns.items():
+        setattr(instance, name, value)
+
+
+@receiver(pre_save, sender=Target)
+def target_position(sender, instance, **kwargs):
+    columns = target_columns(instance.lat, instance.long, instance.elev)
+    for name, value in columns.items():
+        setattr(instance, name, value)
+
+
+@receiver(pre_save, sender=Threat)
+def threat_position(sender, instance, **kwargs):
+    instance.lat_deg, instance.long_deg = parse_position(instance.lat, instance.long)
+
+
+@receiver(post_save, sender=Waypoint)
+@receiver(post_delete, sender=Waypoint)
+def waypoint_changed(sender, instance, **kwargs):
+    # Only the route's own version, the rest of the tree is bumped in versions.
+    versioned_cache.bump("route", instance.flight_id)
+
+
+# ---------------- Legs -------------------------
+
+
+def clock(seconds):
+    if seconds is None:
+        return ""
+    minutes = round(seconds / 60)
+    return f"{minutes // 60}:{minutes % 60:02d}"
+
+
+class Leg:
+    """
+    One leg of a flight plan, from the previous waypoint to ``number``. Values are
+    None when a position, the planned speed or the fuel flow is missing.
+    """
+
+    def __init__(self, number, start, end, distance, bearing, ete, elapsed, fuel):
+        self.number = number
+        self.start = start
+        self.end = end
+        # Nautical miles, degrees true, seconds, seconds and lbs.
+        self.distance = distance
+        self.bearing = bearing
+        self.ete = ete
+        self.elapsed = elapsed
+        self.fuel = fuel
+
+    @property
+    def ete_display(self):
+        return clock(self.ete)
+
+    @property
+    def elapsed_display(self):
+        return clock(self.elapsed)
+
+
+def known(values, digits=0):
+    """The values of a NumPy array as rounded floats, None where they are NaN."""
+    return [
+        None if np.isnan(value) else round(float(value), digits) for value in values
+    ]
+
+
+def leg_table(waypoints, speed=None, fuel_flow=None):
+    """
+    Returns a Leg between each pair of consecutive ``waypoints``, in order.
+
+    The distances, bearings, times and fuel of the whole route are computed in one
+    pass over arrays of the cached positions. Times need the planned ground
+    ``speed`` in knots and fuel the ``fuel_flow`` in lbs per hour; the elapsed time
+    and fuel are cumulative, so they stop at the first leg that cannot be measured.
+    """
+    waypoints = list(waypoints)
+    if len(waypoints) < 2:
+        return []
+    lat = np.array([waypoint.lat_deg for waypoint in waypoints], dtype=float)
+    long = np.array([waypoint.long_deg for waypoint in waypoints], dtype=float)
+
+    distance = great_circle(lat[:-1], long[:-1], lat[1:], long[1:]) / METRES_PER_NM
+    bearing = initial_bearing(lat[:-1], long[:-1], lat[1:], long[1:])
+    ete = distance / speed * 3600 if speed else np.full_like(distance, np.nan)
+    elapsed = np.cumsum(ete)
+    fuel = np.cumsum(ete / 3600 * fuel_flow) if fuel_flow else np.full_like(ete, np.nan)
+
+    columns = zip(
+        known(distance, 1), known(bearing), known(ete), known(elapsed), known(fuel)
+    )
+    return [
+        Leg(end.number, start.name, end.name, *values)
+        for start, end, values in zip(waypoints, waypoints[1:], columns)
+    ]
+
+
+def flight_legs(flight):
+    """
+    The leg table of ``flight``, from its waypoints in order. It is cached until
+    the flight's waypoints, planned speed or fuel flow change.
+    """
+    return versioned_cache.get_or_set(
+        "route",
+        flight.id,
+        lambda: leg_table(
+            sorted(flight.waypoint_set.all(), key=lambda waypoint: waypoint.number),
+            flight.planned_speed,
+            flight.fuel_flow,
+        ),
+        "legs",
+        flight.planned_speed,
+        flight.fuel_flow,
+    )
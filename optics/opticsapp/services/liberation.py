@@ -0,0 +1,574 @@
+import collections
+import datetime
+import logging
+import pickle
+from itertools import zip_longest
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import (
+    Aircraft,
+    Airframe,
+    Flight,
+    Package,
+    Target,
+    Task,
+    Waypoint,
+    WaypointType,
+)
+from .coordinates import THEATRES, format_lat, format_long, parse_position
+from .flight_plan import waypoint_columns
+from .miz import M_TO_FT, MizImporter, normalize, time_of_day
+from .versions import versioned_cache
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+# The only callables a save may run while it is read. Every other class named in
+# the file is replaced by a SavedObject, so none of the game's code is imported.
+SAFE_GLOBALS = {
+    ("builtins", "dict"): dict,
+    ("builtins", "frozenset"): frozenset,
+    ("builtins", "int"): int,
+    ("builtins", "list"): list,
+    ("builtins", "set"): set,
+    ("collections", "OrderedDict"): collections.OrderedDict,
+    ("collections", "defaultdict"): collections.defaultdict,
+    ("datetime", "date"): datetime.date,
+    ("datetime", "datetime"): datetime.datetime,
+    ("datetime", "time"): datetime.time,
+    ("datetime", "timedelta"): datetime.timedelta,
+}
+
+# Flight plan attributes holding waypoints, in the order they are flown. The
+# bullseye every plan carries is not part of the route.
+ROUTE = (
+    "takeoff",
+    "hold",
+    "nav_to",
+    "join",
+    "ingress",
+    "sweep_start",
+    "patrol_start",
+    "target",
+    "targets",
+    "patrol_end",
+    "sweep_end",
+    "egress",
+    "split",
+    "nav_from",
+    "land",
+    "divert",
+)
+ROUTE_TYPES = {
+    "takeoff": "TAKEOFF",
+    "ingress": "IP",
+    "land": "LAND",
+    "divert": "DIVERT",
+}
+# Liberation flight types whose target waypoints have an OPTICS waypoint type of
+# the same name; the targets of any other attack are STRIKE points.
+TARGET_TYPES = {"BAI", "CAS", "DEAD", "SEAD"}
+PATROL_TYPES = {"BARCAP", "TARCAP"}
+
+# OPTICS task names tried for a Liberation flight type when no task has its name.
+TASK_ALIASES = {
+    "AEW&C": ["AWACS", "AEW"],
+    "Refueling": ["AAR", "TANKER"],
+    "OCA/Runway": ["OCA", "STRIKE"],
+    "OCA/Aircraft": ["OCA", "STRIKE"],
+    "Fighter sweep": ["SWEEP"],
+    "Anti-ship": ["ANTISHIP", "ASUW"],
+    "SEAD Escort": ["SEAD"],
+    "Transport": ["AIRLIFT"],
+}
+
+THEATRE_SUFFIX = "Theater"
+
+
+class LiberationError(Exception):
+    pass
+
+
+class SavedObject:
+    """
+    An instance of a class from a Liberation save. Its pickled state becomes its
+    attributes; none of the class's own code is run.
+    """
+
+    _saved_module = _saved_name = ""
+
+    def __new__(cls, *args, **kwargs):
+        instance = super().__new__(cls)
+        # Prefixed so they never shadow an attribute of the saved object.
+        instance._saved_args = args
+        instance._saved_entries = {}
+        instance._saved_values = []
+        return instance
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __setstate__(self, state):
+        # Classes with __slots__ are pickled as a (dict, slots) pair.
+        for part in state if isinstance(state, tuple) else [state]:
+            if isinstance(part, dict):
+                self.__dict__.update(part)
+
+    # Subclasses of dict and list are filled after they are built.
+
+    def __setitem__(self, key, value):
+        self._saved_entries[key] = value
+
+    def append(self, value):
+        self._saved_values.append(value)
+
+    def extend(self, values):
+        self._saved_values.extend(values)
+
+    def __repr__(self):
+        return f"<{self._saved_module}.{self._saved_name}>"
+
+
+def enum_value(member):
+    """Returns the value of an enum member, which is pickled as a call with it."""
+    return member._saved_args[0] if member._saved_args else None
+
+
+class SaveReader(pickle.Unpickler):
+    """
+    Reads a Liberation save, a pickled ``game.game.Game``, from a binary stream.
+
+    The unpickler reads the file frame by frame rather than loading it whole, and
+    classes are resolved to SavedObject types instead of being imported.
+    """
+
+    def __init__(self, file):
+        super().__init__(file)
+        self.classes = {}
+
+    def find_class(self, module, name):
+        if (module, name) in SAFE_GLOBALS:
+            return SAFE_GLOBALS[module, name]
+        if (module, name) not in self.classes:
+            self.classes[module, name] = type(
+                name.rpartition(".")[2],
+                (SavedObject,),
+                {"_saved_module": module, "_saved_name": name},
+            )
+        return self.classes[module, name]
+
+
+def read_save(file):
+    try:
+        game = SaveReader(file).load()
+    except (pickle.UnpicklingError, EOFError, ValueError, TypeError) as err:
+        raise LiberationError(f"Not a Liberation save: {err}")
+    except (AttributeError, IndexError, KeyError) as err:
+        raise LiberationError(f"Could not read the save: {err!r}")
+    if not isinstance(game, SavedObject) or game._saved_name != "Game":
+        raise LiberationError("Not a Liberation save: the file holds no game.")
+    return game
+
+
+def distance_feet(distance):
+    return distance.distance_in_meters * M_TO_FT if distance is not None else None
+
+
+def route(flight_plan):
+    """Yields ``(kind, waypoint)`` for the waypoints of a flight plan in order."""
+    for kind in ROUTE:
+        waypoints = getattr(flight_plan, kind, None)
+        if waypoints is None:
+            continue
+        for waypoint in waypoints if isinstance(waypoints, list) else [waypoints]:
+            yield kind, waypoint
+
+
+def is_player(flight):
+    return any(
+        pilot is not None and getattr(pilot, "player", False)
+        for pilot in flight.roster.pilots
+    )
+
+
+def save_plan(game, coalition="blue", players_only=True):
+    """
+    Reads the packages of one side's air tasking order as plain dicts, in the shape
+    the importer writes them.
+    """
+    try:
+        theatre_name = type(game.theater)._saved_name.removesuffix(THEATRE_SUFFIX)
+        theatre = THEATRES.get(theatre_name)
+        start_time = game.conditions.start_time
+        if isinstance(start_time, datetime.datetime):
+            start = start_time.hour * 3600 + start_time.minute * 60 + start_time.second
+        else:
+            start = 0
+        ato = game.blue_ato if coalition == "blue" else game.red_ato
+
+        packages = []
+        names = collections.Counter()
+        for package in ato.packages:
+            target = package.target
+            task = enum_value(package.flights[0].flight_type)
+            # Numbered before any are skipped so names stay the same either way.
+            name = f"{task} {target.name}"
+            names[name] += 1
+            if names[name] > 1:
+                name = f"{name} {names[name]}"
+            flights = [
+                flight
+                for flight in package.flights
+                if not players_only or is_player(flight)
+            ]
+            if not flights:
+                continue
+            tot = None
+            if isinstance(package.time_over_target, datetime.timedelta):
+                tot = time_of_day(start + package.time_over_target.total_seconds())
+            packages.append(
+                {
+                    "name": name,
+                    "target": {
+                        "name": target.name,
+                        "position": position(target.position, theatre),
+                    },
+                    "flights": flight_plans(flights, theatre, tot),
+                }
+            )
+    except (AttributeError, TypeError) as err:
+        raise LiberationError(f"Could not read the air tasking order: {err}")
+    return {"turn": getattr(game, "turn", None), "packages": packages}
+
+
+def position(point, theatre):
+    if theatre is None or point is None:
+        return None, None
+    latitude, longitude = theatre.to_lat_long(point.x, point.y)
+    return format_lat(latitude), format_long(longitude)
+
+
+def flight_plans(flights, theatre, tot):
+    plans = []
+    callsigns = collections.Counter()
+    for flight in flights:
+        aircraft_type = flight.squadron.aircraft
+        task = enum_value(flight.flight_type)
+        callsign = flight.custom_name or f"{aircraft_type.name} {task}"
+        callsigns[callsign] += 1
+        if callsigns[callsign] > 1:
+            callsign = f"{callsign} {callsigns[callsign]}"
+
+        waypoints = []
+        for kind, waypoint in route(flight.flight_plan):
+            elevation = distance_feet(waypoint.alt)
+            if elevation is not None:
+                elevation = f"{round(elevation)}"
+                if waypoint.alt_type == "RADIO":
+                    elevation += " AGL"
+            waypoints.append(
+                {
+                    "name": waypoint.name,
+                    "type": waypoint_type(kind, task),
+                    "position": position(waypoint, theatre),
+                    "elevation": elevation,
+                    "tot": tot if kind in ("target", "targets") else None,
+                }
+            )
+        plans.append(
+            {
+                "callsign": callsign,
+                "task": task,
+                "types": [aircraft_type.dcs_unit_type._saved_name, aircraft_type.name],
+                "aircraft": len(flight.roster.pilots),
+                "waypoints": waypoints,
+            }
+        )
+    return plans
+
+
+def waypoint_type(kind, task):
+    if kind in ROUTE_TYPES:
+        return ROUTE_TYPES[kind]
+    if kind in ("target", "targets"):
+        return task if task in TARGET_TYPES else "STRIKE"
+    if kind in ("patrol_start", "patrol_end") and task in PATROL_TYPES:
+        return "CAP"
+    return "NAV"
+
+
+class Changes:
+    """The rows of one model to create, update and delete, written in batches."""
+
+    def __init__(self, model):
+        self.model = model
+        self.created = []
+        self.updated = []
+        self.deleted = []
+        self.fields = set()
+
+    def create(self, **values):
+        row = self.model(**values)
+        self.created.append(row)
+        return row
+
+    def update(self, row, **values):
+        changed = [
+            name for name, value in values.items() if getattr(row, name) != value
+        ]
+        if changed:
+            for name in changed:
+                setattr(row, name, values[name])
+            self.fields.update(changed)
+            self.updated.append(row)
+        return row
+
+    def delete(self, rows):
+        self.deleted.extend(row.id for row in rows)
+
+    def save(self, now):
+        if self.deleted:
+            self.model.objects.filter(id__in=self.deleted).delete()
+        if self.updated:
+            # bulk_update skips auto_now, the date is set by hand.
+            for row in self.updated:
+                row.date_modified = now
+            self.model.objects.bulk_update(
+                self.updated,
+                sorted(self.fields | {"date_modified"}),
+                batch_size=BATCH_SIZE,
+            )
+        self.model.objects.bulk_create(self.created, batch_size=BATCH_SIZE)
+
+
+class LiberationImporter:
+    """
+    Builds the packages, flights, aircraft, waypoints and targets of a mission from
+    the air tasking order in a DCS Liberation save.
+
+    Packages are matched by name and flights by callsign, so importing the save
+    again after the turn was replanned only writes what changed. Aircraft and
+    waypoints are matched in order, which keeps pilot sign-ups and waypoint notes;
+    flights no longer in a matched package are removed. Every level is written with
+    batched bulk operations inside one transaction.
+    """
+
+    def __init__(self, mission, user, coalition="blue", players_only=True):
+        self.mission = mission
+        self.user = user
+        self.coalition = coalition
+        self.players_only = players_only
+
+    @transaction.atomic
+    def run(self, file):
+        plan = save_plan(read_save(file), self.coalition, self.players_only)
+        packages = plan["packages"]
+        result = {
+            "turn": plan["turn"],
+            "packages": 0,
+            "flights": 0,
+            "aircraft": 0,
+            "waypoints": 0,
+            "targets": 0,
+            "updated": 0,
+            "deleted": 0,
+        }
+        if not packages:
+            return result
+
+        airframes = MizImporter.lookup(Airframe.objects.all())
+        tasks = MizImporter.lookup(Task.objects.all())
+        waypoint_types = {
+            (waypoint_type.name or "").upper(): waypoint_type.id
+            for waypoint_type in WaypointType.objects.all()
+        }
+
+        existing_packages = {
+            package.name: package
+            for package in Package.objects.filter(
+                mission=self.mission, name__in=[package["name"] for package in packages]
+            )
+        }
+        new_packages = Changes(Package)
+        package_rows = [
+            existing_packages.get(package["name"])
+            or new_packages.create(
+                mission=self.mission,
+                name=package["name"][:200],
+                created_by=self.user,
+                modified_by=self.user,
+            )
+            for package in packages
+        ]
+        new_packages.save(timezone.now())
+
+        targets, target_changes = self.targets(packages)
+
+        flights = Changes(Flight)
+        existing_flights = {
+            (flight.package_id, flight.callsign): flight
+            for flight in Flight.objects.filter(package__in=existing_packages.values())
+        }
+        flight_rows = []
+        for package, row in zip(packages, package_rows):
+            for flight in package["flights"]:
+                values = {
+                    "airframe_id": self.airframe_id(airframes, flight["types"]),
+                    "task_id": self.task_id(tasks, flight["task"]),
+                }
+                existing = existing_flights.pop((row.id, flight["callsign"]), None)
+                if existing is None:
+                    existing = flights.create(
+                        package=row,
+                        callsign=flight["callsign"][:200],
+                        created_by=self.user,
+                        modified_by=self.user,
+                        **values,
+                    )
+                else:
+                    flights.update(existing, **values)
+                flight_rows.append((flight, existing, package["target"]["name"]))
+        # What is left of the matched packages was taken out of the plan.
+        flights.delete(existing_flights.values())
+        for flight in flights.updated:
+            flight.modified_by = self.user
+        flights.fields.add("modified_by")
+
+        kept = [row for _, row, _ in flight_rows if row.id is not None]
+        aircraft = Changes(Aircraft)
+        waypoints = Changes(Waypoint)
+        existing_aircraft = collections.defaultdict(list)
+        for row in Aircraft.objects.filter(flight__in=kept).order_by("id"):
+            existing_aircraft[row.flight_id].append(row)
+        existing_waypoints = collections.defaultdict(list)
+        for row in Waypoint.objects.filter(flight__in=kept).order_by("number", "id"):
+            existing_waypoints[row.flight_id].append(row)
+
+        for flight, row, _ in flight_rows:
+            airframe_id = row.airframe_id
+            pairs = zip_longest(
+                range(flight["aircraft"]), existing_aircraft.get(row.id, [])
+            )
+            for number, existing in pairs:
+                if number is None:
+                    aircraft.delete([existing])
+                    continue
+                values = {"type_id": airframe_id, "flight_lead": number == 0}
+                if existing is None:
+                    aircraft.create(flight=row, **values)
+                else:
+                    aircraft.update(existing, **values)
+
+            pairs = zip_longest(
+                enumerate(flight["waypoints"]), existing_waypoints.get(row.id, [])
+            )
+            for point, existing in pairs:
+                if point is None:
+                    waypoints.delete([existing])
+                    continue
+                number, waypoint = point
+                lat, long = waypoint["position"]
+                values = {
+                    "name": (waypoint["name"] or f"WP{number}")[:50],
+                    "number": number,
+                    "waypoint_type_id": waypoint_types.get(waypoint["type"]),
+                    "lat": lat,
+                    "long": long,
+                    "elevation": waypoint["elevation"],
+                    "tot": waypoint["tot"],
+                    **waypoint_columns(lat, long, waypoint["elevation"]),
+                }
+                if existing is None:
+                    waypoints.create(flight=row, **values)
+                else:
+                    waypoints.update(existing, **values)
+
+        now = timezone.now()
+        # Parents first, the children of new rows need their ids.
+        for changes in (flights, aircraft, waypoints):
+            changes.save(now)
+        self.link_targets(flight_rows, targets)
+
+        transaction.on_commit(lambda: self.refresh(kept))
+        logger.info(
+            f"Imported Liberation turn {plan['turn']} into mission "
+            f"[{self.mission.id} - {self.mission.name}].",
+            extra={"mission_id": self.mission.id, "user": self.user},
+        )
+        result.update(
+            packages=len(new_packages.created),
+            flights=len(flights.created),
+            aircraft=len(aircraft.created),
+            waypoints=len(waypoints.created),
+            targets=len(target_changes.created),
+            updated=sum(
+                len(changes.updated)
+                for changes in (target_changes, flights, aircraft, waypoints)
+            ),
+            deleted=sum(
+                len(changes.deleted) for changes in (flights, aircraft, waypoints)
+            ),
+        )
+        return result
+
+    def targets(self, packages):
+        """Creates or moves the package targets, returning them by name."""
+        wanted = {}
+        for package in packages:
+            wanted.setdefault(package["target"]["name"][:50], package["target"])
+        existing = {
+            target.name: target
+            for target in Target.objects.filter(mission=self.mission, name__in=wanted)
+        }
+        changes = Changes(Target)
+        for name, target in wanted.items():
+            lat, long = target["position"]
+            lat_deg, long_deg = parse_position(lat, long)
+            values = {"lat": lat, "long": long, "lat_deg": lat_deg, "long_deg": long_deg}
+            if name in existing:
+                changes.update(existing[name], **values)
+            else:
+                existing[name] = changes.create(
+                    mission=self.mission, name=name, **values
+                )
+        changes.save(timezone.now())
+        return existing, changes
+
+    def refresh(self, flights):
+        # bulk_update sends no post_save, so the cached pages and routes of the
+        # flights that were kept are refreshed here with the mission's.
+        versioned_cache.touch(self.mission)
+        for flight in flights:
+            versioned_cache.bump("flight", flight.id)
+            versioned_cache.bump("route", flight.id)
+
+    @staticmethod
+    def link_targets(flight_rows, targets):
+        FlightTarget = Flight.targets.through
+        FlightTarget.objects.bulk_create(
+            [
+                FlightTarget(flight_id=row.id, target_id=targets[name[:50]].id)
+                for _, row, name in flight_rows
+            ],
+            ignore_conflicts=True,
+            batch_size=BATCH_SIZE,
+        )
+
+    @staticmethod
+    def airframe_id(airframes, names):
+        for name in names:
+            airframe = MizImporter.match(airframes, name)
+            if airframe is not None:
+                return airframe.id
+        return None
+
+    @staticmethod
+    def task_id(tasks, name):
+        for candidate in [name] + TASK_ALIASES.get(name, []):
+            key = normalize(candidate)
+            if key in tasks:
+                return tasks[key].id
+        return None
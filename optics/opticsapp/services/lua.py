@@ -0,0 +1,197 @@
+import re
+
+# Tokens of the Lua table constructors DCS serializes missions with. Whitespace and
+# comments are matched as "skip" so the scanner never has to search ahead.
+TOKEN_RE = re.compile(
+    r"""
+    (?P<skip>\s+|--\[\[.*?\]\]|--[^\n]*)
+    |(?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|\[\[.*?\]\])
+    |(?P<number>-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+    |(?P<name>[A-Za-z_]\w*)
+    |(?P<punct>[{}\[\]=,;])
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+ESCAPE_RE = re.compile(r"\\(\d{1,3}|.)", re.DOTALL)
+ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "\n": "\n", "a": "\a", "b": "\b"}
+LITERALS = {"true": True, "false": False, "nil": None}
+
+CHUNK_SIZE = 64 * 1024
+# Tokens are only matched with this much input ahead of them (or at the end of the
+# input), so numbers like 1e+5 are never cut short by a chunk boundary.
+LOOKAHEAD = 1024
+
+
+class LuaSyntaxError(ValueError):
+    pass
+
+
+def tokens(stream, chunk_size=CHUNK_SIZE):
+    """
+    Yields ``(kind, text)`` for each token read from the text ``stream``.
+
+    Only the unfinished tail of a chunk is carried over to the next read, so the
+    scan is linear in the input and holds one chunk plus one token in memory.
+    """
+    buffer = ""
+    position = 0
+    eof = False
+    match_token = TOKEN_RE.match
+    while True:
+        match = None
+        if eof or len(buffer) - position >= LOOKAHEAD:
+            match = match_token(buffer, position)
+        # Long tokens touching the end of the buffer may continue in the next chunk.
+        if match is None or (
+            not eof and (match.end() == len(buffer) or unfinished(match))
+        ):
+            if eof:
+                if position < len(buffer):
+                    raise LuaSyntaxError(f"Unexpected {buffer[position:][:20]!r}")
+                return
+            chunk = stream.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        position = match.end()
+        kind = match.lastgroup
+        if kind != "skip":
+            yield kind, match.group(kind)
+
+
+def unfinished(match):
+    # A [[long string]] or --[[comment]] whose end has not been read yet matches
+    # as a "[" or a line comment.
+    text = match.group()
+    if text == "[":
+        return match.string.startswith("[[", match.start())
+    return text.startswith("--[[") and not text.endswith("]]")
+
+
+def unescape(text):
+    def replace(match):
+        escape = match.group(1)
+        if escape.isdigit():
+            return chr(int(escape))
+        return ESCAPES.get(escape, escape)
+
+    if text.startswith("[["):
+        return text[2:-2]
+    text = text[1:-1]
+    return ESCAPE_RE.sub(replace, text) if "\\" in text else text
+
+
+def scalar(kind, text):
+    if kind == "string":
+        return unescape(text)
+    if kind == "number":
+        if "." in text or "e" in text or "E" in text:
+            return float(text)
+        return int(text)
+    if kind == "name" and text in LITERALS:
+        return LITERALS[text]
+    raise LuaSyntaxError(f"Unexpected {text!r}")
+
+
+class TableReader:
+    """
+    Reads the ``name = {...}`` assignments of a serialized Lua file, building only
+    the parts picked by a selection.
+
+    A selection is True to keep a whole value, or a dict of the keys to descend
+    into, each mapped to its own selection. The key "*" matches any key. Everything
+    else is parsed but not built, so memory stays bounded by what was selected
+    rather than by the size of the file.
+    """
+
+    def __init__(self, stream, chunk_size=CHUNK_SIZE):
+        self.tokens = tokens(stream, chunk_size)
+
+    def read(self, select=True):
+        result = {}
+        for kind, name in self.tokens:
+            if kind != "name":
+                raise LuaSyntaxError(f"Expected a name, found {name!r}")
+            self.expect("=")
+            child = self.child(select, name)
+            value = self.value(self.next(), child)
+            if child is not None:
+                result[name] = value
+        return result
+
+    def next(self):
+        try:
+            return next(self.tokens)
+        except StopIteration:
+            raise LuaSyntaxError("Unexpected end of input")
+
+    def expect(self, punct):
+        kind, text = self.next()
+        if text != punct or kind != "punct":
+            raise LuaSyntaxError(f"Expected {punct!r}, found {text!r}")
+
+    @staticmethod
+    def child(select, key):
+        if select is True or select is None:
+            return select
+        return select.get(key, select.get("*"))
+
+    def value(self, token, select):
+        kind, text = token
+        if kind == "punct":
+            if text != "{":
+                raise LuaSyntaxError(f"Unexpected {text!r}")
+            if select is None:
+                self.skip_table()
+                return None
+            return self.table(select)
+        if select is None:
+            # Still validated, but strings are not unescaped.
+            if kind == "name" and text not in LITERALS:
+                raise LuaSyntaxError(f"Unexpected {text!r}")
+            return None
+        return scalar(kind, text)
+
+    def table(self, select):
+        table = {}
+        index = 1
+        while True:
+            token = self.next()
+            kind, text = token
+            if kind == "punct" and text in ",;":
+                continue
+            if kind == "punct" and text == "}":
+                return table
+            if kind == "punct" and text == "[":
+                key = scalar(*self.next())
+                self.expect("]")
+                self.expect("=")
+                token = self.next()
+            elif kind == "name" and text not in LITERALS:
+                key = text
+                self.expect("=")
+                token = self.next()
+            else:
+                key = index
+                index += 1
+            child = self.child(select, key)
+            value = self.value(token, child)
+            if child is not None:
+                table[key] = value
+
+    def skip_table(self):
+        # Strings are whole tokens, so counting braces is enough.
+        depth = 1
+        while depth:
+            kind, text = self.next()
+            if kind == "punct":
+                if text == "{":
+                    depth += 1
+                elif text == "}":
+                    depth -= 1
+
+
+def items(table):
+    """Returns the values of a Lua array, ordered by index."""
+    return [table[key] for key in sorted(key for key in table if isinstance(key, int))]
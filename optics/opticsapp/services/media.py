@@ -0,0 +1,173 @@
+import hashlib
+import logging
+import os
+from collections import Counter
+
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+
+from ..models import (
+    FlightImagery,
+    MediaBlob,
+    MissionFile,
+    MissionImagery,
+    PackageImagery,
+    Target,
+)
+from .renditions import discard as discard_renditions
+
+logger = logging.getLogger(__name__)
+
+# The file field of each model whose rows can share stored files.
+FILE_FIELDS = {
+    Target: "target_image",
+    MissionImagery: "image",
+    PackageImagery: "image",
+    FlightImagery: "image",
+    MissionFile: "mission_file",
+}
+
+
+def stored_name(value):
+    name = getattr(value, "name", value)
+    return name or None
+
+
+def sha256_of(file):
+    digest = hashlib.sha256()
+    size = 0
+    file.seek(0)
+    for chunk in file.chunks():
+        digest.update(chunk)
+        size += len(chunk)
+    file.seek(0)
+    return digest.hexdigest(), size
+
+
+def references(name):
+    """Counts the rows pointing at ``name`` across every model sharing files."""
+    return sum(
+        model.objects.filter(**{field: name}).count()
+        for model, field in FILE_FIELDS.items()
+    )
+
+
+def retain(names, sha256=None, size=None):
+    """
+    Adds a reference to each of ``names``, which the caller has just saved.
+
+    Files without a row, stored before the table existed, start from a count of
+    their live references.
+    """
+    counts = Counter(name for name in names if name)
+    if not counts:
+        return
+    existing = set(
+        MediaBlob.objects.filter(name__in=counts).values_list("name", flat=True)
+    )
+    if existing:
+        MediaBlob.objects.filter(name__in=existing).update(
+            ref_count=F("ref_count")
+            + Case(*[When(name=name, then=Value(counts[name])) for name in existing])
+        )
+    for name in counts.keys() - existing:
+        try:
+            with transaction.atomic():
+                MediaBlob.objects.create(
+                    name=name, sha256=sha256, size=size, ref_count=references(name)
+                )
+        except IntegrityError:
+            # Created by a concurrent save since the lookup above.
+            MediaBlob.objects.filter(name=name).update(
+                ref_count=F("ref_count") + counts[name]
+            )
+
+
+def release(names):
+    """
+    Drops a reference to each of ``names`` and deletes the files nothing points at
+    any more once the transaction commits.
+    """
+    counts = Counter(name for name in names if name)
+    if not counts:
+        return
+    unreferenced = []
+    with transaction.atomic():
+        blobs = list(MediaBlob.objects.select_for_update().filter(name__in=counts))
+        for blob in blobs:
+            blob.ref_count -= counts[blob.name]
+            if blob.ref_count > 0:
+                blob.save(update_fields=["ref_count", "date_modified"])
+            else:
+                unreferenced.append(blob.name)
+        MediaBlob.objects.filter(name__in=unreferenced).delete()
+
+        for name in counts.keys() - {blob.name for blob in blobs}:
+            if not references(name):
+                unreferenced.append(name)
+
+    if unreferenced:
+        transaction.on_commit(lambda: delete_files(unreferenced))
+
+
+def delete_files(names, storage=default_storage):
+    for name in names:
+        storage.delete(name)
+        discard_renditions(name, storage)
+        logger.info(f"Deleted unreferenced file {name}.")
+
+
+# ---------------- Signals -------------------------
+
+
+def remember_file(sender, instance, **kwargs):
+    # Unsaved rows have no stored file yet, deferred fields are not in __dict__.
+    attname = FILE_FIELDS[sender]
+    if instance.pk is not None and attname in instance.__dict__:
+        instance._stored_file = stored_name(instance.__dict__[attname])
+
+
+def address_upload(sender, instance, **kwargs):
+    """
+    Stores a new upload under the SHA-256 of its content, or points the row at the
+    file already stored for that content without writing anything.
+    """
+    field_file = getattr(instance, FILE_FIELDS[sender])
+    if not field_file or field_file._committed:
+        return
+    digest, size = sha256_of(field_file.file)
+    existing = (
+        MediaBlob.objects.filter(sha256=digest).values_list("name", flat=True).first()
+    )
+    if existing:
+        setattr(instance, FILE_FIELDS[sender], existing)
+    else:
+        field_file.name = f"{digest}/{os.path.basename(field_file.name)}"
+    instance._uploaded_blob = (digest, size)
+
+
+def file_saved(sender, instance, **kwargs):
+    attname = FILE_FIELDS[sender]
+    if attname not in instance.__dict__:
+        return
+    old = getattr(instance, "_stored_file", None)
+    new = stored_name(getattr(instance, attname))
+    if old == new:
+        return
+    digest, size = instance.__dict__.pop("_uploaded_blob", (None, None))
+    retain([new], sha256=digest, size=size)
+    release([old])
+    instance._stored_file = new
+
+
+def file_deleted(sender, instance, **kwargs):
+    release([getattr(instance, "_stored_file", None)])
+
+
+for file_model in FILE_FIELDS:
+    post_init.connect(remember_file, sender=file_model)
+    pre_save.connect(address_upload, sender=file_model)
+    post_save.connect(file_saved, sender=file_model)
+    post_delete.connect(file_deleted, sender=file_model)
@@ -0,0 +1,189 @@
+import logging
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
+
+from django.db.models import Prefetch
+from django.template.loader import get_template
+from pypdf import PdfWriter
+from xhtml2pdf import pisa
+
+from ..models import Aircraft, Flight, Mission, Package, Support, Threat, Waypoint
+from .flight_plan import flight_legs
+from .pdf_cache import MISSION_CARD_TEMPLATE, mission_card_fingerprints, pdf_cache
+from .pdf_resources import link_callback, warm_resources
+
+logger = logging.getLogger(__name__)
+
+
+def card_flights():
+    return Flight.objects.select_related("task").prefetch_related(
+        Prefetch(
+            "aircraft_set",
+            queryset=Aircraft.objects.select_related("type", "pilot", "rio_wso"),
+        ),
+        Prefetch(
+            "waypoint_set",
+            queryset=Waypoint.objects.select_related("waypoint_type").order_by(
+                "number"
+            ),
+        ),
+        "targets",
+    )
+
+
+class MissionCardData:
+    """
+    Everything needed to render the mission cards of a mission, loaded once.
+
+    The mission-level packages, supports and threats are shared by every card and
+    each flight arrives with its aircraft, waypoints and targets prefetched.
+    """
+
+    def __init__(self, mission_id):
+        self.mission = Mission.objects.select_related("campaign").get(id=mission_id)
+        self.packages = list(
+            Package.objects.filter(mission=self.mission).prefetch_related(
+                Prefetch("flight_set", queryset=card_flights())
+            )
+        )
+        self.supports = list(
+            Support.objects.filter(mission=self.mission).select_related("support_type")
+        )
+        self.threats = list(
+            Threat.objects.filter(mission=self.mission).select_related(
+                "threat_name", "threat_type"
+            )
+        )
+        self.flights = [
+            flight for package in self.packages for flight in package.flight_set.all()
+        ]
+
+    def flight(self, flight_id):
+        for flight in self.flights:
+            if flight.id == flight_id:
+                return flight
+        return card_flights().get(id=flight_id)
+
+    def context(self, flight):
+        # Storage URLs, embedded from the storage backend by the PDF link_callback.
+        targets = flight.targets.all()
+        target_urls = {}
+        for target in targets:
+            if target.target_image:
+                target_urls[target.name] = target.target_image.url
+
+        return {
+            "mission_object": self.mission,
+            "flight_object": flight,
+            "packages_object": self.packages,
+            "aircraft_object": flight.aircraft_set.all(),
+            "waypoints_object": flight.waypoint_set.all(),
+            "legs_object": flight_legs(flight),
+            "support_object": self.supports,
+            "target_object": targets,
+            "threat_object": self.threats,
+            "urls": target_urls,
+        }
+
+    def render_html(self, flight):
+        template = get_template(MISSION_CARD_TEMPLATE)
+        return template.render(self.context(flight))
+
+
+def html_to_pdf(html):
+    # Runs in the worker processes, so it must stay a picklable module-level function.
+    result = BytesIO()
+    pdf = pisa.pisaDocument(
+        BytesIO(html.encode("utf-8")), result, link_callback=link_callback
+    )
+    if pdf.err:
+        return None
+    return result.getvalue()
+
+
+def render_mission_cards(mission_id, max_workers=None):
+    """
+    Yields ``(index, flight, pdf)`` for every flight of the mission as each card is done.
+
+    Cards already in the PDF cache are yielded first. The rest are rendered to HTML
+    here and converted to PDF in a process pool, because xhtml2pdf is CPU bound and
+    would otherwise be serialised by the GIL. Images are resolved into the resource
+    cache before the pool forks so the workers do not read them again.
+    """
+    data = MissionCardData(mission_id)
+    keys = mission_card_fingerprints(mission_id, [flight.id for flight in data.flights])
+    pending = []
+
+    for index, flight in enumerate(data.flights):
+        key = keys.get(flight.id)
+        pdf = pdf_cache.get(key) if key else None
+        if pdf is not None:
+            yield index, flight, pdf
+        else:
+            html = data.render_html(flight)
+            warm_resources(html)
+            pending.append((index, flight, key, html))
+
+    if not pending:
+        return
+
+    max_workers = max_workers or min(len(pending), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(html_to_pdf, html): (index, flight, key)
+            for index, flight, key, html in pending
+        }
+        for future in as_completed(futures):
+            index, flight, key = futures[future]
+            pdf = future.result()
+            if pdf is None:
+                logger.error(f"Mission card for flight [{flight.id}] failed to render.")
+                continue
+            if key:
+                pdf_cache.put(key, pdf)
+            yield index, flight, pdf
+
+
+def card_filename(index, flight):
+    return f"{index + 1:02d}-{flight.callsign}.pdf".replace("/", "-")
+
+
+class _StreamBuffer:
+    """Write-only file object that lets zipfile write to a streamed response."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_zip(cards):
+    """Yields a ZIP archive chunk by chunk, one member per finished card."""
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        for index, flight, pdf in cards:
+            archive.writestr(card_filename(index, flight), pdf)
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+def merge_pdfs(cards):
+    """Merges the cards into one PDF in flight order."""
+    writer = PdfWriter()
+    for index, flight, pdf in sorted(cards, key=lambda card: card[0]):
+        writer.append(BytesIO(pdf))
+    result = BytesIO()
+    writer.write(result)
+    return result.getvalue()
@@ -0,0 +1,261 @@
+import logging
+
+from django.db import transaction
+
+from ..models import (
+    Aircraft,
+    Flight,
+    Mission,
+    MissionFile,
+    MissionImagery,
+    Package,
+    Support,
+    Target,
+    Threat,
+    Waypoint,
+)
+from .media import retain
+from .versions import versioned_cache
+
+logger = logging.getLogger(__name__)
+
+
+class MissionGraphCopier:
+    """
+    Clones a Mission -> Package -> Flight -> Aircraft/Waypoint subtree.
+
+    Each level is written with a single bulk_create inside one transaction and the
+    new primary keys are tracked in remap tables so that children and the
+    Flight.targets links can be pointed at the copies.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        # Old target id -> new target id, filled when a whole mission is copied.
+        self.target_map = {}
+
+    @transaction.atomic
+    def copy_mission(self, mission, campaign):
+        new_mission = Mission.objects.create(
+            campaign=campaign,
+            number=mission.number + 1,
+            name=mission.name,
+            description=mission.description,
+            brief=mission.brief,
+            roe=mission.roe,
+            munitions_restrictions=mission.munitions_restrictions,
+            notify_discord=False,
+            created_by=self.user,
+            modified_by=self.user,
+        )
+
+        targets = list(mission.target_set.all())
+        new_targets = Target.objects.bulk_create(
+            [
+                Target(
+                    mission=new_mission,
+                    name=target.name,
+                    lat=target.lat,
+                    long=target.long,
+                    elev=target.elev,
+                    notes=target.notes,
+                    target_image=target.target_image,
+                    lat_deg=target.lat_deg,
+                    long_deg=target.long_deg,
+                    elev_ft=target.elev_ft,
+                )
+                for target in targets
+            ]
+        )
+        self.target_map = {
+            old.id: new.id for old, new in zip(targets, new_targets)
+        }
+
+        Threat.objects.bulk_create(
+            [
+                Threat(
+                    mission=new_mission,
+                    threat_name_id=threat.threat_name_id,
+                    name=threat.name,
+                    threat_type_id=threat.threat_type_id,
+                    description=threat.description,
+                    lat=threat.lat,
+                    long=threat.long,
+                    lat_deg=threat.lat_deg,
+                    long_deg=threat.long_deg,
+                )
+                for threat in mission.threat_set.all()
+            ]
+        )
+        Support.objects.bulk_create(
+            [
+                Support(
+                    mission=new_mission,
+                    callsign=support.callsign,
+                    support_type_id=support.support_type_id,
+                    player_name=support.player_name,
+                    frequency=support.frequency,
+                    tacan=support.tacan,
+                    altitude=support.altitude,
+                    speed=support.speed,
+                    brc=support.brc,
+                    icls=support.icls,
+                    notes=support.notes,
+                )
+                for support in mission.support_set.all()
+            ]
+        )
+        new_imagery = MissionImagery.objects.bulk_create(
+            [
+                MissionImagery(
+                    mission=new_mission,
+                    caption=imagery.caption,
+                    image=imagery.image,
+                )
+                for imagery in mission.missionimagery_set.all()
+            ]
+        )
+        new_files = MissionFile.objects.bulk_create(
+            [
+                MissionFile(
+                    mission=new_mission,
+                    name=mission_file.name,
+                    mission_file=mission_file.mission_file,
+                    file_type=mission_file.file_type,
+                    uploaded_by_id=mission_file.uploaded_by_id,
+                )
+                for mission_file in mission.missionfile_set.all()
+            ]
+        )
+        # The copies share the stored files; bulk_create sends no post_save, so
+        # their references are counted here.
+        retain(
+            [target.target_image.name for target in new_targets]
+            + [imagery.image.name for imagery in new_imagery]
+            + [mission_file.mission_file.name for mission_file in new_files]
+        )
+
+        self._copy_packages(list(mission.package_set.all()), new_mission)
+
+        logger.info(
+            f"Copied mission [{mission.id} - {mission.name}] to [{new_mission.id}].",
+            extra={"mission_id": mission.id, "user": self.user},
+        )
+        return new_mission
+
+    # bulk_create sends no post_save, so the parent's cache version is bumped here.
+
+    @transaction.atomic
+    def copy_packages(self, packages, mission):
+        new_packages = self._copy_packages(list(packages), mission)
+        transaction.on_commit(lambda: versioned_cache.touch(mission))
+        return new_packages
+
+    @transaction.atomic
+    def copy_flights(self, flights, package):
+        flights = list(flights)
+        new_flights = self._copy_flights(
+            flights, {flight.id: package for flight in flights}
+        )
+        transaction.on_commit(lambda: versioned_cache.touch(package))
+        return new_flights
+
+    def _copy_packages(self, packages, mission):
+        new_packages = Package.objects.bulk_create(
+            [
+                Package(
+                    mission=mission,
+                    name=package.name,
+                    frequency=package.frequency,
+                    summary=package.summary,
+                    package_coordination=package.package_coordination,
+                    created_by=self.user,
+                    modified_by=self.user,
+                )
+                for package in packages
+            ]
+        )
+        package_map = {old.id: new for old, new in zip(packages, new_packages)}
+
+        flights = list(
+            Flight.objects.filter(package__in=packages).select_related("package")
+        )
+        self._copy_flights(
+            flights, {flight.id: package_map[flight.package_id] for flight in flights}
+        )
+        return new_packages
+
+    def _copy_flights(self, flights, new_package_for):
+        new_flights = Flight.objects.bulk_create(
+            [
+                Flight(
+                    package=new_package_for[flight.id],
+                    airframe_id=flight.airframe_id,
+                    callsign=flight.callsign,
+                    task_id=flight.task_id,
+                    flight_coordination=flight.flight_coordination,
+                    radio_frequency=flight.radio_frequency,
+                    tacan=flight.tacan,
+                    timehack_start=flight.timehack_start,
+                    timehack_rdv1=flight.timehack_rdv1,
+                    timehack_rdv2=flight.timehack_rdv2,
+                    fuel_fob=flight.fuel_fob,
+                    fuel_joker=flight.fuel_joker,
+                    fuel_bingo=flight.fuel_bingo,
+                    planned_speed=flight.planned_speed,
+                    fuel_flow=flight.fuel_flow,
+                    created_by=self.user,
+                    modified_by=self.user,
+                )
+                for flight in flights
+            ]
+        )
+        flight_map = {old.id: new for old, new in zip(flights, new_flights)}
+
+        Aircraft.objects.bulk_create(
+            [
+                Aircraft(type_id=aircraft.type_id, flight=flight_map[aircraft.flight_id])
+                for aircraft in Aircraft.objects.filter(flight__in=flights)
+            ]
+        )
+        Waypoint.objects.bulk_create(
+            [
+                Waypoint(
+                    flight=flight_map[waypoint.flight_id],
+                    name=waypoint.name,
+                    number=waypoint.number,
+                    waypoint_type_id=waypoint.waypoint_type_id,
+                    lat=waypoint.lat,
+                    long=waypoint.long,
+                    elevation=waypoint.elevation,
+                    tot=waypoint.tot,
+                    notes=waypoint.notes,
+                    lat_deg=waypoint.lat_deg,
+                    long_deg=waypoint.long_deg,
+                    elevation_ft=waypoint.elevation_ft,
+                )
+                for waypoint in Waypoint.objects.filter(flight__in=flights)
+            ]
+        )
+
+        self._copy_flight_targets(flights, flight_map)
+        return new_flights
+
+    def _copy_flight_targets(self, flights, flight_map):
+        FlightTarget = Flight.targets.through
+        old_mission_for = {flight.id: flight.package.mission_id for flight in flights}
+
+        links = []
+        for link in FlightTarget.objects.filter(flight__in=flights):
+            new_flight = flight_map[link.flight_id]
+            target_id = self.target_map.get(link.target_id)
+            # A flight copied within its own mission keeps pointing at the same targets.
+            if (
+                target_id is None
+                and new_flight.package.mission_id == old_mission_for[link.flight_id]
+            ):
+                target_id = link.target_id
+            if target_id is not None:
+                links.append(FlightTarget(flight_id=new_flight.id, target_id=target_id))
+
+        FlightTarget.objects.bulk_create(links)
@@ -0,0 +1,402 @@
+import io
+import logging
+import re
+import zipfile
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.db import transaction
+
+from ..models import Aircraft, Airframe, Flight, Package, Task, Waypoint, WaypointType
+from .coordinates import THEATRES, format_lat, format_long
+from .flight_plan import waypoint_columns
+from .lua import CHUNK_SIZE, LuaSyntaxError, TableReader, items
+from .versions import versioned_cache
+
+logger = logging.getLogger(__name__)
+
+MS_TO_KNOTS = 1.943844
+M_TO_FT = 3.28084
+MMHG_TO_HPA = 1.333224
+MMHG_TO_INHG = 1 / 25.4
+
+# The parts of a flight group the importer reads; route point tasks, payloads and
+# the like are skipped without being built.
+GROUP_SELECT = {
+    "name": True,
+    "task": True,
+    "frequency": True,
+    "units": {
+        "*": {
+            "type": True,
+            "name": True,
+            "skill": True,
+            "onboard_num": True,
+            "AddPropAircraft": {"LaserCode": True},
+        }
+    },
+    "route": {
+        "points": {
+            "*": {
+                "name": True,
+                "type": True,
+                "x": True,
+                "y": True,
+                "alt": True,
+                "alt_type": True,
+                "ETA": True,
+            }
+        }
+    },
+}
+CATEGORIES = ("plane", "helicopter")
+PLAYER_SKILLS = {"Client", "Player"}
+
+# OPTICS task names tried for a DCS group task when no task has the same name.
+TASK_ALIASES = {
+    "Ground Attack": ["STRIKE"],
+    "Pinpoint Strike": ["STRIKE"],
+    "Runway Attack": ["OCA", "STRIKE"],
+    "Antiship Strike": ["ANTISHIP", "ASUW"],
+    "Fighter Sweep": ["SWEEP"],
+    "Intercept": ["INTERCEPT", "INT"],
+    "Refueling": ["AAR", "TANKER"],
+    "Reconnaissance": ["RECCE"],
+    "AFAC": ["FAC(A)", "FAC"],
+}
+
+
+class MizError(Exception):
+    pass
+
+
+def mission_select(coalition):
+    groups = {"group": {"*": GROUP_SELECT}}
+    return {
+        "date": True,
+        "start_time": True,
+        "theatre": True,
+        "weather": True,
+        "coalition": {
+            coalition: {
+                "country": {
+                    "*": {"name": True, **{category: groups for category in CATEGORIES}}
+                }
+            }
+        },
+    }
+
+
+def normalize(name):
+    return re.sub(r"[^a-z0-9]", "", (name or "").lower())
+
+
+def time_of_day(seconds):
+    return str(timedelta(seconds=round(seconds) % 86400)).zfill(8)
+
+
+class MizFile:
+    """
+    A DCS .miz archive. The mission table is decompressed and parsed as a stream,
+    never extracted as a whole.
+    """
+
+    def __init__(self, file, chunk_size=CHUNK_SIZE):
+        try:
+            self.archive = zipfile.ZipFile(file)
+        except zipfile.BadZipFile as err:
+            raise MizError(f"Not a .miz archive: {err}")
+        self.chunk_size = chunk_size
+
+    def read(self, name, select):
+        try:
+            with self.archive.open(name) as raw:
+                stream = io.TextIOWrapper(raw, encoding="utf-8", errors="replace")
+                return TableReader(stream, self.chunk_size).read(select)
+        except KeyError:
+            raise MizError(f"The archive has no {name} file.")
+        except (LuaSyntaxError, zipfile.BadZipFile) as err:
+            raise MizError(f"Could not read {name}: {err}")
+
+    def mission(self, coalition="blue"):
+        return self.read("mission", {"mission": mission_select(coalition)}).get(
+            "mission", {}
+        )
+
+    def dictionary(self, keys):
+        """Returns the translated strings of the DictKey_* names in ``keys``."""
+        if not keys:
+            return {}
+        try:
+            return self.read(
+                "l10n/DEFAULT/dictionary", {"dictionary": dict.fromkeys(keys, True)}
+            ).get("dictionary", {})
+        except MizError:
+            return {}
+
+
+def weather_fields(mission):
+    """Maps a mission's date, start time and weather onto the Mission fields."""
+    fields = {}
+    start_time = mission.get("start_time", 0)
+    fields["mission_game_time"] = time_of_day(start_time)[:5]
+    date = mission.get("date")
+    if date:
+        fields["mission_game_date"] = datetime(
+            date["Year"], date["Month"], date["Day"], tzinfo=dt_timezone.utc
+        ) + timedelta(seconds=start_time % 86400)
+
+    weather = mission.get("weather")
+    if not weather:
+        return fields
+
+    def wind(layer):
+        layer = weather.get("wind", {}).get(layer)
+        if layer is None:
+            return None
+        # DCS stores the direction the wind blows to, briefings give where it
+        # comes from.
+        direction = round(layer["dir"] + 180) % 360
+        knots = round(layer["speed"] * MS_TO_KNOTS)
+        return f"{direction:03d}/{knots:02d}" if knots else "Calm"
+
+    fields["wind_sl"] = wind("atGround")
+    fields["wind_7k"] = wind("at2000")
+    fields["wind_26k"] = wind("at8000")
+
+    qnh = weather.get("qnh")
+    if qnh:
+        fields["qnh"] = f"{qnh * MMHG_TO_HPA:.0f} / {qnh * MMHG_TO_INHG:.2f}"
+    temperature = weather.get("season", {}).get("temperature")
+    if temperature is not None:
+        fields["temp"] = f"{temperature:g}"
+
+    visibility = weather.get("visibility", {}).get("distance")
+    fog = weather.get("fog", {})
+    if weather.get("enable_fog") and fog.get("visibility"):
+        visibility = min(visibility or fog["visibility"], fog["visibility"])
+    if visibility:
+        fields["visibility"] = f"{visibility / 1000:g} km"
+
+    clouds = weather.get("clouds", {})
+    if clouds.get("preset") or clouds.get("density"):
+        base = clouds.get("base", 0) * M_TO_FT
+        fields["cloud_base"] = f"{base / 1000:.1f}K"
+        # Presets have their own layers, the thickness only applies without one.
+        if not clouds.get("preset") and clouds.get("thickness"):
+            top = base + clouds["thickness"] * M_TO_FT
+            fields["cloud_top"] = f"{top / 1000:.1f}K"
+    return fields
+
+
+def flight_groups(mission, players_only=True):
+    """Yields the plane and helicopter groups of the selected coalition."""
+    for coalition in mission.get("coalition", {}).values():
+        for country in items(coalition.get("country", {})):
+            for category in CATEGORIES:
+                for group in items(country.get(category, {}).get("group", {})):
+                    units = items(group.get("units", {}))
+                    if players_only and not any(
+                        unit.get("skill") in PLAYER_SKILLS for unit in units
+                    ):
+                        continue
+                    yield group
+
+
+class MizImporter:
+    """
+    Creates a package of the flights, aircraft and waypoints in a .miz file and
+    fills in the mission's date and weather.
+
+    Each level is written with one bulk_create inside a transaction. Groups whose
+    name is already a flight callsign in the mission are skipped, so importing a
+    revised .miz only adds the new flights.
+    """
+
+    def __init__(self, mission, user, coalition="blue", players_only=True):
+        self.mission = mission
+        self.user = user
+        self.coalition = coalition
+        self.players_only = players_only
+
+    @transaction.atomic
+    def run(self, file, package_name):
+        miz = MizFile(file)
+        data = miz.mission(self.coalition)
+        theatre = THEATRES.get(data.get("theatre"))
+
+        fields = weather_fields(data)
+        for name, value in fields.items():
+            setattr(self.mission, name, value)
+        self.mission.modified_by = self.user
+        self.mission.save(update_fields=[*fields, "modified_by", "date_modified"])
+
+        existing = set(
+            Flight.objects.filter(package__mission=self.mission).values_list(
+                "callsign", flat=True
+            )
+        )
+        groups = [
+            group
+            for group in flight_groups(data, self.players_only)
+            if group.get("name") not in existing
+        ]
+        names = self.translate(miz, groups)
+        result = {"weather": fields, "flights": 0, "aircraft": 0, "waypoints": 0}
+        if not groups:
+            return result
+
+        package = Package.objects.create(
+            mission=self.mission,
+            name=package_name[:200],
+            created_by=self.user,
+            modified_by=self.user,
+        )
+        airframes = self.lookup(Airframe.objects.all())
+        tasks = self.lookup(Task.objects.all())
+        waypoint_types = {
+            (waypoint_type.name or "").upper(): waypoint_type
+            for waypoint_type in WaypointType.objects.all()
+        }
+        start_time = data.get("start_time", 0)
+
+        flights = Flight.objects.bulk_create(
+            [
+                self.flight(group, package, airframes, tasks, start_time)
+                for group in groups
+            ]
+        )
+        aircraft = Aircraft.objects.bulk_create(
+            [
+                Aircraft(
+                    flight=flight,
+                    type=self.match(airframes, unit.get("type")),
+                    tailcode=(unit.get("onboard_num") or "")[:20] or None,
+                    lasercode=self.laser_code(unit),
+                    flight_lead=number == 0,
+                )
+                for flight, group in zip(flights, groups)
+                for number, unit in enumerate(items(group.get("units", {})))
+            ]
+        )
+        waypoints = Waypoint.objects.bulk_create(
+            [
+                self.waypoint(
+                    flight, number, point, theatre, waypoint_types, start_time, names
+                )
+                for flight, group in zip(flights, groups)
+                for number, point in enumerate(
+                    items(group.get("route", {}).get("points", {}))
+                )
+            ]
+        )
+
+        # bulk_create sends no post_save, so the cached pages are refreshed here.
+        transaction.on_commit(lambda: versioned_cache.touch(self.mission))
+        logger.info(
+            f"Imported {len(flights)} flights into mission "
+            f"[{self.mission.id} - {self.mission.name}].",
+            extra={"mission_id": self.mission.id, "user": self.user},
+        )
+        result.update(
+            flights=len(flights), aircraft=len(aircraft), waypoints=len(waypoints)
+        )
+        return result
+
+    @staticmethod
+    def translate(miz, groups):
+        # Older missions store waypoint names as keys into the l10n dictionary.
+        keys = {
+            point["name"]
+            for group in groups
+            for point in group.get("route", {}).get("points", {}).values()
+            if str(point.get("name", "")).startswith("DictKey_")
+        }
+        return miz.dictionary(keys)
+
+    @staticmethod
+    def lookup(queryset):
+        return {normalize(row.name): row for row in queryset if row.name}
+
+    @staticmethod
+    def match(rows, name):
+        """
+        Finds the row named like ``name``, ignoring case and punctuation. The DCS
+        type "FA-18C_hornet" matches an airframe named "F/A-18C".
+        """
+        key = normalize(name)
+        if not key:
+            return None
+        if key in rows:
+            return rows[key]
+        for row_key, row in rows.items():
+            if key.startswith(row_key) or row_key.startswith(key):
+                return row
+        return None
+
+    @staticmethod
+    def task(tasks, name):
+        for candidate in [name] + TASK_ALIASES.get(name, []):
+            key = normalize(candidate)
+            if key in tasks:
+                return tasks[key]
+        return None
+
+    def flight(self, group, package, airframes, tasks, start_time):
+        units = items(group.get("units", {}))
+        points = items(group.get("route", {}).get("points", {}))
+        frequency = group.get("frequency")
+        if frequency:
+            frequency = f"{frequency:.3f}".rstrip("0").rstrip(".")
+        takeoff = None
+        if points:
+            takeoff = time_of_day(start_time + points[0].get("ETA", 0))[:5]
+        return Flight(
+            package=package,
+            callsign=group.get("name", "")[:200],
+            airframe=self.match(airframes, units[0].get("type")) if units else None,
+            task=self.task(tasks, group.get("task")),
+            radio_frequency=frequency or None,
+            timehack_start=takeoff,
+            created_by=self.user,
+            modified_by=self.user,
+        )
+
+    @staticmethod
+    def laser_code(unit):
+        code = unit.get("AddPropAircraft", {}).get("LaserCode")
+        return str(code)[:10] if code else None
+
+    @staticmethod
+    def waypoint(flight, number, point, theatre, waypoint_types, start_time, names):
+        point_type = point.get("type", "")
+        if point_type.startswith("TakeOff"):
+            waypoint_type = "TAKEOFF"
+        elif point_type == "Land":
+            waypoint_type = "LAND"
+        else:
+            waypoint_type = "NAV"
+
+        name = names.get(point.get("name"), point.get("name")) or f"WP{number}"
+        lat = long = None
+        if theatre is not None and "x" in point and "y" in point:
+            latitude, longitude = theatre.to_lat_long(point["x"], point["y"])
+            lat, long = format_lat(latitude), format_long(longitude)
+        # Points after the first without a computed ETA are saved as 0.
+        eta_known = "ETA" in point and (number == 0 or point["ETA"] > 0)
+        elevation = None
+        if "alt" in point:
+            elevation = f"{round(point['alt'] * M_TO_FT)}"
+            if point.get("alt_type") == "RADIO":
+                elevation += " AGL"
+        return Waypoint(
+            flight=flight,
+            name=str(name)[:50],
+            number=number,
+            waypoint_type=waypoint_types.get(waypoint_type),
+            lat=lat,
+            long=long,
+            elevation=elevation,
+            tot=time_of_day(start_time + point["ETA"]) if eta_known else None,
+            **waypoint_columns(lat, long, elevation),
+        )
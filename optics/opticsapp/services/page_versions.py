@@ -0,0 +1,88 @@
+from django.contrib.contenttypes.models import ContentType
+
+from ..models import (
+    Aircraft,
+    Campaign,
+    Comment,
+    Flight,
+    FlightImagery,
+    Mission,
+    MissionFile,
+    MissionImagery,
+    Package,
+    PackageImagery,
+    Support,
+    Target,
+    Threat,
+    Waypoint,
+)
+from .rollup import rollup
+
+# One rollup per detail page, covering the object, the children it lists and the
+# ancestors named in its breadcrumbs. Each returns None when the object is missing.
+
+
+def comments_on(model, pk):
+    return Comment.objects.filter(
+        content_type=ContentType.objects.get_for_model(model), object_id=pk
+    )
+
+
+def campaign_page(campaign_id):
+    return rollup(
+        Campaign.objects.filter(id=campaign_id),
+        missions=Mission.objects.filter(campaign=campaign_id),
+        comments=comments_on(Campaign, campaign_id),
+    )
+
+
+def mission_page(mission_id):
+    return rollup(
+        Mission.objects.filter(id=mission_id),
+        campaign=Campaign.objects.filter(mission=mission_id),
+        packages=Package.objects.filter(mission=mission_id),
+        flights=Flight.objects.filter(package__mission=mission_id),
+        targets=Target.objects.filter(mission=mission_id),
+        threats=Threat.objects.filter(mission=mission_id),
+        supports=Support.objects.filter(mission=mission_id),
+        imagery=MissionImagery.objects.filter(mission=mission_id),
+        files=MissionFile.objects.filter(mission=mission_id),
+        comments=comments_on(Mission, mission_id),
+    )
+
+
+def mission_signup_page(mission_id):
+    return rollup(
+        Mission.objects.filter(id=mission_id),
+        campaign=Campaign.objects.filter(mission=mission_id),
+        packages=Package.objects.filter(mission=mission_id),
+        flights=Flight.objects.filter(package__mission=mission_id),
+        aircraft=Aircraft.objects.filter(flight__package__mission=mission_id),
+        comments=comments_on(Mission, mission_id),
+    )
+
+
+def package_page(package_id):
+    return rollup(
+        Package.objects.filter(id=package_id),
+        mission=Mission.objects.filter(package=package_id),
+        campaign=Campaign.objects.filter(mission__package=package_id),
+        flights=Flight.objects.filter(package=package_id),
+        aircraft=Aircraft.objects.filter(flight__package=package_id),
+        imagery=PackageImagery.objects.filter(package=package_id),
+        comments=comments_on(Package, package_id),
+    )
+
+
+def flight_page(flight_id):
+    return rollup(
+        Flight.objects.filter(id=flight_id),
+        package=Package.objects.filter(flight=flight_id),
+        mission=Mission.objects.filter(package__flight=flight_id),
+        campaign=Campaign.objects.filter(mission__package__flight=flight_id),
+        aircraft=Aircraft.objects.filter(flight=flight_id),
+        waypoints=Waypoint.objects.filter(flight=flight_id),
+        targets=Target.objects.filter(flight=flight_id),
+        imagery=FlightImagery.objects.filter(flight=flight_id),
+        comments=comments_on(Flight, flight_id),
+    )
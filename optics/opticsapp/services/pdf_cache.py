@@ -0,0 +1,182 @@
+import functools
+import hashlib
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db.models import OuterRef, Sum
+from django.template.loader import get_template
+from django.utils import timezone
+
+from ..models import (
+    Aircraft,
+    Flight,
+    Mission,
+    Package,
+    PdfArtifact,
+    Support,
+    Target,
+    Threat,
+    Waypoint,
+)
+from .rollup import rollup, rollup_each, rollup_version
+
+logger = logging.getLogger(__name__)
+
+MISSION_CARD_TEMPLATE = "mission_card/mission_card_2.html"
+# Bump when the card's context changes; changes to the template itself are picked up
+# from its source.
+MISSION_CARD_VERSION = 1
+
+
+@functools.lru_cache
+def template_digest(name):
+    """Hashes the source of a template, which only changes with a deploy."""
+    source = get_template(name).template.source
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def mission_card_fingerprints(mission_id, flight_ids):
+    """
+    Fingerprints everything drawn on the mission cards of ``flight_ids``.
+
+    The mission-wide parts are rolled up once and each flight's own rows in one
+    more query. Returns ``{flight id: fingerprint}``, without the flights that are
+    missing, and {} when the mission does not exist.
+    """
+    mission = rollup(
+        Mission.objects.filter(id=mission_id),
+        packages=Package.objects.filter(mission=mission_id),
+        flights=Flight.objects.filter(package__mission=mission_id),
+        aircraft=Aircraft.objects.filter(flight__package__mission=mission_id),
+        threats=Threat.objects.filter(mission=mission_id),
+        supports=Support.objects.filter(mission=mission_id),
+    )
+    if mission is None:
+        return {}
+    flights = rollup_each(
+        Flight.objects.filter(id__in=flight_ids),
+        waypoints=Waypoint.objects.filter(flight=OuterRef("pk")),
+        targets=Target.objects.filter(flight=OuterRef("pk")),
+    )
+    return {
+        flight_id: rollup_version(
+            {
+                **mission,
+                **{f"flight_{name}": value for name, value in flight.items()},
+            },
+            MISSION_CARD_TEMPLATE,
+            template_digest(MISSION_CARD_TEMPLATE),
+            MISSION_CARD_VERSION,
+            flight_id,
+        )
+        for flight_id, flight in flights.items()
+    }
+
+
+def mission_card_fingerprint(mission_id, flight_id):
+    """The fingerprint of one flight's mission card, None when either is missing."""
+    return mission_card_fingerprints(mission_id, [flight_id]).get(flight_id)
+
+
+class PdfRenderCache:
+    """
+    Rendered PDFs keyed by content fingerprint.
+
+    The bytes live in a storage backend, either the configured default storage (S3)
+    or a local directory, and the PdfArtifact table keeps the size and last access
+    time of every entry so the least recently used ones can be evicted once
+    ``max_bytes`` or ``max_entries`` is exceeded.
+    """
+
+    # Limits writes to the index when the same card is fetched repeatedly.
+    touch_interval = timedelta(minutes=1)
+
+    def __init__(self, storage, location="pdf_cache", max_bytes=None, max_entries=None):
+        self.storage = storage
+        self.location = location
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, "PDF_CACHE", {})
+        if options.get("STORAGE", "local") == "default":
+            storage = default_storage
+        else:
+            storage = FileSystemStorage(
+                location=options.get("LOCATION", settings.BASE_DIR / "pdf_cache")
+            )
+        return cls(
+            storage,
+            max_bytes=options.get("MAX_BYTES"),
+            max_entries=options.get("MAX_ENTRIES"),
+        )
+
+    def path(self, key):
+        return f"{self.location}/{key}.pdf"
+
+    def get(self, key):
+        artifact = PdfArtifact.objects.filter(key=key).first()
+        if artifact is None:
+            return None
+
+        try:
+            with self.storage.open(artifact.path, "rb") as pdf_file:
+                content = pdf_file.read()
+        except (FileNotFoundError, OSError):
+            # Another instance's local disk, or the file was removed.
+            artifact.delete()
+            return None
+
+        now = timezone.now()
+        if now - artifact.last_accessed > self.touch_interval:
+            PdfArtifact.objects.filter(id=artifact.id).update(last_accessed=now)
+        return content
+
+    def put(self, key, content):
+        path = self.path(key)
+        previous = (
+            PdfArtifact.objects.filter(key=key).values_list("path", flat=True).first()
+        )
+        for stale in {path, previous} - {None}:
+            if self.storage.exists(stale):
+                self.storage.delete(stale)
+        # Storages may pick another name, on a collision for one, so the index keeps
+        # the name that was written.
+        name = self.storage.save(path, ContentFile(content))
+
+        PdfArtifact.objects.update_or_create(
+            key=key,
+            defaults={
+                "path": name,
+                "size": len(content),
+                "last_accessed": timezone.now(),
+            },
+        )
+        self.evict()
+
+    def evict(self):
+        artifacts = PdfArtifact.objects.order_by("last_accessed")
+        total = artifacts.aggregate(size=Sum("size"))["size"] or 0
+        count = artifacts.count()
+
+        evicted = []
+        for artifact in artifacts.only("id", "path", "size").iterator():
+            over_bytes = self.max_bytes is not None and total > self.max_bytes
+            over_entries = self.max_entries is not None and count > self.max_entries
+            if not (over_bytes or over_entries):
+                break
+            self.storage.delete(artifact.path)
+            evicted.append(artifact.id)
+            total -= artifact.size
+            count -= 1
+
+        if evicted:
+            PdfArtifact.objects.filter(id__in=evicted).delete()
+            logger.info(f"Evicted {len(evicted)} cached PDFs.")
+
+
+pdf_cache = PdfRenderCache.from_settings()
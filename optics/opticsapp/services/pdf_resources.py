@@ -0,0 +1,147 @@
+import base64
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.files.storage import default_storage
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# A4 at 150 dpi, enough for a printed kneeboard.
+PRINT_SIZE = (1240, 1754)
+JPEG_QUALITY = 80
+
+RESOURCE_PATTERN = re.compile(r"""(?:src=["']|url\()\s*([^"')\s]+)""")
+
+
+class EncodedResourceCache:
+    """
+    LRU of images already downsampled and encoded as data URIs.
+
+    Entries expire after ``ttl`` seconds because S3 uploads can overwrite a file
+    under the same name.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, ttl=600):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, uri):
+        with self._lock:
+            entry = self._entries.get(uri)
+            if entry is None:
+                return None
+            data_uri, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl:
+                self._remove(uri)
+                return None
+            self._entries.move_to_end(uri)
+            return data_uri
+
+    def put(self, uri, data_uri):
+        with self._lock:
+            if uri in self._entries:
+                self._remove(uri)
+            self._entries[uri] = (data_uri, time.monotonic())
+            self.size += len(data_uri)
+            while self.size > self.max_bytes and len(self._entries) > 1:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, uri):
+        data_uri, stored_at = self._entries.pop(uri)
+        self.size -= len(data_uri)
+
+
+resource_cache = EncodedResourceCache()
+
+
+def storage_name(uri):
+    """Maps a media or static URL back to its storage and file name."""
+    uri = uri.split("?")[0]
+    for storage, prefixes in (
+        (default_storage, (settings.MEDIA_URL, default_storage.url(""))),
+        (staticfiles_storage, (settings.STATIC_URL, staticfiles_storage.url(""))),
+    ):
+        for prefix in prefixes:
+            prefix = prefix.split("?")[0]
+            if prefix and uri.startswith(prefix):
+                return storage, uri[len(prefix) :]
+            # STATIC_URL is configured without its leading slash.
+            if prefix and not prefix.startswith(("/", "http")) and uri.startswith(
+                "/" + prefix
+            ):
+                return storage, uri[len(prefix) + 1 :]
+    return None, None
+
+
+def open_resource(storage, name):
+    # Static files ship with the app, so a local copy avoids a trip to the bucket.
+    if storage is staticfiles_storage:
+        path = finders.find(name)
+        if path:
+            return open(path, "rb")
+    return storage.open(name, "rb")
+
+
+def encode_image(image_file):
+    image = Image.open(image_file)
+    image.thumbnail(PRINT_SIZE, Image.LANCZOS)
+
+    output = BytesIO()
+    if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+        image.save(output, format="PNG", optimize=True)
+        mime_type = "image/png"
+    else:
+        image.convert("RGB").save(output, format="JPEG", quality=JPEG_QUALITY)
+        mime_type = "image/jpeg"
+
+    encoded = base64.b64encode(output.getvalue()).decode("ascii")
+    return f"data:{mime_type};base64,{encoded}"
+
+
+def encoded_resource(uri):
+    """
+    Returns ``uri`` as a downsampled data URI read straight from its storage backend,
+    or None when it is not a media/static file that can be resolved.
+    """
+    if uri.startswith("data:"):
+        return uri
+
+    data_uri = resource_cache.get(uri)
+    if data_uri is not None:
+        return data_uri
+
+    storage, name = storage_name(uri)
+    if storage is None or not name:
+        return None
+
+    try:
+        with open_resource(storage, name) as image_file:
+            data_uri = encode_image(image_file)
+    except (OSError, ValueError) as err:
+        logger.warning(f"Could not embed [{uri}] in PDF: {err}")
+        return None
+
+    resource_cache.put(uri, data_uri)
+    return data_uri
+
+
+def link_callback(uri, rel):
+    """pisa link_callback that embeds media and static images instead of fetching them."""
+    return encoded_resource(uri) or uri
+
+
+def warm_resources(html):
+    """Resolves every image referenced by ``html`` into the cache."""
+    for uri in set(RESOURCE_PATTERN.findall(html)):
+        encoded_resource(uri)
@@ -0,0 +1,120 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class QueueWorker:
+    """
+    Claims the due rows of a queue model and processes them one at a time.
+
+    Queue models have ``status``, ``attempts``, ``claimed_at``, ``last_error`` and
+    ``date_modified`` columns with PENDING, WORKING and FAILED statuses. Subclasses
+    set ``model`` and ``label`` and implement ``handle(entry)``, which stores the
+    result and marks the entry done. Errors in ``permanent_errors`` fail the entry
+    at once; ``retried_errors`` put it back in the queue until ``max_attempts``.
+    """
+
+    model = None
+    # Names an entry in the log, formatted with ``entry``.
+    label = "Entry [{entry.id}]"
+    working = "WORKING"
+    permanent_errors = ()
+    retried_errors = (Exception,)
+    batch_size = 10
+    max_attempts = 3
+    claim_timeout = timedelta(minutes=5)
+    # Columns written when an entry is retried or fails.
+    retry_fields = ["status", "attempts", "last_error", "date_modified"]
+    fail_fields = retry_fields
+
+    def __init__(self, max_attempts=None, claim_timeout=None):
+        if max_attempts is not None:
+            self.max_attempts = max_attempts
+        if claim_timeout is not None:
+            self.claim_timeout = claim_timeout
+
+    def describe(self, entry):
+        return self.label.format(entry=entry)
+
+    def run_pending(self, batch_size=None):
+        entries = self.claim(batch_size or self.batch_size)
+        for entry in entries:
+            self.process(entry)
+        return len(entries)
+
+    def due(self, now):
+        return Q(status=self.model.PENDING)
+
+    def claim(self, batch_size):
+        now = timezone.now()
+        with transaction.atomic():
+            # Entries left working by a worker that died are picked up again.
+            entries = list(
+                self.model.objects.select_for_update(skip_locked=True).filter(
+                    self.due(now)
+                    | Q(status=self.working, claimed_at__lt=now - self.claim_timeout)
+                )[:batch_size]
+            )
+            self.model.objects.filter(id__in=[entry.id for entry in entries]).update(
+                status=self.working, claimed_at=now
+            )
+        return entries
+
+    def process(self, entry):
+        entry.attempts += 1
+        try:
+            self.handle(entry)
+        except self.permanent_errors as err:
+            self.fail(entry, str(err))
+        except self.retried_errors as err:
+            delay = self.retry_delay(entry, err)
+            if delay is None:
+                self.fail(entry, str(err))
+            else:
+                self.retry(entry, delay, str(err))
+        else:
+            logger.info(f"{self.describe(entry)} done.")
+
+    def handle(self, entry):
+        raise NotImplementedError
+
+    def retry_delay(self, entry, error):
+        """Seconds before ``entry`` is tried again, or None once it should fail."""
+        if entry.attempts >= self.max_attempts:
+            return None
+        return 0
+
+    def retry(self, entry, delay, error):
+        entry.status = self.model.PENDING
+        entry.last_error = error
+        entry.save(update_fields=self.retry_fields)
+        logger.warning(f"{self.describe(entry)} will be retried in {delay}s: {error}")
+
+    def fail(self, entry, error):
+        entry.status = self.model.FAILED
+        entry.last_error = error
+        entry.save(update_fields=self.fail_fields)
+        logger.error(f"{self.describe(entry)} failed: {error}")
+
+    def idle(self):
+        """Called each time the run loop finds the queue empty."""
+
+    def run(self, once=False, interval=2.0, batch_size=None):
+        """
+        Processes the queue until stopped, sleeping ``interval`` seconds whenever it
+        is empty, or only until it is empty with ``once``.
+        """
+        logger.info(f"{type(self).__name__} started.")
+        while True:
+            if self.run_pending(batch_size):
+                continue
+            if once:
+                break
+            self.idle()
+            time.sleep(interval)
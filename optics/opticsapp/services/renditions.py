@@ -0,0 +1,301 @@
+import os
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save, pre_save
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from ..models import (
+    Campaign,
+    FlightImagery,
+    ImageRendition,
+    MissionImagery,
+    PackageImagery,
+    Target,
+    ThreatReference,
+    UserProfile,
+)
+from .queue_worker import QueueWorker
+from .versions import TREE, versioned_cache
+
+# Widths of the bounding box each variant is fitted into, smallest first.
+VARIANTS = {"thumb": 320, "medium": 800, "full": 1600}
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+IMAGE_FIELDS = {
+    Campaign: ["campaignImage", "aoImage"],
+    Target: ["target_image"],
+    MissionImagery: ["image"],
+    PackageImagery: ["image"],
+    FlightImagery: ["image"],
+    ThreatReference: ["rwr_image", "rwr_image2", "rwr_image3"],
+    UserProfile: ["profile_image"],
+}
+
+# Template tags read renditions from the cache; images still pending are looked
+# up again after a short while.
+CACHE_TIMEOUT = 60 * 60 * 24
+PENDING_TIMEOUT = 60
+
+
+def cache_key(source):
+    return f"rendition:{source}"
+
+
+def uploaded_images(instance, update_fields=None):
+    """
+    Returns the stored names of ``instance``'s uploaded images.
+
+    Values outside the field's ``upload_to``, such as the static avatars a profile
+    can pick, are not ours to resize.
+    """
+    names = []
+    for name in IMAGE_FIELDS[type(instance)]:
+        if update_fields is not None and name not in update_fields:
+            continue
+        field_file = getattr(instance, name)
+        if field_file and field_file.name.startswith(field_file.field.upload_to):
+            names.append(field_file.name)
+    return names
+
+
+def enqueue(names, replaced=()):
+    """
+    Queues renditions of the stored files ``names``.
+
+    Files in ``replaced`` were written again under a name that may already have
+    renditions, so those rows are queued again too.
+    """
+    ImageRendition.objects.bulk_create(
+        [ImageRendition(source=name) for name in names], ignore_conflicts=True
+    )
+    if replaced:
+        ImageRendition.objects.filter(source__in=replaced).update(
+            status=ImageRendition.PENDING,
+            attempts=0,
+            claimed_at=None,
+            last_error="",
+            date_modified=timezone.now(),
+        )
+        cache.delete_many([cache_key(name) for name in replaced])
+
+
+def remember_uploads(sender, instance, update_fields=None, **kwargs):
+    # Model.save writes newly assigned files after this signal. Storages that
+    # overwrite, such as S3, can store them under a name that already has
+    # renditions.
+    instance._uploaded_images = [
+        name
+        for name in IMAGE_FIELDS[sender]
+        if (update_fields is None or name in update_fields)
+        and getattr(instance, name)
+        and not getattr(instance, name)._committed
+    ]
+
+
+def image_saved(sender, instance, update_fields=None, **kwargs):
+    names = uploaded_images(instance, update_fields)
+    replaced = [
+        getattr(instance, name).name
+        for name in instance.__dict__.pop("_uploaded_images", ())
+    ]
+    if names:
+        transaction.on_commit(lambda: enqueue(names, replaced))
+
+
+for image_model in IMAGE_FIELDS:
+    pre_save.connect(remember_uploads, sender=image_model)
+    post_save.connect(image_saved, sender=image_model)
+
+
+def smallest_first(variants):
+    # PostgreSQL's jsonb does not keep the order the variants were stored in.
+    return {variant: variants[variant] for variant in VARIANTS if variant in variants}
+
+
+def renditions_of(source):
+    """
+    Returns the ``variants`` of ``source``, smallest first, or {} until they have
+    been built.
+    """
+    key = cache_key(source)
+    variants = cache.get(key)
+    if variants is None:
+        variants = smallest_first(
+            ImageRendition.objects.filter(source=source, status=ImageRendition.DONE)
+            .values_list("variants", flat=True)
+            .first()
+            or {}
+        )
+        cache.set(key, variants, CACHE_TIMEOUT if variants else PENDING_TIMEOUT)
+    return variants
+
+
+def variant_names(variants):
+    for variant in variants.values():
+        for image_format in ("webp", "jpeg", "png"):
+            if image_format in variant:
+                yield variant[image_format]["name"]
+
+
+def discard(source, storage=default_storage):
+    """Deletes the renditions of a stored file that is being deleted."""
+    for variants in ImageRendition.objects.filter(source=source).values_list(
+        "variants", flat=True
+    ):
+        for name in variant_names(variants):
+            storage.delete(name)
+    ImageRendition.objects.filter(source=source).delete()
+    cache.delete(cache_key(source))
+
+
+def srcset(variants, image_format, storage=default_storage):
+    return ", ".join(
+        f"{storage.url(variant[image_format]['name'])} {variant['width']}w"
+        for variant in variants.values()
+    )
+
+
+# ---------------- Worker -------------------------
+
+
+def has_alpha(image):
+    return image.mode in ("RGBA", "LA") or "transparency" in image.info
+
+
+def encode(image, image_format):
+    output = BytesIO()
+    if image_format == "webp":
+        image.save(output, format="WEBP", quality=WEBP_QUALITY, method=4)
+    elif image_format == "png":
+        image.save(output, format="PNG", optimize=True)
+    else:
+        image.convert("RGB").save(
+            output, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True
+        )
+    return output.getvalue()
+
+
+def rendition_name(source, variant, image_format):
+    root, _ = os.path.splitext(source)
+    return f"{root}.{variant}.{image_format}"
+
+
+def build_variants(source, data, storage=default_storage):
+    """
+    Writes the variants of the image ``data`` next to ``source`` and returns them.
+
+    Variants are never upscaled, so a small image may have fewer variants.
+    """
+    image = ImageOps.exif_transpose(Image.open(BytesIO(data)))
+    if has_alpha(image):
+        image = image.convert("RGBA")
+        formats = ("webp", "png")
+    else:
+        image = image.convert("RGB")
+        formats = ("webp", "jpeg")
+
+    variants = {}
+    previous_size = None
+    for variant, width in VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((width, width), Image.LANCZOS)
+        if resized.size == previous_size:
+            break
+        previous_size = resized.size
+
+        variants[variant] = {"width": resized.width, "height": resized.height}
+        for image_format in formats:
+            encoded = encode(resized, image_format)
+            name = storage.save(
+                rendition_name(source, variant, image_format), ContentFile(encoded)
+            )
+            variants[variant][image_format] = {"name": name, "size": len(encoded)}
+    return variants
+
+
+class RenditionWorker(QueueWorker):
+    """Builds queued ImageRendition rows, retrying failed reads a few times."""
+
+    model = ImageRendition
+    label = "Rendition of {entry.source}"
+    permanent_errors = (FileNotFoundError, UnidentifiedImageError)
+
+    def __init__(self, storage=default_storage, **kwargs):
+        super().__init__(**kwargs)
+        self.storage = storage
+
+    def handle(self, entry):
+        with self.storage.open(entry.source, "rb") as source:
+            data = source.read()
+        # A replaced source is built again under the same names.
+        for name in variant_names(entry.variants):
+            self.storage.delete(name)
+        entry.variants = build_variants(entry.source, data, self.storage)
+        entry.status = ImageRendition.DONE
+        entry.source_size = len(data)
+        entry.last_error = ""
+        entry.save()
+        cache.set(cache_key(entry.source), entry.variants, CACHE_TIMEOUT)
+        self.touch_owners(entry.source)
+
+    def backfill(self):
+        return backfill()
+
+    def touch_owners(self, source):
+        # Cached fragments such as the campaign cards pick up the new markup.
+        for model, fields in IMAGE_FIELDS.items():
+            if model not in TREE:
+                continue
+            query = Q()
+            for field in fields:
+                query |= Q(**{field: source})
+            for instance in model.objects.filter(query):
+                versioned_cache.touch(instance)
+
+
+# ---------------- Backfill -------------------------
+
+
+def backfill():
+    """Queues every uploaded image that has no rendition row yet."""
+    names = set()
+    for model, fields in IMAGE_FIELDS.items():
+        for instance in model.objects.only("pk", *fields).iterator():
+            names.update(uploaded_images(instance))
+    existing = set(
+        ImageRendition.objects.filter(source__in=names).values_list("source", flat=True)
+    )
+    enqueue(sorted(names - existing))
+    return len(names - existing)
+
+
+def savings():
+    """
+    Totals the bytes of the built originals and of each variant and format.
+
+    Returns ``{"images", "original", variant: {format: bytes}}``.
+    """
+    totals = {"images": 0, "original": 0}
+    for source_size, variants in ImageRendition.objects.filter(
+        status=ImageRendition.DONE
+    ).values_list("source_size", "variants"):
+        totals["images"] += 1
+        totals["original"] += source_size
+        variants = smallest_first(variants)
+        for variant in VARIANTS:
+            # Small images reuse their largest variant for the bigger sizes.
+            built = variants.get(variant) or variants[list(variants)[-1]]
+            for image_format in ("webp", "jpeg", "png"):
+                if image_format in built:
+                    sizes = totals.setdefault(variant, {})
+                    sizes[image_format] = (
+                        sizes.get(image_format, 0) + built[image_format]["size"]
+                    )
+    return totals
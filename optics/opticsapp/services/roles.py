@@ -0,0 +1,95 @@
+from django.contrib.auth.models import Group, User
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from ..models import Squadron, UserProfile
+from .versions import versioned_cache
+
+
+class Roles:
+    """
+    The signed-in user's profile and group names, loaded once and shared by the
+    views, decorators and template tags handling a request.
+    """
+
+    def __init__(self, profile=None, groups=()):
+        self.profile = profile
+        self.groups = frozenset(groups)
+
+    def has_group(self, name):
+        return name in self.groups
+
+    @property
+    def is_admin(self):
+        return self.has_group("admin")
+
+    @property
+    def is_planner(self):
+        return self.has_group("planner")
+
+
+def load_roles(user_id):
+    profile = (
+        UserProfile.objects.select_related("squadron").filter(user=user_id).first()
+    )
+    groups = Group.objects.filter(user=user_id).values_list("name", flat=True)
+    return Roles(profile, groups)
+
+
+def roles_for(user):
+    """
+    Returns the ``Roles`` of ``user``, cached per user until their groups, profile
+    or squadron change, and remembered on ``user`` for the rest of the request.
+    """
+    try:
+        return user._roles
+    except AttributeError:
+        pass
+    if not user.is_authenticated:
+        roles = Roles()
+    else:
+        roles = versioned_cache.get_or_set(
+            "user", user.id, lambda: load_roles(user.id), "roles"
+        )
+    user._roles = roles
+    return roles
+
+
+def roles_changed(*user_ids):
+    for user_id in user_ids:
+        versioned_cache.bump("user", user_id)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        roles_changed(instance.pk)
+    elif action == "pre_clear":
+        # group.user_set.clear() sends no pk_set.
+        roles_changed(*instance.user_set.values_list("id", flat=True))
+    else:
+        roles_changed(*pk_set)
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    # Renames and deletes change the names every member holds.
+    roles_changed(*instance.user_set.values_list("id", flat=True))
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def profile_changed(sender, instance, **kwargs):
+    roles_changed(instance.user_id)
+
+
+@receiver(post_save, sender=Squadron)
+def squadron_changed(sender, instance, **kwargs):
+    roles_changed(
+        *UserProfile.objects.filter(squadron=instance).values_list(
+            "user_id", flat=True
+        )
+    )
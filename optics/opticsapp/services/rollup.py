@@ -0,0 +1,57 @@
+import hashlib
+
+from django.db.models import IntegerField, Subquery
+
+
+class SubqueryCount(Subquery):
+    template = "(SELECT COUNT(*) FROM (%(subquery)s) _count)"
+    output_field = IntegerField()
+
+
+def rollup_annotations(querysets):
+    annotations = {}
+    for name, queryset in querysets.items():
+        queryset = queryset.order_by()
+        annotations[f"{name}_count"] = SubqueryCount(queryset.values("pk"))
+        annotations[f"{name}_modified"] = Subquery(
+            queryset.order_by("-date_modified").values("date_modified")[:1]
+        )
+    return annotations
+
+
+def rollup(base_queryset, **querysets):
+    """
+    Returns the row count and latest ``date_modified`` of each queryset in one query.
+
+    The counts and maxima are scalar subqueries annotated onto the first row of
+    ``base_queryset`` together with its own ``date_modified``. Returns None when
+    ``base_queryset`` is empty.
+    """
+    annotations = rollup_annotations(querysets)
+    return (
+        base_queryset.order_by()
+        .annotate(**annotations)
+        .values("pk", "date_modified", *annotations)
+        .first()
+    )
+
+
+def rollup_each(base_queryset, **querysets):
+    """
+    Like ``rollup`` for every row of ``base_queryset`` in one query, as
+    ``{pk: values}``. The querysets select each row's children with
+    ``OuterRef("pk")``.
+    """
+    annotations = rollup_annotations(querysets)
+    rows = (
+        base_queryset.order_by()
+        .annotate(**annotations)
+        .values("pk", "date_modified", *annotations)
+    )
+    return {row["pk"]: row for row in rows}
+
+
+def rollup_version(values, *salt):
+    """Hashes a rollup into a short, stable version string."""
+    digest = hashlib.sha256(repr((salt, sorted(values.items()))).encode("utf-8"))
+    return digest.hexdigest()
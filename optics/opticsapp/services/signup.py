@@ -0,0 +1,137 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Exists, Prefetch, Q
+from django.utils import timezone
+
+from ..models import Aircraft, Flight, Package
+from .versions import touch_node
+
+
+def roster_flights():
+    return Flight.objects.select_related("task").prefetch_related(
+        Prefetch(
+            "aircraft_set",
+            queryset=Aircraft.objects.select_related("type", "pilot", "rio_wso"),
+        )
+    )
+
+
+class SignupRoster:
+    """
+    The package -> flight -> aircraft tree of a mission's signup sheet.
+
+    Loaded in three queries: the packages, annotated with the seats ``user`` holds
+    in each of them, their flights and the flights' aircraft with both crew members.
+    """
+
+    def __init__(self, mission, user):
+        self.user = user
+        self.packages = list(
+            Package.objects.filter(mission=mission)
+            .annotate(
+                user_seats=Count(
+                    "flight__aircraft",
+                    filter=Q(flight__aircraft__pilot=user)
+                    | Q(flight__aircraft__rio_wso=user),
+                )
+            )
+            .prefetch_related(Prefetch("flight_set", queryset=roster_flights()))
+        )
+
+    @property
+    def has_seat(self):
+        return sum(package.user_seats for package in self.packages)
+
+    @property
+    def aircraft(self):
+        for package in self.packages:
+            for flight in package.flight_set.all():
+                yield from flight.aircraft_set.all()
+
+    @property
+    def seats(self):
+        """The aircraft in which the user is the pilot or the RIO/WSO."""
+        return [
+            aircraft
+            for aircraft in self.aircraft
+            if self.user.id in (aircraft.pilot_id, aircraft.rio_wso_id)
+        ]
+
+
+SEAT_FIELDS = {1: "pilot", 2: "rio_wso"}
+
+
+class SeatClaim:
+    CLAIMED = "claimed"
+    TAKEN = "taken"
+    ALREADY_SEATED = "already_seated"
+    MISSING = "missing"
+
+
+def seat_field(seat_id):
+    # The signup URLs use 1 for the pilot seat and anything else for the RIO/WSO.
+    return SEAT_FIELDS.get(seat_id, "rio_wso")
+
+
+def aircraft_mission_id(aircraft_id):
+    return (
+        Aircraft.objects.filter(id=aircraft_id)
+        .values_list("flight__package__mission", flat=True)
+        .first()
+    )
+
+
+def user_seats(mission_id, user):
+    return Aircraft.objects.filter(
+        Q(pilot=user) | Q(rio_wso=user), flight__package__mission=mission_id
+    )
+
+
+def claim_seat(aircraft_id, seat_id, user):
+    """
+    Puts ``user`` in an empty seat with a single conditional UPDATE.
+
+    The UPDATE only matches while the seat is empty, which the database re-checks
+    after waiting on a competing writer, so concurrent claims for one seat can only
+    succeed once. The one-seat-per-mission rule reads the user's other aircraft,
+    which a plain UPDATE does not lock: two claims by the same user on different
+    seats would both see none. Claims are therefore serialised per user by locking
+    the user's row first, and the UPDATE, a new statement under READ COMMITTED,
+    sees any seat a concurrent claim has committed.
+
+    Only the seat column and date_modified are written; auto_now does not fire on
+    ``update()`` and the mission card fingerprints depend on it.
+    """
+    field = seat_field(seat_id)
+    mission_ids = Aircraft.objects.filter(id=aircraft_id).values_list(
+        "flight__package__mission", flat=True
+    )
+    if not mission_ids:
+        return SeatClaim.MISSING
+
+    with transaction.atomic():
+        list(get_user_model().objects.select_for_update().filter(id=user.id))
+        claimed = (
+            Aircraft.objects.filter(id=aircraft_id, **{f"{field}__isnull": True})
+            .filter(~Exists(user_seats(mission_ids[0], user)))
+            .update(**{field: user, "date_modified": timezone.now()})
+        )
+    if claimed:
+        # update() sends no post_save, so the cached mission tree is bumped here.
+        touch_node(Aircraft, aircraft_id)
+        return SeatClaim.CLAIMED
+
+    holder = Aircraft.objects.filter(id=aircraft_id).values_list(field, flat=True)
+    if holder and holder[0] not in (None, user.id):
+        return SeatClaim.TAKEN
+    return SeatClaim.ALREADY_SEATED
+
+
+def release_seat(aircraft_id, seat_id):
+    field = seat_field(seat_id)
+    released = Aircraft.objects.filter(id=aircraft_id).update(
+        **{field: None, "date_modified": timezone.now()}
+    )
+    if released:
+        touch_node(Aircraft, aircraft_id)
+    return released
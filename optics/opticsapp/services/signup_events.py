@@ -0,0 +1,192 @@
+import json
+import logging
+import queue
+import select
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class QueueSubscription:
+    def __init__(self, broker, mission_id):
+        self.broker = broker
+        self.mission_id = mission_id
+        self.queue = queue.Queue()
+
+    def get(self, timeout):
+        """Returns the next event, or None if nothing arrived within ``timeout``."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Fans seat changes out to the signup boards open in this process.
+
+    Only reaches subscribers served by the same process, so deployments running
+    several workers should use the PostgresBroker instead.
+    """
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, mission_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions[mission_id])
+        for subscription in subscriptions:
+            subscription.queue.put(event)
+
+    def subscribe(self, mission_id):
+        subscription = QueueSubscription(self, mission_id)
+        with self._lock:
+            self._subscriptions[mission_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions[subscription.mission_id]
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.mission_id]
+
+
+class PostgresSubscription:
+    def __init__(self, channel):
+        # LISTEN needs its own autocommit connection that outlives the request's.
+        params = connections["default"].get_connection_params()
+        self.connection = connections["default"].Database.connect(**params)
+        self.connection.autocommit = True
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'LISTEN "{channel}"')
+        self.pending = []
+
+    def get(self, timeout):
+        if not self.pending:
+            readable, _, _ = select.select([self.connection], [], [], timeout)
+            if not readable:
+                return None
+            self.connection.poll()
+            self.pending.extend(self.connection.notifies)
+            self.connection.notifies.clear()
+        if not self.pending:
+            return None
+        return json.loads(self.pending.pop(0).payload)
+
+    def close(self):
+        self.connection.close()
+
+
+class PostgresBroker:
+    """Delivers seat changes between processes with LISTEN/NOTIFY."""
+
+    @staticmethod
+    def channel(mission_id):
+        return f"signup_{int(mission_id)}"
+
+    def publish(self, mission_id, event):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_notify(%s, %s)",
+                [self.channel(mission_id), json.dumps(event)],
+            )
+
+    def subscribe(self, mission_id):
+        return PostgresSubscription(self.channel(mission_id))
+
+
+BROKERS = {
+    "memory": InProcessBroker,
+    "postgres": PostgresBroker,
+}
+
+
+def broker_from_settings():
+    backend = settings.SIGNUP_EVENTS["BACKEND"]
+    if backend == "postgres" and connection.vendor != "postgresql":
+        # LISTEN/NOTIFY is PostgreSQL only; local and test databases stay in process.
+        backend = "memory"
+    return BROKERS[backend]()
+
+
+signup_broker = broker_from_settings()
+
+# Open streams in this process; each one holds a worker thread until it ends.
+stream_slots = threading.BoundedSemaphore(settings.SIGNUP_EVENTS["MAX_STREAMS"])
+
+
+def publish_seat_change(mission_id, aircraft_id):
+    """Tells the mission's signup boards that a seat changed once the change commits."""
+    transaction.on_commit(
+        lambda: signup_broker.publish(mission_id, {"aircraft_id": aircraft_id})
+    )
+
+
+def format_event(name, data):
+    lines = "".join(f"data: {line}\n" for line in data.splitlines())
+    return f"event: {name}\n{lines}\n"
+
+
+def open_stream(mission_id):
+    """
+    Subscribes to the mission's seat changes if this process has a stream slot left,
+    otherwise returns None and the board keeps polling.
+    """
+    if not stream_slots.acquire(blocking=False):
+        return None
+    try:
+        return signup_broker.subscribe(mission_id)
+    except Exception:
+        stream_slots.release()
+        raise
+
+
+class SeatEventStream:
+    """
+    Yields server-sent events carrying a re-rendered row for every changed aircraft.
+
+    Each stream holds a worker thread for as long as it is open, so it ends after
+    ``lifetime`` seconds and lets the browser's EventSource reconnect. The response
+    closes the stream even when it was never iterated, which unsubscribes and gives
+    the stream slot back.
+    """
+
+    def __init__(self, subscription, render_aircraft, lifetime=300, keepalive=15):
+        self.subscription = subscription
+        self.render_aircraft = render_aircraft
+        self.lifetime = lifetime
+        self.keepalive = keepalive
+        self.closed = False
+
+    def __iter__(self):
+        deadline = time.monotonic() + self.lifetime
+        try:
+            yield "retry: 2000\n\n"
+            while time.monotonic() < deadline:
+                event = self.subscription.get(timeout=self.keepalive)
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                aircraft_id = event["aircraft_id"]
+                html = self.render_aircraft(aircraft_id)
+                if html:
+                    yield format_event(f"aircraft-{aircraft_id}", html)
+        finally:
+            self.close()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.subscription.close()
+        stream_slots.release()
@@ -0,0 +1,613 @@
+import codecs
+import io
+import re
+import zipfile
+from array import array
+from datetime import timedelta
+from xml.etree import ElementTree
+
+import numpy as np
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from ..models import Debrief, Flight, FlightDebrief, MissionFile
+from .coordinates import great_circle
+from .queue_worker import QueueWorker
+
+# Columns of the stored track archives. Positions are kept in double precision,
+# a single precision longitude is only good to a couple of metres.
+TRACK_COLUMNS = {
+    "time": np.float32,
+    "lat": np.float64,
+    "long": np.float64,
+    "alt": np.float32,
+}
+# ACMI type tags of aircraft (parachutists are tagged Air too), and the object types
+# of the XML debriefings, which do not use tags.
+AIRCRAFT_TAGS = {"FixedWing", "Rotorcraft"}
+XML_AIRCRAFT = {"Aircraft", "Helicopter"}
+XML_ACTIONS = {
+    "HasTakenOff": "TakenOff",
+    "HasLanded": "Landed",
+    "HasBeenDestroyed": "Destroyed",
+}
+# Legs flown faster than this many m/s are respawns or recording glitches, and are
+# left out of the distance and time airborne.
+MAX_SPEED = 1000.0
+
+# Commas inside ACMI property values are escaped with a backslash.
+FIELD_SEPARATOR_RE = re.compile(r"(?<!\\),")
+NUMBER_WORDS = {
+    "one": "1",
+    "two": "2",
+    "three": "3",
+    "four": "4",
+    "five": "5",
+    "six": "6",
+    "seven": "7",
+    "eight": "8",
+    "nine": "9",
+}
+NUMBER_WORD_RE = re.compile(r"\b(" + "|".join(NUMBER_WORDS) + r")\b")
+# "Enfield 1-2 | Name" flies in flight "Enfield 1".
+PILOT_CALLSIGN_RE = re.compile(r"^\s*([A-Za-z]+)\s*(\d+)-\d+\b")
+
+
+class TacviewError(ValueError):
+    pass
+
+
+def debrief_options():
+    options = {"TRACK_INTERVAL": 1.0, "AIRBORNE_SPEED": 30.0}
+    options.update(getattr(settings, "DEBRIEFS", {}))
+    return options
+
+
+def is_aircraft(object_type):
+    return not AIRCRAFT_TAGS.isdisjoint(object_type.split("+")) or (
+        object_type in XML_AIRCRAFT
+    )
+
+
+class TrackedObject:
+    """An object of a recording, and the track of its positions if it flies."""
+
+    def __init__(self, object_id):
+        self.id = object_id
+        self.properties = {}
+        # None until the object's Type is known.
+        self.aircraft = None
+        # Longitude and latitude offsets from the reference point, and altitude.
+        self.position = [None, None, None]
+        self.time = array("d")
+        self.lat = array("d")
+        self.long = array("d")
+        self.alt = array("f")
+        self.pending = None
+        self.last_seen = 0.0
+        # [takeoff, landing] times, from the recording's events.
+        self.sorties = []
+        self.kills = 0
+        self.lost = False
+
+    def set(self, key, value):
+        self.properties[key] = value
+        if key == "Type":
+            self.aircraft = is_aircraft(value)
+
+    def move(self, time, lat, long, alt, interval):
+        """Records a position, keeping at most one per ``interval`` seconds."""
+        self.last_seen = time
+        if self.time and time - self.time[-1] < interval:
+            self.pending = (time, lat, long, alt)
+            return
+        self.store(time, lat, long, alt)
+        self.pending = None
+
+    def store(self, time, lat, long, alt):
+        self.time.append(time)
+        self.lat.append(lat)
+        self.long.append(long)
+        self.alt.append(alt)
+
+    def flush(self):
+        # The last position before the object is removed or the recording ends.
+        if self.pending is not None:
+            self.store(*self.pending)
+            self.pending = None
+
+    def column(self, name):
+        return np.frombuffer(getattr(self, name), dtype=getattr(self, name).typecode)
+
+    def event_airborne(self):
+        return sum(
+            (self.last_seen if landing is None else landing) - takeoff
+            for takeoff, landing in self.sorties
+        )
+
+
+class Recording:
+    """
+    The aircraft tracks, events and properties read from a Tacview recording.
+
+    Positions are thinned while they are read, so memory grows with the number of
+    aircraft and the length of the recording rather than with the size of the file.
+    """
+
+    def __init__(self, interval=None):
+        self.interval = (
+            debrief_options()["TRACK_INTERVAL"] if interval is None else interval
+        )
+        self.format = ""
+        self.properties = {}
+        self.objects = {}
+        # Objects removed from the recording, whose ids may be reused.
+        self.removed = []
+        self.time = 0.0
+        self.sample_count = 0
+
+    def object(self, object_id):
+        try:
+            return self.objects[object_id]
+        except KeyError:
+            tracked = self.objects[object_id] = TrackedObject(object_id)
+            return tracked
+
+    def remove(self, object_id):
+        tracked = self.objects.pop(object_id, None)
+        if tracked is not None:
+            tracked.last_seen = self.time
+            tracked.flush()
+            self.removed.append(tracked)
+
+    def event(self, kind, ids):
+        tracked = [self.object(object_id) for object_id in ids]
+        for each in tracked:
+            each.last_seen = max(each.last_seen, self.time)
+        if kind == "TakenOff" and tracked:
+            tracked[0].sorties.append([self.time, None])
+        elif kind == "Landed" and tracked:
+            sorties = tracked[0].sorties
+            if sorties and sorties[-1][1] is None:
+                sorties[-1][1] = self.time
+        elif kind == "Destroyed" and tracked and not tracked[0].lost:
+            victim = tracked[0]
+            victim.lost = True
+            killer = self.shooter(tracked[1]) if len(tracked) > 1 else None
+            if killer is not None and killer is not victim:
+                killer.kills += 1
+
+    def shooter(self, tracked):
+        # Weapons name the aircraft or unit that launched them as their Parent.
+        if not tracked.aircraft and "Parent" in tracked.properties:
+            return self.objects.get(tracked.properties["Parent"], tracked)
+        return tracked
+
+    def aircraft(self):
+        """Returns every aircraft seen, in the order they were removed or seen."""
+        objects = self.removed + list(self.objects.values())
+        for tracked in objects:
+            tracked.flush()
+        return [tracked for tracked in objects if tracked.aircraft]
+
+    @property
+    def duration(self):
+        return float(self.properties.get("Duration") or self.time)
+
+
+# ---------------- Readers -------------------------
+
+
+def read_recording(file, interval=None):
+    """
+    Reads a Tacview recording from the binary ``file``.
+
+    Takes the text ACMI 2.x format, zipped (.zip.acmi) or not, and the XML
+    debriefings Tacview exports. Both are read as a stream.
+    """
+    recording = Recording(interval)
+    head = file.read(4)
+    file.seek(0)
+    try:
+        if head == b"PK\x03\x04":
+            with zipfile.ZipFile(file) as archive:
+                members = [name for name in archive.namelist() if name[-1:] != "/"]
+                if not members:
+                    raise TacviewError("The archive is empty.")
+                with archive.open(members[0]) as member:
+                    read_stream(member, recording)
+        else:
+            read_stream(file, recording)
+    except zipfile.BadZipFile as err:
+        raise TacviewError(f"Not a valid archive: {err}")
+    except UnicodeDecodeError as err:
+        raise TacviewError(f"Not a text recording: {err}")
+    return recording
+
+
+def read_stream(stream, recording):
+    start = stream.read(64)
+    stream.seek(0)
+    start = start.removeprefix(codecs.BOM_UTF8).lstrip()
+    if start.startswith(b"<"):
+        read_xml(stream, recording)
+    elif start.startswith(b"FileType=text/acmi/tacview"):
+        text = io.TextIOWrapper(stream, encoding="utf-8-sig")
+        try:
+            read_acmi(text, recording)
+        finally:
+            # Leave the caller's file open.
+            text.detach()
+    else:
+        raise TacviewError("Not a Tacview recording.")
+
+
+def read_acmi(stream, recording):
+    """Reads the lines of a text ACMI recording."""
+    recording.format = "ACMI"
+    objects = recording.objects
+    interval = recording.interval
+    reference = [0.0, 0.0]
+    line_number = 0
+    continued = ""
+
+    for line_number, line in enumerate(stream, 1):
+        # A trailing backslash continues a value on the next line.
+        if line.endswith("\\\n"):
+            continued += line[:-2] + "\n"
+            continue
+        line = continued + line.rstrip("\n")
+        continued = ""
+
+        try:
+            first = line[:1]
+            if first == "#":
+                recording.time = float(line[1:])
+                continue
+            if first == "-":
+                recording.remove(line[1:])
+                continue
+            if not line or line.startswith("//"):
+                continue
+
+            if "\\," in line:
+                fields = [
+                    field.replace("\\,", ",")
+                    for field in FIELD_SEPARATOR_RE.split(line)
+                ]
+            else:
+                fields = line.split(",")
+            object_id = fields[0]
+
+            if object_id == "0":
+                read_global(recording, fields[1:], reference)
+                continue
+            if "=" in object_id:
+                # The FileType and FileVersion header.
+                key, _, value = object_id.partition("=")
+                if key == "FileVersion" and not value.startswith("2."):
+                    raise TacviewError(f"Unsupported ACMI version {value}.")
+                continue
+
+            tracked = objects.get(object_id) or recording.object(object_id)
+            transform = None
+            for field in fields[1:]:
+                key, _, value = field.partition("=")
+                if key == "T":
+                    transform = value
+                else:
+                    tracked.set(key, value)
+            if transform is None or tracked.aircraft is False:
+                continue
+
+            # lon|lat|alt, followed by the orientation. Empty values are unchanged.
+            position = tracked.position
+            for index, value in enumerate(transform.split("|", 3)[:3]):
+                if value:
+                    position[index] = float(value)
+            if None in position:
+                continue
+            tracked.move(
+                recording.time,
+                reference[1] + position[1],
+                reference[0] + position[0],
+                position[2],
+                interval,
+            )
+            recording.sample_count += 1
+        except TacviewError:
+            raise
+        except (ValueError, IndexError) as err:
+            raise TacviewError(f"Line {line_number}: {err}")
+
+
+def read_global(recording, fields, reference):
+    for field in fields:
+        key, _, value = field.partition("=")
+        if key == "Event":
+            # Event=Destroyed|id|text, the ids of every object involved then a text.
+            kind, *rest = value.split("|")
+            recording.event(kind, [object_id for object_id in rest[:-1] if object_id])
+        elif key == "ReferenceLongitude":
+            reference[0] = float(value)
+        elif key == "ReferenceLatitude":
+            reference[1] = float(value)
+        else:
+            recording.properties[key] = value
+
+
+def read_xml(stream, recording):
+    """Reads the events of a Tacview XML debriefing."""
+    recording.format = "XML"
+    events = None
+    try:
+        for event, element in ElementTree.iterparse(stream, events=("start", "end")):
+            if event == "start":
+                if element.tag == "Events":
+                    events = element
+            elif element.tag == "Event" and events is not None:
+                read_xml_event(recording, element)
+                # Drop the event once read, so memory stays flat.
+                events.remove(element)
+            elif events is None and element.tag in ("Title", "Duration"):
+                recording.properties[element.tag] = (element.text or "").strip()
+    except ElementTree.ParseError as err:
+        raise TacviewError(f"Not a valid XML debriefing: {err}")
+
+
+def read_xml_event(recording, element):
+    try:
+        recording.time = float(element.findtext("Time") or 0)
+    except ValueError as err:
+        raise TacviewError(f"Invalid event time: {err}")
+
+    ids = []
+    for tag in ("PrimaryObject", "ParentObject", "SecondaryObject"):
+        child = element.find(tag)
+        if child is None or not child.get("ID"):
+            continue
+        tracked = recording.object(child.get("ID"))
+        for prop in child:
+            tracked.set(prop.tag, (prop.text or "").strip())
+        ids.append(tracked.id)
+
+    # The parent, when given, is who fired the secondary object.
+    kind = XML_ACTIONS.get(element.findtext("Action"))
+    if kind is not None:
+        recording.event(kind, ids)
+
+
+# ---------------- Summaries -------------------------
+
+
+def track_summary(time, lat, long, alt, airborne_speed):
+    """
+    Returns the seconds airborne, highest altitude and distance flown of a track,
+    measured over all its legs at once.
+    """
+    if not len(time):
+        return 0.0, 0.0, 0.0
+    legs = great_circle(lat[:-1], long[:-1], lat[1:], long[1:])
+    seconds = np.diff(time)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        speed = legs / seconds
+    flown = speed <= MAX_SPEED
+    airborne = flown & (speed > airborne_speed)
+    return float(seconds[airborne].sum()), float(alt.max()), float(legs[flown].sum())
+
+
+def callsign_key(callsign):
+    callsign = NUMBER_WORD_RE.sub(
+        lambda match: NUMBER_WORDS[match.group(1)], callsign.lower()
+    )
+    return re.sub(r"[^a-z0-9]", "", callsign)
+
+
+def group_keys(group, pilots):
+    """Returns the callsigns a DCS group may have been planned under."""
+    # Liberation names its groups "Package task|coalition|...|airframe|".
+    keys = [callsign_key(group), callsign_key(group.split("|")[0])]
+    for pilot in pilots:
+        match = PILOT_CALLSIGN_RE.match(pilot)
+        if match:
+            keys.append(callsign_key(match.group(1) + match.group(2)))
+    return [key for key in keys if key]
+
+
+def flight_summaries(recording, aircraft, options=None):
+    """
+    Returns an unsaved FlightDebrief for each group of ``aircraft``. Their "track"
+    is the index of the aircraft in the track archive.
+    """
+    options = options or debrief_options()
+    groups = {}
+    for index, tracked in enumerate(aircraft):
+        airborne, max_altitude, distance = track_summary(
+            tracked.column("time"),
+            tracked.column("lat"),
+            tracked.column("long"),
+            tracked.column("alt"),
+            options["AIRBORNE_SPEED"],
+        )
+        # Takeoff and landing events are more exact than speed, where there are any.
+        if tracked.sorties:
+            airborne = tracked.event_airborne()
+        properties = tracked.properties
+        group = (
+            properties.get("Group") or properties.get("Pilot") or properties.get("Name")
+        ) or tracked.id
+        groups.setdefault(group, []).append(
+            {
+                "id": tracked.id,
+                "track": index,
+                "pilot": properties.get("Pilot", ""),
+                "airframe": properties.get("Name", ""),
+                "coalition": properties.get("Coalition", ""),
+                "airborne": round(airborne, 1),
+                "max_altitude": round(max_altitude, 1),
+                "distance": round(distance),
+                "kills": tracked.kills,
+                "lost": tracked.lost,
+            }
+        )
+
+    summaries = []
+    for group, members in groups.items():
+        summaries.append(
+            FlightDebrief(
+                group=group[:255],
+                callsign=(group.split("|")[0].strip() or group)[:100],
+                airframe=members[0]["airframe"][:100],
+                coalition=members[0]["coalition"][:20],
+                airborne=max(member["airborne"] for member in members),
+                max_altitude=max(member["max_altitude"] for member in members),
+                distance=max(member["distance"] for member in members),
+                kills=sum(member["kills"] for member in members),
+                losses=sum(member["lost"] for member in members),
+                aircraft=members,
+            )
+        )
+    return summaries
+
+
+def link_flights(mission_id, summaries):
+    """Points each summary at the planned flight with a matching callsign."""
+    if mission_id is None:
+        return
+    flights = {}
+    for flight_id, callsign in Flight.objects.filter(
+        package__mission=mission_id
+    ).values_list("id", "callsign"):
+        flights.setdefault(callsign_key(callsign), flight_id)
+    for summary in summaries:
+        pilots = [member["pilot"] for member in summary.aircraft]
+        for key in group_keys(summary.group, pilots):
+            if key in flights:
+                summary.flight_id = flights[key]
+                break
+
+
+# ---------------- Track archive -------------------------
+
+
+def track_archive(aircraft):
+    """
+    Returns the tracks of ``aircraft`` as a compressed NumPy archive of columns.
+
+    Track ``i`` is rows ``offsets[i]:offsets[i + 1]`` of the time, lat, long and
+    alt columns, so one track is read without building the others.
+    """
+    offsets = np.zeros(len(aircraft) + 1, dtype=np.int64)
+    np.cumsum([len(tracked.time) for tracked in aircraft], out=offsets[1:])
+    columns = {
+        "ids": np.array([tracked.id for tracked in aircraft], dtype=str),
+        "offsets": offsets,
+    }
+    for name, dtype in TRACK_COLUMNS.items():
+        parts = [tracked.column(name) for tracked in aircraft]
+        columns[name] = (
+            np.concatenate(parts).astype(dtype) if parts else np.empty(0, dtype)
+        )
+    output = io.BytesIO()
+    np.savez_compressed(output, **columns)
+    return output.getvalue()
+
+
+def read_track(file, index):
+    """Returns the columns of track ``index`` of a track archive."""
+    with np.load(file) as archive:
+        start, end = archive["offsets"][index : index + 2]
+        return {name: archive[name][start:end] for name in TRACK_COLUMNS}
+
+
+# ---------------- Queue -------------------------
+
+
+def queue(mission_file):
+    """Queues a debrief of ``mission_file``, unless its recording was already read."""
+    source = mission_file.mission_file.name
+    requeued = (
+        Debrief.objects.filter(mission_file=mission_file)
+        .exclude(source=source)
+        .update(
+            source=source,
+            status=Debrief.PENDING,
+            attempts=0,
+            claimed_at=None,
+            last_error="",
+        )
+    )
+    if not requeued:
+        Debrief.objects.bulk_create(
+            [Debrief(mission_file=mission_file, source=source)],
+            ignore_conflicts=True,
+        )
+
+
+@receiver(post_save, sender=MissionFile)
+def mission_file_saved(sender, instance, **kwargs):
+    if instance.file_type == "TAC" and instance.mission_file:
+        transaction.on_commit(lambda: queue(instance))
+
+
+@receiver(post_delete, sender=Debrief)
+def debrief_deleted(sender, instance, **kwargs):
+    if instance.tracks:
+        storage, name = instance.tracks.storage, instance.tracks.name
+        transaction.on_commit(lambda: storage.delete(name))
+
+
+# ---------------- Worker -------------------------
+
+
+class DebriefWorker(QueueWorker):
+    """Reads queued Tacview recordings, retrying failed reads a few times."""
+
+    model = Debrief
+    label = "Debrief of {entry.source}"
+    permanent_errors = (FileNotFoundError, TacviewError)
+    batch_size = 1
+    claim_timeout = timedelta(minutes=15)
+
+    def __init__(self, storage=default_storage, **kwargs):
+        super().__init__(**kwargs)
+        self.storage = storage
+
+    def handle(self, entry):
+        with self.storage.open(entry.source, "rb") as file:
+            recording = read_recording(file)
+        self.save(entry, recording)
+
+    def save(self, entry, recording):
+        aircraft = recording.aircraft()
+        summaries = flight_summaries(recording, aircraft)
+        mission_id = (
+            MissionFile.objects.filter(id=entry.mission_file_id)
+            .values_list("mission_id", flat=True)
+            .first()
+        )
+        link_flights(mission_id, summaries)
+        for summary in summaries:
+            summary.debrief = entry
+
+        previous = entry.tracks.name if entry.tracks else None
+        name = self.storage.save(
+            f"debriefs/{entry.id}.npz", ContentFile(track_archive(aircraft))
+        )
+        with transaction.atomic():
+            FlightDebrief.objects.filter(debrief=entry).delete()
+            FlightDebrief.objects.bulk_create(summaries)
+            entry.status = Debrief.DONE
+            entry.title = recording.properties.get("Title", "")[:255]
+            entry.duration = recording.duration
+            entry.object_count = len(aircraft)
+            entry.sample_count = recording.sample_count
+            entry.tracks = name
+            entry.last_error = ""
+            entry.save()
+        if previous and previous != name:
+            self.storage.delete(previous)
@@ -0,0 +1,278 @@
+import collections
+import math
+
+import numpy as np
+from django.db.models import Prefetch
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from ..models import Flight, Mission, Threat, ThreatReference, Waypoint
+from .coordinates import EARTH_RADIUS
+from .flight_plan import METRES_PER_NM, clock
+from .versions import versioned_cache
+
+NM_PER_DEGREE = math.radians(EARTH_RADIUS) / METRES_PER_NM
+# Grid cells in nm. Smaller cells test fewer rings per leg but index each ring in
+# more cells.
+CELL_SIZE = 10.0
+
+
+class Plane:
+    """
+    A flat projection in nm around ``(lat, long)``, east ``x`` and north ``y``.
+    Distances stretch east to west away from the origin's latitude, so it is only
+    used to find candidates in the grid and to measure next to a threat's own
+    origin.
+    """
+
+    def __init__(self, lat, long):
+        self.lat = lat
+        self.long = long
+        self.scale = math.cos(math.radians(lat))
+
+    def project(self, lat, long):
+        """Projects degrees, scalars or NumPy arrays, into ``(x, y)`` nm."""
+        x = (np.asarray(long) - self.long) * self.scale * NM_PER_DEGREE
+        y = (np.asarray(lat) - self.lat) * NM_PER_DEGREE
+        return x, y
+
+
+class PlacedThreat:
+    """A threat with a position and the engagement envelope of its reference."""
+
+    def __init__(self, threat):
+        reference = threat.threat_name
+        self.id = threat.id
+        self.name = threat.name
+        self.reference = str(reference)
+        self.lat = threat.lat_deg
+        self.long = threat.long_deg
+        self.range_min = float(reference.range_min)
+        self.range_max = float(reference.range_max)
+        self.alt_min = float(reference.alt_min)
+        self.alt_max = float(reference.alt_max)
+
+    @staticmethod
+    def is_placed(threat):
+        return (
+            threat.lat_deg is not None
+            and threat.long_deg is not None
+            and threat.threat_name is not None
+            and threat.threat_name.range_max > 0
+        )
+
+
+class ThreatGrid:
+    """
+    A uniform grid over the threat rings of a mission.
+
+    Each ring is indexed in every cell its bounding box covers, so a leg is only
+    tested against the rings in the cells it passes through and the cost of a leg
+    grows with its length and the threats near it, not with every threat of the
+    mission. The cells around each point sampled along the leg are also read,
+    which covers the points between samples and the east to west stretch of the
+    shared plane.
+    """
+
+    def __init__(self, threats, plane, cell_size=CELL_SIZE):
+        self.plane = plane
+        self.cell_size = cell_size
+        self.cells = collections.defaultdict(list)
+        for index, threat in enumerate(threats):
+            x, y = plane.project(threat.lat, threat.long)
+            radius = threat.range_max
+            for i in range(self.cell(x - radius), self.cell(x + radius) + 1):
+                for j in range(self.cell(y - radius), self.cell(y + radius) + 1):
+                    self.cells[i, j].append(index)
+
+    def cell(self, value):
+        return math.floor(value / self.cell_size)
+
+    def near(self, start, end):
+        """Returns the indexes of the threats whose rings may reach the leg."""
+        (ax, bx), (ay, by) = self.plane.project([start[0], end[0]], [start[1], end[1]])
+        steps = max(1, math.ceil(math.hypot(bx - ax, by - ay) / self.cell_size * 2))
+        cells = set()
+        for t in np.linspace(0, 1, steps + 1):
+            i, j = self.cell(ax + (bx - ax) * t), self.cell(ay + (by - ay) * t)
+            cells.update((i + di, j + dj) for di in (-1, 0, 1) for dj in (-1, 0, 1))
+        found = set()
+        for cell in cells:
+            found.update(self.cells.get(cell, ()))
+        return sorted(found)
+
+
+def ring_crossings(ax, ay, bx, by, radius):
+    """
+    Returns the fractions ``(t0, t1)`` of the legs from ``a`` to ``b`` inside a
+    circle of ``radius`` around the origin, for arrays of legs and radii.
+    Legs that miss their circle get an empty interval, ``t0 == t1``.
+    """
+    dx, dy = bx - ax, by - ay
+    a = dx * dx + dy * dy
+    b = 2 * (ax * dx + ay * dy)
+    c = ax * ax + ay * ay - radius * radius
+    root = np.sqrt(np.maximum(b * b - 4 * a * c, 0))
+    t0 = np.clip((-b - root) / (2 * a), 0, 1)
+    t1 = np.clip((-b + root) / (2 * a), 0, 1)
+    missed = (b * b - 4 * a * c <= 0) | (radius <= 0)
+    t1 = np.where(missed, t0, np.maximum(t0, t1))
+    return t0, t1
+
+
+class Exposure:
+    """
+    The part of a leg inside a threat's ring. ``enter`` and ``exit`` are nm from
+    the leg's start; ``above`` is True when the whole leg is planned above the
+    threat's maximum engagement altitude.
+    """
+
+    def __init__(self, threat, leg, enter, exit, distance, time, above):
+        self.threat = threat.name
+        self.threat_id = threat.id
+        self.reference = threat.reference
+        self.leg = leg.number
+        self.start = leg.start
+        self.end = leg.end
+        self.enter = enter
+        self.exit = exit
+        self.distance = distance
+        self.time = time
+        self.above = above
+
+    @property
+    def time_display(self):
+        return clock(self.time)
+
+
+class RouteLeg:
+    def __init__(self, start, end):
+        self.number = end.number
+        self.start = start.name
+        self.end = end.name
+        self.points = (start.lat_deg, start.long_deg), (end.lat_deg, end.long_deg)
+        altitudes = (start.elevation_ft, end.elevation_ft)
+        self.floor = None if None in altitudes else min(altitudes)
+
+
+def route_legs(waypoints):
+    waypoints = [
+        waypoint
+        for waypoint in waypoints
+        if waypoint.lat_deg is not None and waypoint.long_deg is not None
+    ]
+    return [RouteLeg(start, end) for start, end in zip(waypoints, waypoints[1:])]
+
+
+def leg_exposure(leg, threats, speed):
+    """Returns the Exposure of ``leg`` to each of ``threats`` it enters."""
+    (lat1, long1), (lat2, long2) = leg.points
+    lat = np.array([threat.lat for threat in threats])
+    long = np.array([threat.long for threat in threats])
+    # Measured in a plane around each threat, where its ring is a true circle.
+    scale = np.cos(np.radians(lat)) * NM_PER_DEGREE
+    ax, ay = (long1 - long) * scale, (lat1 - lat) * NM_PER_DEGREE
+    bx, by = (long2 - long) * scale, (lat2 - lat) * NM_PER_DEGREE
+    length = np.hypot(bx - ax, by - ay)
+    if not length.any():
+        return []
+
+    outer = ring_crossings(ax, ay, bx, by, np.array([t.range_max for t in threats]))
+    inner = ring_crossings(ax, ay, bx, by, np.array([t.range_min for t in threats]))
+    # The rings are concentric, so the inner one is always inside the outer one.
+    inside = ((outer[1] - outer[0]) - (inner[1] - inner[0])) * length
+
+    exposures = []
+    for index in np.flatnonzero(inside > 0):
+        threat = threats[index]
+        distance = round(float(inside[index]), 1)
+        above = (
+            leg.floor is not None and threat.alt_max > 0 and leg.floor > threat.alt_max
+        )
+        exposures.append(
+            Exposure(
+                threat,
+                leg,
+                enter=round(float(outer[0][index] * length[index]), 1),
+                exit=round(float(outer[1][index] * length[index]), 1),
+                distance=distance,
+                time=round(distance / speed * 3600) if speed else None,
+                above=above,
+            )
+        )
+    return exposures
+
+
+def flight_exposure(flight, threats, grid):
+    """The exposure of ``flight``'s route to the ``threats`` indexed in ``grid``."""
+    exposures = []
+    for leg in route_legs(flight.waypoint_set.all()):
+        nearby = [threats[index] for index in grid.near(*leg.points)]
+        if nearby:
+            exposures += leg_exposure(leg, nearby, flight.planned_speed)
+    exposed = [exposure for exposure in exposures if not exposure.above]
+    times = [exposure.time for exposure in exposed]
+    return {
+        "exposures": exposures,
+        "distance": round(sum(exposure.distance for exposure in exposed), 1),
+        "time": None if None in times else sum(times),
+        "time_display": "" if None in times else clock(sum(times)),
+    }
+
+
+def analyze_mission(mission_id):
+    """
+    Analyzes every flight of a mission against the mission's threats in one batch.
+
+    Returns ``{"flights": {flight id: exposure}, "unplaced": [threat names]}``,
+    where the unplaced threats have no position or no engagement range.
+    """
+    threats = list(
+        Threat.objects.filter(mission=mission_id)
+        .select_related("threat_name")
+        .order_by("name", "id")
+    )
+    placed = [
+        PlacedThreat(threat) for threat in threats if PlacedThreat.is_placed(threat)
+    ]
+    result = {
+        "flights": {},
+        "unplaced": [
+            threat.name for threat in threats if not PlacedThreat.is_placed(threat)
+        ],
+    }
+    if not placed:
+        return result
+
+    plane = Plane(
+        sum(threat.lat for threat in placed) / len(placed),
+        sum(threat.long for threat in placed) / len(placed),
+    )
+    grid = ThreatGrid(placed, plane)
+    flights = Flight.objects.filter(package__mission=mission_id).prefetch_related(
+        Prefetch("waypoint_set", queryset=Waypoint.objects.order_by("number", "id"))
+    )
+    for flight in flights:
+        result["flights"][flight.id] = flight_exposure(flight, placed, grid)
+    return result
+
+
+def mission_exposure(mission_id):
+    """
+    The threat exposure of a mission's flights, cached until anything in the
+    mission changes.
+    """
+    return versioned_cache.get_or_set(
+        "mission", mission_id, lambda: analyze_mission(mission_id), "exposure"
+    )
+
+
+@receiver(post_save, sender=ThreatReference)
+def threat_reference_changed(sender, instance, **kwargs):
+    # The envelopes come from the reference table, outside the mission tree.
+    for mission_id in (
+        Mission.objects.filter(threat__threat_name=instance)
+        .values_list("id", flat=True)
+        .distinct()
+    ):
+        versioned_cache.bump("mission", mission_id)
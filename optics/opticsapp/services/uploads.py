@@ -0,0 +1,226 @@
+import hashlib
+import posixpath
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from storages.backends.s3 import S3Storage
+
+from ..models import MissionFile
+
+MB = 1024 * 1024
+TICKET_SALT = "optics.mission-file-upload"
+
+
+class UploadError(Exception):
+    pass
+
+
+def upload_options():
+    options = {
+        "MAX_SIZE": 500 * MB,
+        "EXPIRES": 3600,
+        "MULTIPART_THRESHOLD": 100 * MB,
+        "PART_SIZE": 16 * MB,
+    }
+    options.update(getattr(settings, "DIRECT_UPLOADS", {}))
+    return options
+
+
+def quote_etag(etag):
+    return '"%s"' % (etag or "").strip('"')
+
+
+class S3Uploads:
+    """Presigned POST and multipart uploads straight into the S3 storage bucket."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    @property
+    def client(self):
+        # The storage's own connection, so the bucket credentials are reused.
+        return self.storage.connection.meta.client
+
+    def key(self, name):
+        return posixpath.join(self.storage.location, name)
+
+    def start(self, name, size, options):
+        bucket, key = self.storage.bucket_name, self.key(name)
+        if size <= options["MULTIPART_THRESHOLD"]:
+            post = self.client.generate_presigned_post(
+                bucket,
+                key,
+                Fields={"success_action_status": "201"},
+                Conditions=[
+                    {"success_action_status": "201"},
+                    ["content-length-range", size, size],
+                ],
+                ExpiresIn=options["EXPIRES"],
+            )
+            return {"method": "post", "url": post["url"], "fields": post["fields"]}
+
+        upload_id = self.client.create_multipart_upload(Bucket=bucket, Key=key)[
+            "UploadId"
+        ]
+        part_size = options["PART_SIZE"]
+        parts = [
+            {
+                "part_number": number,
+                "url": self.client.generate_presigned_url(
+                    "upload_part",
+                    Params={
+                        "Bucket": bucket,
+                        "Key": key,
+                        "UploadId": upload_id,
+                        "PartNumber": number,
+                    },
+                    ExpiresIn=options["EXPIRES"],
+                ),
+            }
+            for number in range(1, -(-size // part_size) + 1)
+        ]
+        return {
+            "method": "multipart",
+            "upload_id": upload_id,
+            "part_size": part_size,
+            "parts": parts,
+        }
+
+    def finish(self, ticket, etag, parts):
+        bucket, key = self.storage.bucket_name, self.key(ticket["name"])
+        if ticket.get("upload_id"):
+            completed = self.client.complete_multipart_upload(
+                Bucket=bucket,
+                Key=key,
+                UploadId=ticket["upload_id"],
+                MultipartUpload={
+                    "Parts": [
+                        {
+                            "ETag": quote_etag(part["etag"]),
+                            "PartNumber": part["part_number"],
+                        }
+                        for part in sorted(parts, key=lambda part: part["part_number"])
+                    ]
+                },
+            )
+            etag = completed["ETag"]
+        head = self.client.head_object(Bucket=bucket, Key=key)
+        return head["ContentLength"], head["ETag"], etag
+
+
+class LocalUploads:
+    """
+    Stand-in for S3 when the default storage is not a bucket, e.g. in development
+    and tests. The browser posts the file to receive_local_upload instead, which
+    answers with an S3 style MD5 ETag.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def start(self, name, size, options):
+        return {
+            "method": "post",
+            "url": reverse("mission_file_upload_local"),
+            "fields": {},
+        }
+
+    def finish(self, ticket, etag, parts):
+        digest = hashlib.md5()
+        with self.storage.open(ticket["name"], "rb") as stored:
+            for chunk in stored.chunks():
+                digest.update(chunk)
+        return self.storage.size(ticket["name"]), digest.hexdigest(), etag
+
+
+def uploads_for(storage=default_storage):
+    if isinstance(storage, S3Storage):
+        return S3Uploads(storage)
+    return LocalUploads(storage)
+
+
+def start_upload(mission, user, filename, size, storage=default_storage):
+    """
+    Returns the parameters for the browser to upload ``filename`` straight to the
+    storage, plus a signed ticket to hand back to ``finish_upload``.
+    """
+    options = upload_options()
+    if not 0 < size <= options["MAX_SIZE"]:
+        raise UploadError(f"Files must be 1 to {options['MAX_SIZE']} bytes long.")
+
+    name = storage.get_valid_name(posixpath.basename(filename))
+    name = f"uploads/{uuid.uuid4().hex}/{name}"
+    uploads = uploads_for(storage)
+    upload = uploads.start(name, size, options)
+    ticket = {
+        "mission": mission.id,
+        "user": user.id,
+        "name": name,
+        "size": size,
+        "upload_id": upload.get("upload_id"),
+    }
+    upload["ticket"] = signing.dumps(ticket, salt=TICKET_SALT)
+    if isinstance(uploads, LocalUploads):
+        # The stand-in is our own endpoint, it reads the name from the ticket.
+        upload["fields"]["ticket"] = upload["ticket"]
+    return upload
+
+
+def read_ticket(signed_ticket, user):
+    try:
+        ticket = signing.loads(
+            signed_ticket, salt=TICKET_SALT, max_age=upload_options()["EXPIRES"]
+        )
+    except signing.BadSignature:
+        raise UploadError("The upload ticket is invalid or has expired.")
+    if ticket["user"] != user.id:
+        raise UploadError("The upload ticket belongs to another user.")
+    return ticket
+
+
+def finish_upload(
+    signed_ticket, user, etag, name, file_type, parts=(), storage=default_storage
+):
+    """
+    Creates the MissionFile once the uploaded object matches the size the ticket
+    was issued for and the ETag the browser received. A mismatching object is
+    deleted.
+    """
+    ticket = read_ticket(signed_ticket, user)
+    try:
+        size, stored_etag, expected_etag = uploads_for(storage).finish(
+            ticket, etag, parts
+        )
+    except Exception as err:
+        raise UploadError(f"The upload could not be found: {err}")
+
+    if size != ticket["size"] or quote_etag(stored_etag) != quote_etag(expected_etag):
+        storage.delete(ticket["name"])
+        raise UploadError("The uploaded file does not match what was announced.")
+
+    return MissionFile.objects.create(
+        mission_id=ticket["mission"],
+        name=name or posixpath.basename(ticket["name"]),
+        mission_file=ticket["name"],
+        file_type=file_type,
+        uploaded_by=user,
+    )
+
+
+def receive_local_upload(signed_ticket, user, file, storage=default_storage):
+    """Stores a file posted to the local stand-in and returns its ETag."""
+    ticket = read_ticket(signed_ticket, user)
+    if isinstance(storage, S3Storage):
+        raise UploadError("Uploads go straight to S3.")
+    if file.size != ticket["size"]:
+        raise UploadError("The uploaded file does not match what was announced.")
+
+    digest = hashlib.md5()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    storage.save(ticket["name"], file)
+    return quote_etag(digest.hexdigest())
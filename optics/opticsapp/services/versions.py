@@ -0,0 +1,261 @@
+import time
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from ..models import (
+    Aircraft,
+    Campaign,
+    Comment,
+    Flight,
+    FlightImagery,
+    Mission,
+    MissionFile,
+    MissionImagery,
+    Package,
+    PackageImagery,
+    Status,
+    Support,
+    Target,
+    Terrain,
+    Threat,
+    UserProfile,
+    Waypoint,
+)
+
+# Every model of the campaign tree with the lookups to its ancestors, nearest first.
+# Saving or deleting one of them bumps its own version and all of its ancestors'.
+MISSION_PATH = ["mission", "mission__campaign"]
+PACKAGE_PATH = ["package", "package__mission", "package__mission__campaign"]
+FLIGHT_PATH = [
+    "flight",
+    "flight__package",
+    "flight__package__mission",
+    "flight__package__mission__campaign",
+]
+
+TREE = {
+    Campaign: [],
+    Mission: ["campaign"],
+    Package: MISSION_PATH,
+    Target: MISSION_PATH,
+    Threat: MISSION_PATH,
+    Support: MISSION_PATH,
+    MissionImagery: MISSION_PATH,
+    MissionFile: MISSION_PATH,
+    Flight: PACKAGE_PATH,
+    PackageImagery: PACKAGE_PATH,
+    Aircraft: FLIGHT_PATH,
+    Waypoint: FLIGHT_PATH,
+    FlightImagery: FLIGHT_PATH,
+}
+
+
+def node_name(model):
+    return model._meta.model_name
+
+
+def fresh_version():
+    # Never reuses a number after the counter itself has been evicted.
+    return time.time_ns()
+
+
+class VersionedCache:
+    """
+    Cache entries keyed by version counters of the campaign tree.
+
+    A version counter per node is bumped whenever the node or anything below it
+    changes, so an entry built from ``(name, pk, version)`` is never invalidated
+    explicitly; it just stops being read and ages out of the backend. The counters
+    live in the same backend so every process sees the same versions, which makes
+    the in-memory backend only suitable for a single process.
+    """
+
+    def __init__(self, alias="default", timeout=None):
+        self.alias = alias
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.bumps = 0
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, "VERSIONED_CACHE", {})
+        return cls(
+            alias=options.get("ALIAS", "default"), timeout=options.get("TIMEOUT")
+        )
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @staticmethod
+    def version_key(name, pk):
+        return f"version:{name}:{pk}"
+
+    def versions(self, name, pks):
+        """Returns ``{pk: version}``, starting a counter for any pk that has none."""
+        keys = {self.version_key(name, pk): pk for pk in pks}
+        found = self.cache.get_many(keys)
+        missing = {key: fresh_version() for key in keys if key not in found}
+        if missing:
+            # Counters never expire, the entries keyed on them do.
+            self.cache.set_many(missing, None)
+            found.update(missing)
+        return {pk: found[key] for key, pk in keys.items()}
+
+    def version(self, name, pk):
+        return self.versions(name, [pk])[pk]
+
+    def key(self, name, pk, *parts):
+        return ":".join(
+            str(part) for part in (name, pk, self.version(name, pk), *parts)
+        )
+
+    def bump(self, name, pk):
+        """
+        Moves the node to a new version, and again once the surrounding transaction
+        commits.
+
+        The first bump keeps reads in the same transaction fresh. Until the commit,
+        other connections still read the old rows and may cache them under the new
+        version, so the second bump retires whatever they stored.
+        """
+        if pk is None:
+            return
+        self.increment(name, pk)
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(lambda: self.increment(name, pk))
+
+    def increment(self, name, pk):
+        self.bumps += 1
+        try:
+            self.cache.incr(self.version_key(name, pk))
+        except ValueError:
+            self.cache.set(self.version_key(name, pk), fresh_version(), None)
+
+    def touch(self, instance):
+        """Bumps the versions of ``instance`` and of every ancestor in the tree."""
+        self.bump(node_name(type(instance)), instance.pk)
+        for name, pk in lineage(instance):
+            self.bump(name, pk)
+
+    def get_or_set(self, name, pk, loader, *parts):
+        """
+        Returns the cached value for the current version of the node, calling
+        ``loader`` and caching its result on a miss.
+        """
+        key = self.key(name, pk, *parts)
+        value = self.cache.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = loader()
+        self.cache.set(key, value, self.timeout)
+        return value
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "bumps": self.bumps,
+        }
+
+
+versioned_cache = VersionedCache.from_settings()
+
+
+def lineage(instance):
+    """
+    Returns ``[(name, pk)]`` for the ancestors of ``instance``, nearest first.
+
+    The parent comes from the instance itself and the rest from one query on the
+    parent, so it also works while the instance is being deleted.
+    """
+    paths = TREE.get(type(instance), [])
+    if not paths:
+        return []
+
+    parent, *rest = paths
+    parent_model = instance._meta.get_field(parent).related_model
+    parent_id = getattr(instance, f"{parent}_id")
+    if parent_id is None:
+        return []
+
+    chain = [(node_name(parent_model), parent_id)]
+    if rest:
+        lookups = [path.split("__", 1)[1] for path in rest]
+        row = parent_model.objects.filter(id=parent_id).values_list(*lookups).first()
+        if row:
+            chain += [
+                (lookup.rsplit("__", 1)[-1], pk) for lookup, pk in zip(lookups, row)
+            ]
+    return chain
+
+
+def touch_node(model, pk):
+    instance = model.objects.filter(id=pk).first()
+    if instance is not None:
+        versioned_cache.touch(instance)
+
+
+def tree_changed(sender, instance, **kwargs):
+    versioned_cache.touch(instance)
+
+
+for tree_model in TREE:
+    post_save.connect(tree_changed, sender=tree_model)
+    post_delete.connect(tree_changed, sender=tree_model)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    model = ContentType.objects.get_for_id(instance.content_type_id).model_class()
+    if model in TREE:
+        touch_node(model, instance.object_id)
+
+
+@receiver(m2m_changed, sender=Flight.targets.through)
+def flight_targets_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        versioned_cache.touch(instance)
+        return
+
+    # target.flight_set changed, so each affected flight changed.
+    if action == "pre_clear":
+        flights = instance.flight_set.all()
+    else:
+        flights = Flight.objects.filter(id__in=pk_set)
+    for flight in flights:
+        versioned_cache.touch(flight)
+
+
+# The campaign cards also show the campaign's status, map and creator's avatar.
+
+
+@receiver(post_save, sender=Status)
+@receiver(post_save, sender=Terrain)
+def campaign_reference_changed(sender, instance, **kwargs):
+    field = "status" if sender is Status else "dcs_map"
+    for campaign_id in Campaign.objects.filter(**{field: instance}).values_list(
+        "id", flat=True
+    ):
+        versioned_cache.bump("campaign", campaign_id)
+
+
+@receiver(post_save, sender=UserProfile)
+def campaign_creator_changed(sender, instance, **kwargs):
+    for campaign_id in Campaign.objects.filter(created_by=instance.user_id).values_list(
+        "id", flat=True
+    ):
+        versioned_cache.bump("campaign", campaign_id)
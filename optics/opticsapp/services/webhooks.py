@@ -0,0 +1,93 @@
+import threading
+import time
+
+import requests
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from requests.adapters import HTTPAdapter
+
+from ..models import WebHook
+
+
+class WebHookRegistry:
+    """
+    In-process cache of the WebHook table plus one shared keep-alive Session.
+
+    The cache is dropped by the post_save/post_delete receivers below. Those only
+    fire in the process that made the change, so entries also expire after ``ttl``
+    seconds to pick up admin edits in other processes such as the dispatcher worker.
+    """
+
+    def __init__(self, ttl=60, pool_connections=10, pool_maxsize=10):
+        self.ttl = ttl
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._urls = None
+        self._loaded_at = 0
+        self._session = None
+        self._lock = threading.Lock()
+
+    def get(self, service_name):
+        """Returns the url stored for ``service_name``, like WebHook.objects.get()."""
+        with self._lock:
+            if self._urls is None or time.monotonic() - self._loaded_at > self.ttl:
+                self.cache_misses += 1
+                self._urls = dict(WebHook.objects.values_list("service_name", "url"))
+                self._loaded_at = time.monotonic()
+            else:
+                self.cache_hits += 1
+            urls = self._urls
+
+        try:
+            return urls[service_name]
+        except KeyError:
+            raise WebHook.DoesNotExist(f"No WebHook configured for '{service_name}'.")
+
+    def invalidate(self):
+        with self._lock:
+            self._urls = None
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                # One connection pool per host, kept alive between calls.
+                adapter = HTTPAdapter(
+                    pool_connections=self.pool_connections,
+                    pool_maxsize=self.pool_maxsize,
+                )
+                self._session = requests.Session()
+                self._session.mount("https://", adapter)
+                self._session.mount("http://", adapter)
+            return self._session
+
+    def stats(self):
+        requests_made = connections = 0
+        if self._session is not None:
+            for adapter in set(self._session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools[key]
+                    if pool is None:
+                        continue
+                    requests_made += pool.num_requests
+                    connections += pool.num_connections
+
+        return {
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "requests": requests_made,
+            "connections_opened": connections,
+            "connections_reused": requests_made - connections,
+        }
+
+
+webhook_registry = WebHookRegistry()
+
+
+@receiver(post_save, sender=WebHook)
+@receiver(post_delete, sender=WebHook)
+def invalidate_webhook_registry(sender, **kwargs):
+    webhook_registry.invalidate()
@@ -0,0 +1,29 @@
+from django import template
+
+from ..services.renditions import renditions_of, srcset
+
+register = template.Library()
+
+
+@register.inclusion_tag("v2/includes/picture.html")
+def picture(image, sizes="100vw", alt="", css_class=""):
+    """
+    Renders ``image`` as a <picture> offering its WebP renditions and a JPEG or PNG
+    fallback, each as a ``srcset``. Falls back to the uploaded file until the
+    renditions are built.
+
+    Usage: {% picture target.target_image sizes="(min-width: 992px) 50vw, 100vw" %}
+    """
+    context = {"src": image.url, "sizes": sizes, "alt": alt, "css_class": css_class}
+    variants = renditions_of(image.name)
+    if variants:
+        largest = list(variants.values())[-1]
+        fallback = "jpeg" if "jpeg" in largest else "png"
+        context.update(
+            src=image.storage.url(largest[fallback]["name"]),
+            width=largest["width"],
+            height=largest["height"],
+            webp_srcset=srcset(variants, "webp", image.storage),
+            srcset=srcset(variants, fallback, image.storage),
+        )
+    return context
@@ -1,7 +1,6 @@
 from django import template
-import urllib
-import io
-import base64
+
+from ..services.pdf_resources import encoded_resource
 
 register = template.Library()
 
@@ -11,8 +10,4 @@ def get64(url):
     """
     Method returning base64 image data instead of URL
     """
-    if url.startswith("http"):
-        image = io.BytesIO(urllib.urlopen(url).read())
-        return 'data:image/jpg;base64,' + base64.b64encode(image.read())
-
-    return url
+    return encoded_resource(url) or url
@@ -0,0 +1,86 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..services.avatars import AvatarCatalog
+
+LOCMEM = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+
+
+class FakeS3Client:
+    """Answers list_objects_v2 pages for a fixed set of keys."""
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.listings = 0
+
+    def get_paginator(self, operation):
+        return self
+
+    def paginate(self, Bucket, Prefix):
+        self.listings += 1
+        keys = [key for key in self.keys if key.startswith(Prefix)]
+        return [
+            {"Contents": [{"Key": key} for key in keys[:2]]},
+            {"Contents": [{"Key": key} for key in keys[2:]]},
+        ]
+
+
+@override_settings(CACHES={"default": LOCMEM}, AWS_STORAGE_BUCKET_NAME="optics")
+class AvatarCatalogTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.s3 = FakeS3Client(
+            [
+                "static/assets/img/avatars/pilot2.png",
+                "static/assets/img/avatars/pilot1.png",
+                "static/assets/img/avatars/readme.txt",
+                "static/assets/img/avatars/rio1.jpg",
+                "static/assets/img/other.png",
+            ]
+        )
+        self.catalog = AvatarCatalog(ttl=60)
+        self.catalog._client = self.s3
+
+    def test_manifest_is_listed_once(self):
+        expected = [
+            "assets/img/avatars/pilot1.png",
+            "assets/img/avatars/pilot2.png",
+            "assets/img/avatars/rio1.jpg",
+        ]
+        self.assertEqual(self.catalog.files(), expected)
+        self.assertEqual(self.catalog.files(), expected)
+        self.assertEqual(self.s3.listings, 1)
+
+    def test_stale_manifest_is_served_while_refreshing(self):
+        self.catalog.files()
+        manifest = cache.get(self.catalog.manifest_key)
+        manifest["built"] = time.time() - 120
+        cache.set(self.catalog.manifest_key, manifest, None)
+        self.s3.keys.append("static/assets/img/avatars/pilot3.png")
+
+        # Stale reads while another process refreshes start no second listing.
+        cache.add(self.catalog.refresh_key, True)
+        self.assertNotIn("assets/img/avatars/pilot3.png", self.catalog.files())
+        self.assertEqual(self.s3.listings, 1)
+        cache.delete(self.catalog.refresh_key)
+
+        self.catalog.refresh_in_background().join()
+        self.assertIn("assets/img/avatars/pilot3.png", self.catalog.files())
+        self.assertEqual(self.s3.listings, 2)
+
+    def test_select_avatar_lists_the_catalog(self):
+        User.objects.create_user(username="testuser", password="12345")
+        client = Client()
+        client.login(username="testuser", password="12345")
+        cache.set(
+            AvatarCatalog.manifest_key,
+            {"built": time.time(), "files": ["assets/img/avatars/pilot1.png"]},
+            None,
+        )
+
+        response = client.get(reverse("select_avatar"))
+        self.assertEqual(response.context["files"], ["assets/img/avatars/pilot1.png"])
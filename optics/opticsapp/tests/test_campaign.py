@@ -0,0 +1,72 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Campaign, Mission, Status
+from ..services.campaigns import campaign_cards
+from ..services.versions import versioned_cache
+
+
+class CampaignListTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username="testuser", password="12345")
+        self.client.login(username="testuser", password="12345")
+        self.status = Status.objects.create(name="Active")
+
+    def add_campaigns(self, count):
+        for i in range(count):
+            campaign = Campaign.objects.create(
+                name=f"Campaign {i}", status=self.status, created_by=self.user
+            )
+            Mission.objects.create(campaign=campaign, name=f"Mission {i}")
+            campaign.comments.create(comment=f"Comment {i}", user=self.user)
+
+    def count_page_queries(self):
+        url = reverse("campaigns_filter")
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, {"filter": "All"})
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_campaign_cards_are_one_query(self):
+        self.add_campaigns(3)
+
+        with self.assertNumQueries(1):
+            campaigns = campaign_cards(self.user, is_admin=False)
+
+        self.assertEqual([campaign.mission_count for campaign in campaigns], [1, 1, 1])
+        self.assertEqual([campaign.comment_count for campaign in campaigns], [1, 1, 1])
+        self.assertTrue(all(campaign.can_edit for campaign in campaigns))
+
+    def test_list_query_count_is_constant(self):
+        self.add_campaigns(1)
+        small_list_queries = self.count_page_queries()
+
+        self.add_campaigns(5)
+        cache.clear()
+        large_list_queries = self.count_page_queries()
+
+        self.assertEqual(small_list_queries, large_list_queries)
+
+    def test_card_is_cached_until_the_campaign_changes(self):
+        self.add_campaigns(1)
+        campaign = Campaign.objects.get()
+        version = versioned_cache.version("campaign", campaign.id)
+        self.client.get(reverse("campaigns_filter"), {"filter": "All"})
+
+        # Bypasses the signals, so the cached card keeps its old name.
+        Campaign.objects.filter(id=campaign.id).update(name="Renamed")
+        response = self.client.get(reverse("campaigns_filter"), {"filter": "All"})
+        self.assertContains(response, "Campaign 0")
+
+        Mission.objects.create(campaign=campaign, name="Second Mission")
+        self.assertNotEqual(version, versioned_cache.version("campaign", campaign.id))
+
+        response = self.client.get(reverse("campaigns_filter"), {"filter": "All"})
+        self.assertContains(response, "Renamed")
+        self.assertNotContains(response, "Campaign 0")
@@ -0,0 +1,62 @@
+from django.contrib.auth.models import User
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Airframe, Campaign, Flight, Mission, Package, Waypoint
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="testuser", password="12345")
+        self.client.login(username="testuser", password="12345")
+        airframe = Airframe.objects.create(name="F-14B", stations=2)
+        self.campaign = Campaign.objects.create(name="Test Campaign")
+        self.mission = Mission.objects.create(
+            campaign=self.campaign, name="Test Mission", created_by=self.user
+        )
+        self.package = Package.objects.create(mission=self.mission, name="Package 1")
+        self.flight = Flight.objects.create(
+            package=self.package, airframe=airframe, callsign="Enfield 1"
+        )
+
+    def etag(self, url, client=None):
+        client = client or self.client
+        # The first response sets the CSRF cookie the ETag depends on.
+        client.get(url)
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header("Last-Modified"))
+        return response["ETag"]
+
+    def test_unchanged_pages_return_not_modified(self):
+        for url in [
+            reverse("campaign_detail_v2", args=[self.campaign.id]),
+            reverse("mission_v2", args=[self.mission.id]),
+            reverse("mission_signup_v2", args=[self.mission.id]),
+            reverse("package_v2", args=[self.package.id]),
+            reverse("flight_v2", args=[self.flight.id]),
+        ]:
+            etag = self.etag(url)
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304, url)
+            # Answered before the view rendered anything.
+            self.assertEqual(response.templates, [])
+
+    def test_child_changes_change_the_etag(self):
+        url = reverse("flight_v2", args=[self.flight.id])
+        etag = self.etag(url)
+
+        Waypoint.objects.create(flight=self.flight, name="Steerpoint", number=1)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_differs_per_user(self):
+        url = reverse("mission_v2", args=[self.mission.id])
+        User.objects.create_user(username="wingman", password="12345")
+        other = Client()
+        other.login(username="wingman", password="12345")
+
+        self.assertNotEqual(self.etag(url), self.etag(url, other))
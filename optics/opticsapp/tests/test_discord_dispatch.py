@@ -0,0 +1,165 @@
+import json
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from ..models import Campaign, DiscordOutbox, Mission, WebHook
+from ..services.discord import DiscordDispatcher
+from ..services.webhooks import webhook_registry
+
+
+class FakeDiscordHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so the dispatcher's pooled connections can be reused.
+    protocol_version = "HTTP/1.1"
+
+    def handle_request(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        path = self.path.split("?")[0]
+        self.server.received.append((self.command, path, body))
+
+        if self.server.responses:
+            status, payload = self.server.responses.pop(0)
+        else:
+            status = 200
+            payload = {"id": "222" if path.startswith("/events") else "111"}
+
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_POST = do_PATCH = do_DELETE = handle_request
+
+    def log_message(self, *args):
+        pass
+
+
+class DiscordDispatchTest(TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeDiscordHandler)
+        self.server.received = []
+        self.server.responses = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{self.server.server_port}"
+
+        WebHook.objects.create(service_name="Discord", url=f"{base_url}/webhook")
+        WebHook.objects.create(service_name="Discord Event", url=f"{base_url}/events")
+        WebHook.objects.create(service_name="bot token", url="Bot test-token")
+        WebHook.objects.create(service_name="channel id", url="999")
+
+        campaign = Campaign.objects.create(name="Test Campaign")
+        self.mission = Mission.objects.create(campaign=campaign, name="Test Mission")
+        self.request = RequestFactory().get("/")
+        self.dispatcher = DiscordDispatcher(base_delay=1)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_create_is_queued_and_ids_written_back(self):
+        self.mission.create_discord_event("http://image", self.request)
+        self.assertEqual(self.server.received, [])
+
+        self.dispatcher.run_pending()
+
+        self.mission.refresh_from_db()
+        self.assertEqual(self.mission.discord_msg_id, "111")
+        self.assertEqual(self.mission.discord_api_id, "222")
+        self.assertEqual(
+            [(method, path) for method, path, body in self.server.received],
+            [("POST", "/webhook"), ("POST", "/events")],
+        )
+        self.assertEqual(self.server.received[1][2]["channel_id"], "999")
+
+    def test_repeated_edits_coalesce_into_one_patch(self):
+        Mission.objects.filter(id=self.mission.id).update(
+            discord_msg_id="111", discord_api_id="222"
+        )
+        self.mission.refresh_from_db()
+
+        for name in ["First", "Second", "Third"]:
+            self.mission.name = name
+            self.mission.create_discord_event("http://image", self.request)
+
+        self.assertEqual(DiscordOutbox.objects.count(), 1)
+        self.dispatcher.run_pending()
+
+        self.assertEqual(
+            [(method, path) for method, path, body in self.server.received],
+            [("PATCH", "/webhook/messages/111"), ("PATCH", "/events/222")],
+        )
+        self.assertEqual(self.server.received[1][2]["name"], "Third")
+
+    def test_rate_limit_honours_retry_after(self):
+        self.server.responses = [(429, {"retry_after": 30, "global": False})]
+        self.mission.create_discord_event("http://image", self.request)
+
+        self.dispatcher.run_pending()
+
+        entry = DiscordOutbox.objects.get()
+        self.assertEqual(entry.status, DiscordOutbox.PENDING)
+        self.assertGreater(
+            entry.next_attempt_at, timezone.now() + timedelta(seconds=25)
+        )
+
+        DiscordOutbox.objects.update(next_attempt_at=timezone.now())
+        self.dispatcher.run_pending()
+
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, DiscordOutbox.SENT)
+        self.mission.refresh_from_db()
+        self.assertEqual(self.mission.discord_msg_id, "111")
+
+    def test_malformed_responses_are_retried(self):
+        self.server.responses = [(200, {})]
+        self.mission.create_discord_event("http://image", self.request)
+
+        self.dispatcher.run(once=True)
+
+        entry = DiscordOutbox.objects.get()
+        self.assertEqual((entry.status, entry.attempts), (DiscordOutbox.PENDING, 1))
+        self.assertEqual(entry.last_error, "'id'")
+
+    def test_delete_after_create_is_delivered(self):
+        Mission.objects.filter(id=self.mission.id).update(
+            discord_msg_id="111", discord_api_id="222"
+        )
+        self.mission.refresh_from_db()
+
+        self.mission.delete_discord_event()
+        self.mission.delete()
+        self.dispatcher.run_pending()
+
+        self.assertEqual(
+            [(method, path) for method, path, body in self.server.received],
+            [("DELETE", "/webhook/messages/111"), ("DELETE", "/events/222")],
+        )
+        self.assertEqual(DiscordOutbox.objects.get().status, DiscordOutbox.SENT)
+
+    def test_registry_caches_webhooks_and_reuses_connections(self):
+        webhook_registry.get("Discord")
+        hits = webhook_registry.cache_hits
+
+        with self.assertNumQueries(0):
+            webhook_registry.get("Discord Event")
+        self.assertEqual(webhook_registry.cache_hits, hits + 1)
+
+        WebHook.objects.filter(service_name="channel id").get().delete()
+        with self.assertRaises(WebHook.DoesNotExist):
+            webhook_registry.get("channel id")
+
+        WebHook.objects.create(service_name="channel id", url="999")
+        Mission.objects.filter(id=self.mission.id).update(
+            discord_msg_id="111", discord_api_id="222"
+        )
+        self.mission.create_discord_event("http://image", self.request)
+        self.dispatcher.run_pending()
+
+        stats = webhook_registry.stats()
+        self.assertGreaterEqual(stats["connections_reused"], 1)
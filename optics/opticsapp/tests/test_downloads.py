@@ -0,0 +1,147 @@
+import gzip
+import tempfile
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from storages.backends.s3 import S3Storage
+
+from ..models import Campaign, Mission, MissionFile
+from ..services.downloads import UnsatisfiableRange, parse_range, serve_file
+
+CONTENT = bytes(range(256)) * 40
+TACVIEW = b"<Tacview>" + b"<Event><Time>1.0</Time></Event>" * 200 + b"</Tacview>"
+
+
+class ParseRangeTest(SimpleTestCase):
+    def test_ranges(self):
+        self.assertEqual(parse_range("bytes=0-99", 1000), (0, 99))
+        self.assertEqual(parse_range("bytes=900-", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=-100", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=990-2000", 1000), (990, 999))
+        # Whole file for anything we do not serve as a single range.
+        self.assertIsNone(parse_range(None, 1000))
+        self.assertIsNone(parse_range("bytes=0-1,5-9", 1000))
+        self.assertIsNone(parse_range("bytes=9-5", 1000))
+        with self.assertRaises(UnsatisfiableRange):
+            parse_range("bytes=1000-", 1000)
+
+
+class S3RedirectTest(SimpleTestCase):
+    def test_redirect_is_signed_against_the_bucket(self):
+        # Behind a CloudFront domain storage.url() is neither signed nor expiring.
+        storage = S3Storage(
+            bucket_name="optics-files",
+            custom_domain="cdn.example.com",
+            access_key="AKIAEXAMPLE",
+            secret_key="secret",
+            region_name="eu-west-1",
+            signature_version="s3v4",
+            location="media",
+        )
+        field_file = SimpleNamespace(storage=storage, name="missions/op.miz")
+
+        response = serve_file(
+            RequestFactory().get("/"), field_file, "Strike.miz", "v1", 0
+        )
+
+        self.assertEqual(response.status_code, 302)
+        url = urlsplit(response["Location"])
+        query = parse_qs(url.query)
+        self.assertNotEqual(url.hostname, "cdn.example.com")
+        self.assertTrue(url.path.endswith("/media/missions/op.miz"))
+        self.assertIn("X-Amz-Signature", query)
+        self.assertEqual(query["X-Amz-Expires"], ["300"])
+        self.assertEqual(
+            query["response-content-disposition"], ['attachment; filename="Strike.miz"']
+        )
+        self.assertIn("no-store", response["Cache-Control"])
+
+
+class MissionFileDownloadTest(TestCase):
+    def setUp(self):
+        location = tempfile.TemporaryDirectory()
+        self.addCleanup(location.cleanup)
+        storages = {
+            **settings.STORAGES,
+            "default": {
+                "BACKEND": "django.core.files.storage.FileSystemStorage",
+                "OPTIONS": {"location": location.name},
+            },
+        }
+        override = override_settings(STORAGES=storages)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        User.objects.create_user(username="testuser", password="12345")
+        self.client.login(username="testuser", password="12345")
+        campaign = Campaign.objects.create(name="Test Campaign")
+        self.mission = Mission.objects.create(campaign=campaign, name="Mission")
+
+    def download(self, filename, content, **headers):
+        with self.captureOnCommitCallbacks(execute=True):
+            mission_file = MissionFile.objects.create(
+                mission=self.mission,
+                name="Recording",
+                mission_file=SimpleUploadedFile(filename, content),
+            )
+        url = reverse("mission_file_download", args=[mission_file.id])
+        return url, self.client.get(url, headers=headers)
+
+    def test_whole_file(self):
+        url, response = self.download("op.miz", CONTENT)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), CONTENT)
+        self.assertEqual(response["Content-Length"], str(len(CONTENT)))
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertIn('filename="op.miz"', response["Content-Disposition"])
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        response = self.client.get(url, headers={"If-None-Match": response["ETag"]})
+        self.assertEqual(response.status_code, 304)
+
+    def test_byte_ranges(self):
+        url, response = self.download("op.miz", CONTENT, Range="bytes=100-199")
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), CONTENT[100:200])
+        self.assertEqual(response["Content-Range"], f"bytes 100-199/{len(CONTENT)}")
+        self.assertEqual(response["Content-Length"], "100")
+
+        response = self.client.get(url, headers={"Range": "bytes=-10"})
+        self.assertEqual(b"".join(response.streaming_content), CONTENT[-10:])
+
+        response = self.client.get(url, headers={"Range": f"bytes={len(CONTENT)}-"})
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(CONTENT)}")
+
+        # A resumed download of a file that changed starts over.
+        response = self.client.get(
+            url, headers={"Range": "bytes=100-", "If-Range": '"stale"'}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_text_formats_are_gzipped(self):
+        url, response = self.download(
+            "debrief.xml", TACVIEW, **{"Accept-Encoding": "gzip, deflate"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        body = b"".join(response.streaming_content)
+        self.assertLess(len(body), len(TACVIEW))
+        self.assertEqual(gzip.decompress(body), TACVIEW)
+
+        # Identity encoding for ranges and clients without gzip, with its own ETag.
+        response = self.client.get(url, headers={"Range": "bytes=0-8"})
+        self.assertEqual(b"".join(response.streaming_content), b"<Tacview>")
+        plain = self.client.get(url)
+        self.assertNotIn("Content-Encoding", plain)
+        compressed = self.client.get(url, headers={"Accept-Encoding": "gzip"})
+        self.assertNotEqual(plain["ETag"], compressed["ETag"])
@@ -0,0 +1,160 @@
+import tempfile
+from datetime import date, datetime, timezone
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Campaign, Mission, MissionFile, MissionFileMetadata
+from ..services.file_metadata import MetadataWorker, backfill, search
+from ..services.media import sha256_of
+from .test_liberation import STRIKE, liberation
+from .test_miz import MISSION, miz
+
+RED = """["red"] = { ["country"] = { [1] = { ["name"] = "Russia", ["vehicle"] = {
+    ["group"] = { [1] = { ["name"] = "SAM", ["units"] = {
+        [1] = { ["type"] = "SA-11 Buk LN 9A310M1", ["skill"] = "Excellent", },
+        [2] = { ["type"] = "SA-11 Buk LN 9A310M1", ["skill"] = "Excellent", },
+    }, }, }, }, }, }, },"""
+
+
+class MetadataWorkerTest(TestCase):
+    def setUp(self):
+        location = tempfile.TemporaryDirectory()
+        self.addCleanup(location.cleanup)
+        storages = {
+            **settings.STORAGES,
+            "default": {
+                "BACKEND": "django.core.files.storage.FileSystemStorage",
+                "OPTIONS": {"location": location.name},
+            },
+        }
+        override = override_settings(STORAGES=storages)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        User.objects.create_user(username="testuser", password="12345")
+        self.client.login(username="testuser", password="12345")
+        campaign = Campaign.objects.create(name="Test Campaign")
+        self.mission = Mission.objects.create(campaign=campaign, name="Mission")
+
+    def upload(self, content, file_type="MIZ", name="mission.miz"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return MissionFile.objects.create(
+                mission=self.mission,
+                name=name,
+                file_type=file_type,
+                mission_file=SimpleUploadedFile(name, content),
+            )
+
+    def test_uploads_are_read_by_the_worker(self):
+        mission = MISSION.replace('["red"] = { ["country"] = { }, },', RED)
+        mission_file = self.upload(miz(mission).getvalue())
+        self.assertEqual(mission_file.metadata.status, MissionFileMetadata.PENDING)
+
+        self.assertEqual(MetadataWorker().run_pending(), 1)
+
+        metadata = MissionFileMetadata.objects.get(mission_file=mission_file)
+        self.assertEqual(metadata.status, MissionFileMetadata.DONE)
+        self.assertEqual(metadata.theatre, "Caucasus")
+        self.assertEqual(
+            metadata.start, datetime(2016, 1, 21, 9, 0, tzinfo=timezone.utc)
+        )
+        self.assertEqual(
+            (metadata.blue_units, metadata.red_units, metadata.client_slots),
+            (3, 2, 2),
+        )
+        self.assertEqual(
+            list(metadata.units.values_list("coalition", "unit_type", "count")),
+            [
+                ("blue", "F-16C_50", 2),
+                ("blue", "KC-135", 1),
+                ("red", "SA-11 Buk LN 9A310M1", 2),
+            ],
+        )
+        with mission_file.mission_file.open("rb") as file:
+            self.assertEqual((metadata.sha256, metadata.size), sha256_of(file))
+
+    def test_search_filters(self):
+        mission_file = self.upload(miz().getvalue())
+        save = self.upload(liberation(STRIKE).getvalue(), "LIB", "turn 3.liberation")
+        MetadataWorker().run_pending()
+
+        self.assertEqual(search().count(), 2)
+        self.assertEqual(
+            [metadata.mission_file for metadata in search(unit="f16c")],
+            [save, mission_file],
+        )
+        self.assertEqual(
+            search(unit="kc 135", coalition="blue").get().mission_file, mission_file
+        )
+        self.assertFalse(search(unit="f16", coalition="red").exists())
+        self.assertEqual(search(theatre="Caucasus").count(), 2)
+        self.assertEqual(search(start_after=date(2016, 1, 21)).count(), 2)
+        self.assertFalse(search(start_before=date(2016, 1, 20)).exists())
+
+        response = self.client.get(
+            reverse("mission_file_search"), {"theatre": "Caucasus", "unit": "KC-135"}
+        )
+        self.assertContains(
+            response, reverse("mission_file_download", args=[mission_file.id])
+        )
+        self.assertEqual(len(response.context["results"]), 1)
+
+    def test_importing_a_missing_file_is_not_found(self):
+        url = reverse("mission_file_import", args=[0])
+        self.assertEqual(self.client.post(f"{url}?returnUrl=/").status_code, 404)
+
+    def test_liberation_saves_count_the_planned_aircraft(self):
+        self.upload(liberation(STRIKE).getvalue(), "LIB", "turn 3.liberation")
+        MetadataWorker().run_pending()
+
+        metadata = MissionFileMetadata.objects.get()
+        self.assertEqual(
+            (metadata.theatre, metadata.blue_units, metadata.client_slots),
+            ("Caucasus", 3, 2),
+        )
+        self.assertEqual(metadata.units.get().unit_type, "F_16C_50")
+
+    def test_other_files_only_get_a_hash(self):
+        self.upload(b"kneeboard", "OTH", "kneeboard.txt")
+        MetadataWorker().run_pending()
+
+        metadata = MissionFileMetadata.objects.get()
+        self.assertEqual(metadata.status, MissionFileMetadata.DONE)
+        self.assertEqual((metadata.theatre, metadata.size), ("", 9))
+        self.assertEqual(len(metadata.sha256), 64)
+        self.assertFalse(metadata.units.exists())
+
+    def test_unreadable_files_fail(self):
+        self.upload(b"not a mission")
+        MetadataWorker().run_pending()
+
+        metadata = MissionFileMetadata.objects.get()
+        self.assertEqual(metadata.status, MissionFileMetadata.FAILED)
+        self.assertEqual(metadata.size, 13)
+        self.assertFalse(search().exists())
+
+    def test_backfill_queues_files_without_metadata(self):
+        self.upload(miz().getvalue())
+        MissionFileMetadata.objects.all().delete()
+
+        self.assertEqual(backfill(), 1)
+        self.assertEqual(backfill(), 0)
+        self.assertEqual(MetadataWorker().run_pending(), 1)
+
+    def test_run_worker_command_backfills_and_drains_the_queue(self):
+        self.upload(miz().getvalue())
+        MissionFileMetadata.objects.all().delete()
+
+        out = StringIO()
+        call_command("run_worker", "metadata", "--once", "--backfill", stdout=out)
+
+        self.assertEqual(out.getvalue(), "Queued 1 entries.\n")
+        self.assertEqual(
+            MissionFileMetadata.objects.get().status, MissionFileMetadata.DONE
+        )
@@ -0,0 +1,128 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from ..models import Aircraft, Airframe, Campaign, Flight, Mission, Package, Waypoint
+from ..services.coordinates import (
+    parse_elevation,
+    parse_lat,
+    parse_long,
+    parse_mgrs,
+    parse_position,
+)
+from ..services.detail import load_flight
+from ..services.flight_plan import flight_legs
+from ..services.versions import versioned_cache
+
+
+class CoordinateParsingTest(SimpleTestCase):
+    def test_degree_formats(self):
+        for text in ("42.1779", "N 42°10.674'", "N42 10 40.4", "42°10'40.4\"N"):
+            self.assertAlmostEqual(parse_lat(text), 42.1779, places=4)
+        self.assertAlmostEqual(parse_lat("S 33 51.6"), -33.86)
+        self.assertAlmostEqual(parse_long("W 117°10.5'"), -117.175)
+        for text in ("N 91", "E 042°28.866'", "42.5 10", "N 42 61", "", None):
+            self.assertIsNone(parse_lat(text))
+
+    def test_mgrs(self):
+        lat, long = parse_mgrs("31U DQ 48251 11932")
+        self.assertAlmostEqual(lat, 48.8582, places=3)
+        self.assertAlmostEqual(long, 2.2945, places=3)
+        lat, long = parse_mgrs("56HLH3433649697")
+        self.assertAlmostEqual(lat, -33.880, places=2)
+        self.assertAlmostEqual(long, 151.209, places=2)
+        # Too long for the latitude field alone, so split over both fields.
+        self.assertEqual(
+            parse_position("31U DQ", "48251 11932"), parse_mgrs("31UDQ4825111932")
+        )
+        self.assertIsNone(parse_mgrs("31U DQ 4825 11932"))
+
+    def test_elevations(self):
+        for text in ("20000", "20,000 ft", "FL200", "20000 AGL"):
+            self.assertEqual(parse_elevation(text), 20000)
+        self.assertAlmostEqual(parse_elevation("6096 m"), 20000, places=0)
+        self.assertIsNone(parse_elevation("high"))
+
+
+class FlightLegsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(username="testuser", password="12345")
+        self.client.login(username="testuser", password="12345")
+        campaign = Campaign.objects.create(name="Test Campaign")
+        mission = Mission.objects.create(campaign=campaign, name="Mission")
+        package = Package.objects.create(mission=mission, name="Package")
+        self.airframe = Airframe.objects.create(name="F-16C")
+        self.flight = Flight.objects.create(
+            package=package,
+            airframe=self.airframe,
+            callsign="Colt 1",
+            planned_speed=480,
+            fuel_flow=6000,
+        )
+        # A degree of latitude apart, then a degree east along the parallel.
+        points = [
+            ("Kutaisi", "N 42°00.000'", "E 042°00.000'"),
+            ("Push", "N 43 00 00", "E 42 00 00"),
+            ("Target", "43", "43"),
+        ]
+        for number, (name, lat, long) in enumerate(points):
+            Waypoint.objects.create(
+                flight=self.flight, name=name, number=number, lat=lat, long=long
+            )
+
+    def legs(self):
+        return flight_legs(load_flight(self.flight.id))
+
+    def test_positions_are_parsed_on_save(self):
+        waypoint = Waypoint.objects.get(name="Push")
+        self.assertEqual((waypoint.lat_deg, waypoint.long_deg), (43, 42))
+
+        waypoint.lat = "somewhere"
+        waypoint.save()
+        waypoint.refresh_from_db()
+        self.assertIsNone(waypoint.lat_deg)
+
+    def test_leg_table(self):
+        first, second = self.legs()
+
+        self.assertEqual((first.start, first.end, first.number), ("Kutaisi", "Push", 1))
+        self.assertAlmostEqual(first.distance, 60.0, delta=0.1)
+        self.assertEqual(first.bearing, 0)
+        self.assertEqual(first.ete_display, "0:08")
+        self.assertAlmostEqual(second.bearing, 90, delta=1)
+        self.assertAlmostEqual(second.distance, 43.9, delta=0.1)
+        self.assertAlmostEqual(
+            second.fuel, (first.distance + second.distance) / 480 * 6000, delta=1
+        )
+        self.assertAlmostEqual(second.elapsed, first.ete + second.ete, delta=1)
+
+    def test_missing_values_leave_gaps(self):
+        Waypoint.objects.filter(name="Push").update(lat_deg=None)
+        Flight.objects.filter(id=self.flight.id).update(planned_speed=None)
+
+        legs = self.legs()
+
+        self.assertEqual([leg.distance for leg in legs], [None, None])
+        self.assertEqual([leg.ete_display for leg in legs], ["", ""])
+
+    def test_legs_are_recomputed_only_when_the_route_changes(self):
+        self.legs()
+        misses = versioned_cache.misses
+        self.legs()
+        Aircraft.objects.create(flight=self.flight, type=self.airframe)
+        self.legs()
+        self.assertEqual(versioned_cache.misses, misses)
+
+        waypoint = Waypoint.objects.get(name="Target")
+        waypoint.long = "44"
+        waypoint.save()
+        self.assertAlmostEqual(self.legs()[1].distance, 87.8, delta=0.1)
+        self.assertEqual(versioned_cache.misses, misses + 1)
+
+    def test_flight_page_shows_the_legs(self):
+        response = self.client.get(reverse("flight_v2", args=[self.flight.id]))
+
+        self.assertContains(response, "Legs")
+        self.assertEqual(len(response.context["leg_object"]), 2)
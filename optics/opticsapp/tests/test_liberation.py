@@ -0,0 +1,271 @@
+import io
+import os
+import pickle
+import sys
+import types
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+
+from ..models import (
+    Aircraft,
+    Airframe,
+    Campaign,
+    Flight,
+    Mission,
+    Package,
+    Target,
+    Task,
+    Waypoint,
+    WaypointType,
+)
+from ..services.liberation import (
+    LiberationError,
+    LiberationImporter,
+    read_save,
+    save_plan,
+)
+
+# Stand-ins for the Liberation classes a save names, pickled under their modules.
+MODULES = {
+    "game": ["Game"],
+    "game.theater.conflicttheater": ["CaucasusTheater"],
+    "game.theater.controlpoint": ["Airfield"],
+    "game.weather": ["Conditions"],
+    "game.squadrons": ["Squadron", "Pilot"],
+    "game.dcs.aircrafttype": ["AircraftType"],
+    "game.utils": ["Distance"],
+    "dcs.mapping": ["Point"],
+    "dcs.planes": ["F_16C_50"],
+    "gen.ato": ["AirTaskingOrder", "Package"],
+    "gen.flights.flight": ["Flight", "FlightRoster", "FlightWaypoint"],
+    "gen.flights.flightplan": ["StrikeFlightPlan"],
+}
+
+
+class Record:
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+
+class FlightType:
+    def __init__(self, value):
+        self.value = value
+
+    def __reduce__(self):
+        return type(self), (self.value,)
+
+
+def fake_modules():
+    modules = {}
+    for name, classes in MODULES.items():
+        module = types.ModuleType(name)
+        for class_name in classes:
+            setattr(
+                module,
+                class_name,
+                type(class_name, (Record,), {"__module__": name}),
+            )
+        modules[name] = module
+    flight_type = type(
+        "FlightType", (FlightType,), {"__module__": "gen.flights.flight"}
+    )
+    modules["gen.flights.flight"].FlightType = flight_type
+    for name in ("gen", "gen.flights", "game.theater", "game.dcs", "dcs"):
+        modules.setdefault(name, types.ModuleType(name))
+    return modules
+
+
+def save(packages, modules):
+    """Pickles a Liberation game with ``packages`` in the blue air tasking order."""
+    m = types.SimpleNamespace(
+        **{
+            class_name: getattr(modules[name], class_name)
+            for name, classes in MODULES.items()
+            for class_name in classes
+        },
+        FlightType=modules["gen.flights.flight"].FlightType,
+    )
+
+    def waypoint(name, x, y, alt=0, alt_type="RADIO"):
+        return m.FlightWaypoint(
+            name=name,
+            x=x,
+            y=y,
+            alt=m.Distance(distance_in_meters=alt),
+            alt_type=alt_type,
+        )
+
+    airfield = m.Airfield(name="Kutaisi", position=m.Point(x=-284860, y=683839))
+    viper = m.AircraftType(dcs_unit_type=m.F_16C_50, name="F-16CM Fighting Falcon")
+    ato = m.AirTaskingOrder(packages=[])
+    for target_name, flights in packages:
+        target = m.Airfield(name=target_name, position=m.Point(x=-190000, y=730000))
+        package = m.Package(
+            target=target, flights=[], time_over_target=timedelta(minutes=30)
+        )
+        for callsign, task, count, player in flights:
+            plan = m.StrikeFlightPlan(
+                takeoff=waypoint("TAKEOFF", -284860, 683839),
+                nav_to=[waypoint("NAV", -250000, 700000, 6096, "BARO")],
+                targets=[waypoint(f"STRIKE {target_name}", -190000, 730000)],
+                land=waypoint("LANDING", -284860, 683839),
+                divert=None,
+                bullseye=waypoint("BULLSEYE", 0, 0),
+            )
+            pilots = [m.Pilot(name=f"Pilot {n}", player=player) for n in range(count)]
+            package.flights.append(
+                m.Flight(
+                    package=package,
+                    squadron=m.Squadron(aircraft=viper),
+                    roster=m.FlightRoster(pilots=pilots),
+                    departure=airfield,
+                    flight_type=m.FlightType(task),
+                    custom_name=callsign,
+                    flight_plan=plan,
+                )
+            )
+        ato.packages.append(package)
+    game = m.Game(
+        theater=m.CaucasusTheater(controlpoints=[airfield]),
+        turn=3,
+        conditions=m.Conditions(start_time=datetime(2016, 1, 21, 9, 0)),
+        blue_ato=ato,
+        red_ato=m.AirTaskingOrder(packages=[]),
+    )
+    return pickle.dumps(game, protocol=4)
+
+
+def liberation(*packages):
+    modules = fake_modules()
+    with mock.patch.dict(sys.modules, modules):
+        return io.BytesIO(save(packages, modules))
+
+
+STRIKE = (
+    "Kobuleti",
+    [("Colt 1", "Strike", 2, True), ("Texaco", "Refueling", 1, False)],
+)
+
+
+class Exploit:
+    def __reduce__(self):
+        return os.system, ("exit 1",)
+
+
+class SaveReaderTest(SimpleTestCase):
+    def test_the_air_tasking_order_is_read(self):
+        plan = save_plan(read_save(liberation(STRIKE)))
+
+        self.assertEqual(plan["turn"], 3)
+        (package,) = plan["packages"]
+        self.assertEqual(package["name"], "Strike Kobuleti")
+        (flight,) = package["flights"]
+        self.assertEqual(flight["callsign"], "Colt 1")
+        self.assertEqual(flight["types"], ["F_16C_50", "F-16CM Fighting Falcon"])
+        self.assertEqual(
+            [(point["name"], point["type"]) for point in flight["waypoints"]],
+            [
+                ("TAKEOFF", "TAKEOFF"),
+                ("NAV", "NAV"),
+                ("STRIKE Kobuleti", "STRIKE"),
+                ("LANDING", "LAND"),
+            ],
+        )
+        self.assertEqual(flight["waypoints"][1]["elevation"], "20000")
+        self.assertEqual(flight["waypoints"][2]["tot"], "09:30:00")
+        self.assertEqual(
+            flight["waypoints"][0]["position"], ("N 42°10.673'", "E 042°28.866'")
+        )
+
+    def test_ai_flights_are_kept_on_request(self):
+        plan = save_plan(read_save(liberation(STRIKE, STRIKE)), players_only=False)
+
+        self.assertEqual(
+            [package["name"] for package in plan["packages"]],
+            ["Strike Kobuleti", "Strike Kobuleti 2"],
+        )
+        self.assertEqual(len(plan["packages"][0]["flights"]), 2)
+
+    def test_code_in_the_save_is_never_run(self):
+        content = pickle.dumps(Exploit())
+        with mock.patch("os.system") as system:
+            with self.assertRaises(LiberationError):
+                read_save(io.BytesIO(content))
+        system.assert_not_called()
+
+    def test_other_files_are_rejected(self):
+        for content in (b"", b"not a save", pickle.dumps({"turn": 1})):
+            with self.assertRaises(LiberationError):
+                read_save(io.BytesIO(content))
+
+
+class LiberationImporterTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="12345")
+        campaign = Campaign.objects.create(name="Test Campaign")
+        self.mission = Mission.objects.create(campaign=campaign, name="Mission")
+        self.viper = Airframe.objects.create(name="F-16C")
+        self.strike = Task.objects.create(name="Strike")
+        self.target_point = WaypointType.objects.create(name="STRIKE")
+
+    def run_import(self, *packages):
+        with self.captureOnCommitCallbacks(execute=True):
+            return LiberationImporter(self.mission, self.user).run(
+                liberation(*packages)
+            )
+
+    def test_import_builds_the_packages(self):
+        result = self.run_import(STRIKE)
+
+        self.assertEqual(
+            [result[name] for name in ("packages", "flights", "aircraft", "waypoints")],
+            [1, 1, 2, 4],
+        )
+        flight = Flight.objects.get(package__mission=self.mission)
+        self.assertEqual(flight.package.name, "Strike Kobuleti")
+        self.assertEqual((flight.airframe, flight.task), (self.viper, self.strike))
+        target = Target.objects.get(mission=self.mission)
+        self.assertEqual(list(flight.targets.all()), [target])
+        self.assertTrue(target.lat.startswith("N 42°"))
+        waypoint = Waypoint.objects.get(flight=flight, number=2)
+        self.assertEqual(
+            (waypoint.waypoint_type, waypoint.tot), (self.target_point, "09:30:00")
+        )
+
+    def test_reimport_applies_only_the_changes(self):
+        self.run_import(STRIKE)
+        flight = Flight.objects.get(package__mission=self.mission)
+        lead = Aircraft.objects.get(flight=flight, flight_lead=True)
+        lead.pilot = self.user
+        lead.save()
+        Waypoint.objects.filter(flight=flight, number=1).update(notes="Fence in")
+
+        with self.assertNumQueries(11):
+            result = self.run_import(STRIKE)
+        self.assertEqual(
+            (result["flights"], result["updated"], result["deleted"]), (0, 0, 0)
+        )
+
+        replanned = (
+            "Kobuleti",
+            [("Colt 1", "Strike", 4, True), ("Dodge 1", "Strike", 1, True)],
+        )
+        result = self.run_import(replanned)
+
+        self.assertEqual((result["flights"], result["aircraft"]), (1, 3))
+        self.assertEqual(Package.objects.count(), 1)
+        self.assertEqual(Aircraft.objects.filter(flight=flight).count(), 4)
+        lead.refresh_from_db()
+        self.assertEqual(lead.pilot, self.user)
+        self.assertEqual(
+            Waypoint.objects.get(flight=flight, number=1).notes, "Fence in"
+        )
+
+        result = self.run_import(("Kobuleti", [("Dodge 1", "Strike", 1, True)]))
+        self.assertEqual(result["deleted"], 1)
+        self.assertEqual(
+            list(Flight.objects.values_list("callsign", flat=True)), ["Dodge 1"]
+        )
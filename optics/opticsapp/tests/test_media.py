@@ -0,0 +1,104 @@
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from ..models import Campaign, MediaBlob, Mission, MissionFile, Target
+from ..services.mission_copy import MissionGraphCopier
+
+TARGET_IMAGE = "campaign/mission/target_images/bridge.png"
+
+
+class MediaBlobTest(TestCase):
+    def setUp(self):
+        location = tempfile.TemporaryDirectory()
+        self.addCleanup(location.cleanup)
+        storages = {
+            **settings.STORAGES,
+            "default": {
+                "BACKEND": "django.core.files.storage.FileSystemStorage",
+                "OPTIONS": {"location": location.name},
+            },
+        }
+        override = override_settings(STORAGES=storages)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user(username="testuser", password="12345")
+        self.campaign = Campaign.objects.create(name="Test Campaign")
+        self.mission = Mission.objects.create(campaign=self.campaign, name="Mission")
+
+    def upload(self, content=b"mission data"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return MissionFile.objects.create(
+                mission=self.mission,
+                name="Mission",
+                mission_file=SimpleUploadedFile("op.miz", content),
+            )
+
+    def ref_count(self, name):
+        return MediaBlob.objects.get(name=name).ref_count
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.upload()
+        second = self.upload()
+        other = self.upload(b"other mission")
+
+        self.assertEqual(first.mission_file.name, second.mission_file.name)
+        self.assertNotEqual(first.mission_file.name, other.mission_file.name)
+        blob = MediaBlob.objects.get(name=first.mission_file.name)
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(blob.size, len(b"mission data"))
+        self.assertEqual(first.mission_file.name, f"{blob.sha256}/op.miz")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(default_storage.exists(second.mission_file.name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(default_storage.exists(second.mission_file.name))
+        self.assertFalse(MediaBlob.objects.filter(name=blob.name).exists())
+
+    def test_copies_keep_files_until_the_last_mission_is_deleted(self):
+        # Stored before the reference counts existed.
+        default_storage.save(TARGET_IMAGE, ContentFile(b"png"))
+        Target.objects.create(
+            mission=self.mission, name="Bridge", target_image=TARGET_IMAGE
+        )
+        mission_file = self.upload()
+        name = mission_file.mission_file.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            copy = MissionGraphCopier(self.user).copy_mission(
+                self.mission, self.campaign
+            )
+        self.assertEqual(self.ref_count(TARGET_IMAGE), 2)
+        self.assertEqual(self.ref_count(name), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            copy.delete()
+        self.assertEqual(self.ref_count(TARGET_IMAGE), 1)
+        self.assertTrue(default_storage.exists(TARGET_IMAGE))
+        self.assertTrue(default_storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mission.delete()
+        self.assertFalse(default_storage.exists(TARGET_IMAGE))
+        self.assertFalse(default_storage.exists(name))
+
+    def test_replacing_a_file_releases_the_old_one(self):
+        mission_file = self.upload()
+        old = mission_file.mission_file.name
+
+        mission_file = MissionFile.objects.get(id=mission_file.id)
+        mission_file.mission_file = SimpleUploadedFile("op.miz", b"new revision")
+        with self.captureOnCommitCallbacks(execute=True):
+            mission_file.save()
+
+        self.assertFalse(default_storage.exists(old))
+        self.assertEqual(self.ref_count(mission_file.mission_file.name), 1)
@@ -0,0 +1,106 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import (
+    Aircraft,
+    Airframe,
+    Campaign,
+    Flight,
+    Mission,
+    Package,
+    Target,
+    Waypoint,
+)
+from ..services.roles import roles_for
+
+
+class MissionDetailQueryTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="testuser", password="12345")
+        self.client.login(username="testuser", password="12345")
+        # Roles are cached across requests, so every measured request reads them
+        # from the cache.
+        roles_for(self.user)
+        self.airframe = Airframe.objects.create(name="F-14B", stations=2)
+        self.campaign = Campaign.objects.create(name="Test Campaign")
+        self.mission = Mission.objects.create(
+            campaign=self.campaign, name="Test Mission", created_by=self.user
+        )
+
+    def grow_mission(self, count):
+        for i in range(count):
+            package = Package.objects.create(mission=self.mission, name=f"Package {i}")
+            target = Target.objects.create(mission=self.mission, name=f"Target {i}")
+            for j in range(2):
+                flight = Flight.objects.create(
+                    package=package, airframe=self.airframe, callsign=f"Flight {i}-{j}"
+                )
+                flight.targets.add(target)
+            self.mission.comments.create(comment=f"Comment {i}", user=self.user)
+
+    def count_page_queries(self):
+        url = reverse("mission_v2", args=[self.mission.id])
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_mission_view_query_count_is_constant(self):
+        self.grow_mission(1)
+        small_mission_queries = self.count_page_queries()
+
+        self.grow_mission(5)
+        large_mission_queries = self.count_page_queries()
+
+        self.assertEqual(small_mission_queries, large_mission_queries)
+
+    def test_with_detail_annotates_flight_count(self):
+        self.grow_mission(3)
+        mission = Mission.objects.with_detail().get(id=self.mission.id)
+
+        with self.assertNumQueries(0):
+            packages = list(mission.package_set.all())
+            self.assertEqual([package.flight_count for package in packages], [2, 2, 2])
+            self.assertEqual(len(mission.target_set.all()), 3)
+            self.assertEqual(mission.comments.count(), 3)
+
+
+class MissionCopyTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="12345")
+        self.airframe = Airframe.objects.create(name="F-14B", stations=2)
+        self.campaign = Campaign.objects.create(name="Test Campaign")
+        self.mission = Mission.objects.create(campaign=self.campaign, name="Test Mission")
+        self.target = Target.objects.create(mission=self.mission, name="Bridge")
+        self.package = Package.objects.create(mission=self.mission, name="Package 1")
+        self.flight = Flight.objects.create(
+            package=self.package, airframe=self.airframe, callsign="Enfield 1"
+        )
+        self.flight.targets.add(self.target)
+        Aircraft.objects.create(type=self.airframe, flight=self.flight, pilot=self.user)
+        Waypoint.objects.create(flight=self.flight, name="Steerpoint", number=1)
+
+    def test_mission_copy_remaps_flight_targets(self):
+        self.mission.copy(self.user)
+
+        new_mission = Mission.objects.exclude(id=self.mission.id).get()
+        new_flight = Flight.objects.get(package__mission=new_mission)
+        new_target = new_mission.target_set.get()
+
+        self.assertEqual(new_mission.number, self.mission.number + 1)
+        self.assertEqual(list(new_flight.targets.all()), [new_target])
+        self.assertEqual(new_flight.airframe, self.airframe)
+        self.assertEqual(new_flight.aircraft_set.get().pilot, None)
+        self.assertEqual(new_flight.waypoint_set.get().number, 1)
+
+    def test_flight_copy_keeps_mission_targets(self):
+        self.flight.copy(self.user)
+
+        new_flight = self.package.flight_set.exclude(id=self.flight.id).get()
+
+        self.assertEqual(list(new_flight.targets.all()), [self.target])
+        self.assertEqual(new_flight.created_by, self.user)
@@ -0,0 +1,197 @@
+import io
+import zipfile
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+
+from ..models import (
+    Aircraft,
+    Airframe,
+    Campaign,
+    Flight,
+    Mission,
+    Task,
+    Waypoint,
+    WaypointType,
+)
+from ..services.coordinates import THEATRES, format_lat, format_long
+from ..services.lua import LuaSyntaxError, TableReader
+from ..services.miz import MizError, MizImporter
+
+MISSION = """
+mission =
+{
+    ["date"] = { ["Day"] = 21, ["Year"] = 2016, ["Month"] = 1, },
+    ["start_time"] = 32400,
+    ["theatre"] = "Caucasus",
+    ["weather"] =
+    {
+        ["wind"] =
+        {
+            ["atGround"] = { ["speed"] = 3, ["dir"] = 119, },
+            ["at2000"] = { ["speed"] = 0, ["dir"] = 0, },
+        }, -- end of ["wind"]
+        ["qnh"] = 760,
+        ["season"] = { ["temperature"] = 4, },
+        ["visibility"] = { ["distance"] = 80000, },
+        ["clouds"] = { ["base"] = 2500, ["density"] = 0, ["preset"] = "Preset2", },
+    }, -- end of ["weather"]
+    ["coalition"] =
+    {
+        ["blue"] =
+        {
+            ["country"] =
+            {
+                [1] =
+                {
+                    ["name"] = "USA",
+                    ["plane"] =
+                    {
+                        ["group"] =
+                        {
+                            [1] =
+                            {
+                                ["name"] = "Hemskir 2",
+                                ["task"] = "CAP",
+                                ["frequency"] = 305.5,
+                                ["units"] =
+                                {
+                                    [1] = { ["type"] = "F-16C_50", ["skill"] = "Client",
+                                        ["onboard_num"] = "012", },
+                                    [2] = { ["type"] = "F-16C_50", ["skill"] = "Client",
+                                        ["onboard_num"] = "013", },
+                                },
+                                ["route"] =
+                                {
+                                    ["points"] =
+                                    {
+                                        [1] = { ["type"] = "TakeOffParking",
+                                            ["x"] = -284860, ["y"] = 683839,
+                                            ["alt"] = 45, ["ETA"] = 0,
+                                            ["task"] = { ["id"] = "ComboTask", }, },
+                                        [2] = { ["type"] = "Turning Point",
+                                            ["name"] = "CAP East", ["alt"] = 7620,
+                                            ["x"] = -190000, ["y"] = 730000,
+                                            ["ETA"] = 777.6, },
+                                    },
+                                },
+                            }, -- end of [1]
+                            [2] =
+                            {
+                                ["name"] = "Texaco 1",
+                                ["task"] = "Refueling",
+                                ["units"] = { [1] = { ["type"] = "KC-135",
+                                    ["skill"] = "High", }, },
+                            }, -- end of [2]
+                        },
+                    },
+                },
+            },
+        },
+        ["red"] = { ["country"] = { }, },
+    },
+}
+"""
+
+
+def miz(mission=MISSION):
+    file = io.BytesIO()
+    with zipfile.ZipFile(file, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("mission", mission)
+    file.seek(0)
+    return file
+
+
+class LuaTableTest(SimpleTestCase):
+    def test_chunk_boundaries_do_not_change_the_result(self):
+        entry = '-2.5e1, ["k{0}"] = "x\\"y", [[long]], {{ true, nil }}, --[[ c\n ]] '
+        text = "a = { " + "".join(entry.format(i) for i in range(300)) + "}"
+        expected = TableReader(io.StringIO(text)).read()
+
+        self.assertEqual(len(expected["a"]), 1200)
+        self.assertEqual(expected["a"]["k0"], 'x"y')
+        self.assertEqual(
+            [expected["a"][1], expected["a"][2], expected["a"][3]],
+            [-25.0, "long", {1: True, 2: None}],
+        )
+        for chunk_size in (1, 2, 3, 7):
+            self.assertEqual(
+                TableReader(io.StringIO(text), chunk_size).read(), expected
+            )
+
+    def test_only_selected_values_are_built(self):
+        text = 'a = { x = { big = { 1, 2, 3 } }, y = { 4, 5 } } b = "skipped"'
+        result = TableReader(io.StringIO(text)).read({"a": {"*": {1: True}}})
+
+        self.assertEqual(result, {"a": {"x": {}, "y": {1: 4}}})
+
+    def test_unterminated_input_raises(self):
+        with self.assertRaises(LuaSyntaxError):
+            TableReader(io.StringIO('a = { "open')).read()
+        with self.assertRaises(LuaSyntaxError):
+            TableReader(io.StringIO("a = { 1, 2")).read()
+
+    def test_theatre_projection(self):
+        # Kutaisi airfield.
+        lat, long = THEATRES["Caucasus"].to_lat_long(-284860, 683839)
+
+        self.assertEqual(format_lat(lat), "N 42°10.673'")
+        self.assertEqual(format_long(long), "E 042°28.866'")
+
+
+class MizImporterTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="12345")
+        campaign = Campaign.objects.create(name="Test Campaign")
+        self.mission = Mission.objects.create(campaign=campaign, name="Mission")
+        self.viper = Airframe.objects.create(name="F-16C")
+        self.cap = Task.objects.create(name="CAP")
+        self.takeoff = WaypointType.objects.create(name="TAKEOFF")
+
+    def test_import_creates_flights_and_weather(self):
+        result = MizImporter(self.mission, self.user).run(miz(), "Imported")
+
+        self.assertEqual(
+            (result["flights"], result["aircraft"], result["waypoints"]), (1, 2, 2)
+        )
+        flight = Flight.objects.get(package__mission=self.mission)
+        self.assertEqual(flight.callsign, "Hemskir 2")
+        self.assertEqual(flight.airframe, self.viper)
+        self.assertEqual(flight.task, self.cap)
+        self.assertEqual(flight.radio_frequency, "305.5")
+        self.assertEqual(flight.timehack_start, "09:00")
+        tailcodes = Aircraft.objects.filter(flight=flight).values_list(
+            "tailcode", flat=True
+        )
+        self.assertEqual(sorted(tailcodes), ["012", "013"])
+
+        takeoff, cap = Waypoint.objects.filter(flight=flight).order_by("number")
+        self.assertEqual(takeoff.waypoint_type, self.takeoff)
+        self.assertEqual((takeoff.name, takeoff.elevation), ("WP0", "148"))
+        self.assertTrue(takeoff.lat.startswith("N 42°"))
+        self.assertEqual((cap.name, cap.tot), ("CAP East", "09:12:58"))
+
+        self.mission.refresh_from_db()
+        self.assertEqual(self.mission.wind_sl, "299/06")
+        self.assertEqual(self.mission.wind_7k, "Calm")
+        self.assertEqual(self.mission.qnh, "1013 / 29.92")
+        self.assertEqual(self.mission.cloud_base, "8.2K")
+        self.assertEqual(self.mission.mission_game_time, "09:00")
+
+    def test_reimport_only_adds_new_flights(self):
+        MizImporter(self.mission, self.user).run(miz(), "Imported")
+        result = MizImporter(self.mission, self.user).run(miz(), "Imported again")
+
+        self.assertEqual(result["flights"], 0)
+        flights = Flight.objects.filter(package__mission=self.mission)
+        self.assertEqual(flights.count(), 1)
+
+        MizImporter(self.mission, self.user, players_only=False).run(miz(), "AI")
+        self.assertTrue(Flight.objects.filter(callsign="Texaco 1").exists())
+
+    def test_invalid_files_are_rejected(self):
+        with self.assertRaises(MizError):
+            MizImporter(self.mission, self.user).run(io.BytesIO(b"not a zip"), "x")
+        with self.assertRaises(MizError):
+            MizImporter(self.mission, self.user).run(miz("mission = { 1, "), "x")
+        self.assertFalse(Flight.objects.exists())
@@ -0,0 +1,212 @@
+import os
+import tempfile
+import zipfile
+from io import BytesIO, StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, TestCase
+from django.urls import reverse
+from PIL import Image
+from pypdf import PdfReader
+
+from ..models import Airframe, Campaign, Flight, Mission, Package, PdfArtifact, Waypoint
+from ..services import mission_cards, pdf_cache, pdf_resources
+from ..services.mission_cards import render_mission_cards
+from ..services.pdf_cache import (
+    PdfRenderCache,
+    mission_card_fingerprint,
+    mission_card_fingerprints,
+    template_digest,
+)
+
+
+class RenamingStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        return name.replace(".pdf", "_a1b2c3.pdf")
+
+
+class MissionCardCacheTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        airframe = Airframe.objects.create(name="F-14B", stations=2)
+        campaign = Campaign.objects.create(name="Test Campaign")
+        self.mission = Mission.objects.create(campaign=campaign, name="Test Mission")
+        package = Package.objects.create(mission=self.mission, name="Package 1")
+        self.flight = Flight.objects.create(
+            package=package, airframe=airframe, callsign="Enfield 1"
+        )
+
+    def test_fingerprint_changes_with_flight_plan(self):
+        before = mission_card_fingerprint(self.mission.id, self.flight.id)
+        self.assertEqual(
+            before, mission_card_fingerprint(self.mission.id, self.flight.id)
+        )
+
+        Waypoint.objects.create(flight=self.flight, name="Steerpoint", number=1)
+
+        self.assertNotEqual(
+            before, mission_card_fingerprint(self.mission.id, self.flight.id)
+        )
+
+    def test_fingerprint_changes_with_the_template(self):
+        before = mission_card_fingerprint(self.mission.id, self.flight.id)
+        self.addCleanup(template_digest.cache_clear)
+        template_digest.cache_clear()
+        edited = SimpleNamespace(template=SimpleNamespace(source="<table>Legs"))
+
+        with mock.patch.object(pdf_cache, "get_template", return_value=edited):
+            after = mission_card_fingerprint(self.mission.id, self.flight.id)
+
+        self.assertNotEqual(before, after)
+
+    def test_index_keeps_the_name_the_storage_saved(self):
+        location = tempfile.TemporaryDirectory()
+        self.addCleanup(location.cleanup)
+        cache = PdfRenderCache(RenamingStorage(location=location.name))
+
+        cache.put("card", b"%PDF-1")
+        cache.put("card", b"%PDF-2")
+
+        self.assertEqual(
+            PdfArtifact.objects.get(key="card").path, "pdf_cache/card_a1b2c3.pdf"
+        )
+        self.assertEqual(cache.get("card"), b"%PDF-2")
+        self.assertEqual(
+            os.listdir(os.path.join(location.name, "pdf_cache")), ["card_a1b2c3.pdf"]
+        )
+
+    def test_matching_etag_returns_not_modified(self):
+        fingerprint = mission_card_fingerprint(self.mission.id, self.flight.id)
+        url = reverse("pdf_view", args=[self.mission.id, self.flight.id])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=f'"{fingerprint}"')
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], f'"{fingerprint}"')
+
+
+class MissionCardBundleTest(TestCase):
+    def setUp(self):
+        location = tempfile.TemporaryDirectory()
+        self.addCleanup(location.cleanup)
+        self.cache = PdfRenderCache(FileSystemStorage(location=location.name))
+        patcher = mock.patch.object(mission_cards, "pdf_cache", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        User.objects.create_user(username="testuser", password="12345")
+        self.client.login(username="testuser", password="12345")
+        airframe = Airframe.objects.create(name="F-14B", stations=2)
+        campaign = Campaign.objects.create(name="Test Campaign")
+        self.mission = Mission.objects.create(campaign=campaign, name="Test Mission")
+        package = Package.objects.create(mission=self.mission, name="Package 1")
+        self.flights = [
+            Flight.objects.create(package=package, airframe=airframe, callsign=callsign)
+            for callsign in ("Enfield 1", "Colt 1/2")
+        ]
+        self.url = reverse("mission_cards_bundle", args=[self.mission.id])
+
+    def test_zip_has_a_card_per_flight(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response["Content-Type"], "application/zip")
+        archive = zipfile.ZipFile(BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(
+            sorted(archive.namelist()), ["01-Colt 1-2.pdf", "02-Enfield 1.pdf"]
+        )
+        for name in archive.namelist():
+            self.assertTrue(archive.read(name).startswith(b"%PDF"))
+
+    def test_unknown_mission_is_not_found(self):
+        url = reverse("mission_cards_bundle", args=[self.mission.id + 1])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_merged_pdf_has_the_pages_of_every_card(self):
+        cards = list(render_mission_cards(self.mission.id, max_workers=1))
+
+        response = self.client.get(self.url, {"format": "pdf"})
+
+        pages = sum(len(PdfReader(BytesIO(pdf)).pages) for _, _, pdf in cards)
+        self.assertGreaterEqual(pages, 2)
+        self.assertEqual(len(PdfReader(BytesIO(response.content)).pages), pages)
+
+    def test_cards_are_rendered_once(self):
+        first = dict(
+            (flight.id, pdf) for _, flight, pdf in render_mission_cards(self.mission.id)
+        )
+        self.assertEqual(PdfArtifact.objects.count(), 2)
+
+        with mock.patch.object(mission_cards, "ProcessPoolExecutor") as executor:
+            second = dict(
+                (flight.id, pdf)
+                for _, flight, pdf in render_mission_cards(self.mission.id)
+            )
+        executor.assert_not_called()
+        self.assertEqual(first, second)
+
+    def test_fingerprints_only_change_for_the_edited_flight(self):
+        flight_ids = [flight.id for flight in self.flights]
+        before = mission_card_fingerprints(self.mission.id, flight_ids)
+
+        with self.assertNumQueries(2):
+            mission_card_fingerprints(self.mission.id, flight_ids)
+        Waypoint.objects.create(flight=self.flights[0], name="Steerpoint", number=1)
+
+        after = mission_card_fingerprints(self.mission.id, flight_ids)
+        self.assertNotEqual(before[flight_ids[0]], after[flight_ids[0]])
+        self.assertEqual(before[flight_ids[1]], after[flight_ids[1]])
+        self.assertEqual(
+            after[flight_ids[0]],
+            mission_card_fingerprint(self.mission.id, flight_ids[0]),
+        )
+
+    def test_command_writes_the_cards(self):
+        output = tempfile.TemporaryDirectory()
+        self.addCleanup(output.cleanup)
+        path = os.path.join(output.name, "cards.zip")
+        out = StringIO()
+
+        call_command("build_mission_cards", self.mission.id, path, stdout=out)
+
+        self.assertEqual(out.getvalue(), f"Wrote {path}\n")
+        self.assertEqual(len(zipfile.ZipFile(path).namelist()), 2)
+
+        path = os.path.join(output.name, "cards.pdf")
+        call_command(
+            "build_mission_cards", self.mission.id, path, format="pdf", stdout=out
+        )
+        with open(path, "rb") as merged:
+            self.assertGreaterEqual(len(PdfReader(merged).pages), 2)
+
+
+class PdfResourceTest(SimpleTestCase):
+    def setUp(self):
+        image = BytesIO()
+        Image.new("RGB", (4000, 3000), "grey").save(image, format="PNG")
+        self.image = image.getvalue()
+        pdf_resources.resource_cache = pdf_resources.EncodedResourceCache()
+
+    def test_media_image_is_downsampled_once_and_cached(self):
+        storage = mock.Mock()
+        storage.open.side_effect = lambda name, mode: BytesIO(self.image)
+
+        with mock.patch.object(
+            pdf_resources, "storage_name", return_value=(storage, "targets/a.png")
+        ):
+            first = pdf_resources.link_callback("/media/targets/a.png", None)
+            second = pdf_resources.link_callback("/media/targets/a.png", None)
+
+        self.assertTrue(first.startswith("data:image/jpeg;base64,"))
+        self.assertEqual(first, second)
+        self.assertEqual(storage.open.call_count, 1)
+
+    def test_unknown_uri_is_left_alone(self):
+        with mock.patch.object(
+            pdf_resources, "storage_name", return_value=(None, None)
+        ):
+            uri = "https://example.com/image.png"
+            self.assertEqual(pdf_resources.link_callback(uri, None), uri)
@@ -0,0 +1,174 @@
+import tempfile
+from io import BytesIO, StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from ..models import Campaign, ImageRendition, Mission, Target
+from ..services.renditions import (
+    RenditionWorker,
+    enqueue,
+    rendition_name,
+    savings,
+)
+from ..templatetags.image_tags import picture
+
+LOCMEM = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+TARGET_IMAGE = "campaign/mission/target_images/bridge.png"
+
+
+def png(size, mode="RGB"):
+    # A gradient, so the encoders have some detail to compress.
+    gradient = Image.linear_gradient("L").resize(size)
+    bands = [gradient, gradient.transpose(Image.FLIP_LEFT_RIGHT), gradient]
+    image = Image.merge(mode, bands[: len(mode)] + [gradient] * (len(mode) - 3))
+    output = BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+
+@override_settings(CACHES={"default": LOCMEM})
+class RenditionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        location = tempfile.TemporaryDirectory()
+        self.addCleanup(location.cleanup)
+        self.storage = FileSystemStorage(location=location.name, base_url="/media/")
+        self.worker = RenditionWorker(storage=self.storage)
+        campaign = Campaign.objects.create(name="Test Campaign")
+        self.mission = Mission.objects.create(campaign=campaign, name="Test Mission")
+
+    def test_uploads_are_queued_once_per_file(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Target.objects.create(
+                mission=self.mission, name="Bridge", target_image=TARGET_IMAGE
+            )
+            # A mission copy shares the file and its renditions.
+            Target.objects.create(
+                mission=self.mission, name="Bridge", target_image=TARGET_IMAGE
+            )
+
+        self.assertEqual(
+            list(ImageRendition.objects.values_list("source", flat=True)),
+            [TARGET_IMAGE],
+        )
+
+    def test_replaced_uploads_are_built_again(self):
+        # S3 overwrites a file uploaded again under the same name, and campaign
+        # images are not stored by content.
+        storage = FileSystemStorage(
+            location=self.storage.location, base_url="/media/", allow_overwrite=True
+        )
+        worker = RenditionWorker(storage=storage)
+        campaign = self.mission.campaign
+
+        def upload(size):
+            campaign.campaignImage = ContentFile(png(size), name="badge.png")
+            with self.captureOnCommitCallbacks(execute=True):
+                campaign.save()
+            worker.run_pending()
+            return ImageRendition.objects.get(source=campaign.campaignImage.name)
+
+        field = Campaign._meta.get_field("campaignImage")
+        with mock.patch.object(field, "storage", storage):
+            self.assertEqual(upload((1000, 500)).status, ImageRendition.DONE)
+            # Saving without a new upload keeps the built renditions.
+            with self.captureOnCommitCallbacks(execute=True):
+                campaign.save()
+            self.assertEqual(ImageRendition.objects.get().status, ImageRendition.DONE)
+
+            rendition = upload((400, 100))
+
+        self.assertEqual(rendition.source, "campaign/thumbnails/badge.png")
+        self.assertEqual(
+            {name: variant["width"] for name, variant in rendition.variants.items()},
+            {"thumb": 320, "medium": 400},
+        )
+        name = rendition.variants["medium"]["webp"]["name"]
+        self.assertEqual(name, rendition_name(rendition.source, "medium", "webp"))
+        with storage.open(name) as built:
+            self.assertEqual(Image.open(built).width, 400)
+
+    def test_worker_builds_smaller_variants(self):
+        self.storage.save(TARGET_IMAGE, ContentFile(png((1500, 1200))))
+        enqueue([TARGET_IMAGE])
+
+        self.assertEqual(self.worker.run_pending(), 1)
+
+        rendition = ImageRendition.objects.get(source=TARGET_IMAGE)
+        self.assertEqual(rendition.status, ImageRendition.DONE)
+        self.assertEqual(
+            {name: variant["width"] for name, variant in rendition.variants.items()},
+            {"thumb": 320, "medium": 800, "full": 1500},
+        )
+        full = rendition.variants["full"]
+        self.assertTrue(self.storage.exists(full["webp"]["name"]))
+        self.assertTrue(full["jpeg"]["name"].endswith("bridge.full.jpeg"))
+
+        totals = savings()
+        self.assertEqual(totals["original"], rendition.source_size)
+        self.assertLess(totals["full"]["webp"], totals["original"])
+        self.assertLess(totals["thumb"]["jpeg"], totals["full"]["jpeg"])
+
+    def test_small_transparent_images_keep_alpha(self):
+        self.storage.save(TARGET_IMAGE, ContentFile(png((200, 100), "RGBA")))
+        enqueue([TARGET_IMAGE])
+        self.worker.run_pending()
+
+        variants = ImageRendition.objects.get(source=TARGET_IMAGE).variants
+        self.assertEqual(list(variants), ["thumb"])
+        self.assertEqual(set(variants["thumb"]) - {"width", "height"}, {"webp", "png"})
+
+    def test_missing_source_fails(self):
+        enqueue([TARGET_IMAGE])
+        self.worker.run_pending()
+
+        self.assertEqual(
+            ImageRendition.objects.get(source=TARGET_IMAGE).status,
+            ImageRendition.FAILED,
+        )
+
+    def test_read_errors_are_retried_until_the_last_attempt(self):
+        enqueue([TARGET_IMAGE])
+        with mock.patch.object(self.storage, "open", side_effect=OSError("timed out")):
+            self.worker.run(once=True)
+
+        rendition = ImageRendition.objects.get(source=TARGET_IMAGE)
+        self.assertEqual(
+            (rendition.status, rendition.attempts, rendition.last_error),
+            (ImageRendition.FAILED, 3, "timed out"),
+        )
+
+    def test_run_worker_command(self):
+        out = StringIO()
+        call_command("run_worker", "renditions", "--once", "--backfill", stdout=out)
+        self.assertEqual(out.getvalue(), "Queued 0 entries.\n")
+
+        with self.assertRaises(CommandError):
+            call_command("run_worker", "discord", "--once", "--backfill")
+
+    def test_picture_offers_webp_once_built(self):
+        image = SimpleNamespace(
+            name=TARGET_IMAGE, url=f"/media/{TARGET_IMAGE}", storage=self.storage
+        )
+        self.assertEqual(picture(image)["src"], f"/media/{TARGET_IMAGE}")
+        self.assertNotIn("webp_srcset", picture(image))
+
+        self.storage.save(TARGET_IMAGE, ContentFile(png((1000, 500))))
+        enqueue([TARGET_IMAGE])
+        self.worker.run_pending()
+
+        context = picture(image, sizes="50vw")
+        self.assertEqual(
+            context["webp_srcset"],
+            "/media/campaign/mission/target_images/bridge.thumb.webp 320w, "
+            "/media/campaign/mission/target_images/bridge.medium.webp 800w, "
+            "/media/campaign/mission/target_images/bridge.full.webp 1000w",
+        )
+        self.assertTrue(context["src"].endswith("bridge.full.jpeg"))
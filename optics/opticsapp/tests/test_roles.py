@@ -0,0 +1,94 @@
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db import connection
+from django.template import Context, Template
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Campaign, Squadron
+from ..services.roles import roles_for
+
+LOCMEM = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+
+
+@override_settings(CACHES={"default": LOCMEM})
+class RolesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username="testuser", password="12345")
+        self.client.login(username="testuser", password="12345")
+        self.admin = Group.objects.create(name="admin")
+
+    def fresh_roles(self):
+        return roles_for(User.objects.get(id=self.user.id))
+
+    def role_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [
+            query["sql"]
+            for query in context.captured_queries
+            if 'FROM "auth_group"' in query["sql"]
+            or 'FROM "user_profile"' in query["sql"]
+        ]
+
+    def test_roles_are_loaded_once_and_cached_across_requests(self):
+        campaign = Campaign.objects.create(name="Test Campaign")
+        url = reverse("campaign_detail_v2", args=[campaign.id])
+
+        self.assertEqual(len(self.role_queries(url)), 2)
+        self.assertEqual(self.role_queries(url), [])
+
+    def test_group_changes_invalidate_the_cached_roles(self):
+        self.assertFalse(self.fresh_roles().is_admin)
+
+        self.user.groups.add(self.admin)
+        self.assertTrue(self.fresh_roles().is_admin)
+
+        self.admin.user_set.clear()
+        self.assertFalse(self.fresh_roles().is_admin)
+
+        self.admin.user_set.add(self.user)
+        self.admin.name = "planner"
+        self.admin.save()
+        self.assertTrue(self.fresh_roles().is_planner)
+
+    def test_profile_carries_the_squadron(self):
+        # The profile's default squadron is inserted with pk=1, which PostgreSQL's
+        # sequence does not know about.
+        squadron = Squadron.objects.create(pk=2, squadron_name="VF-103")
+        self.user.profile.squadron = squadron
+        self.user.profile.save()
+
+        roles = self.fresh_roles()
+        with self.assertNumQueries(0):
+            self.assertEqual(roles.profile.squadron.squadron_name, "VF-103")
+
+        squadron.squadron_name = "VF-31"
+        squadron.save()
+        self.assertEqual(self.fresh_roles().profile.squadron.squadron_name, "VF-31")
+
+    def test_has_group_filter_reads_the_request_roles(self):
+        self.user.groups.add(self.admin)
+        user = User.objects.get(id=self.user.id)
+        roles_for(user)
+        template = Template(
+            '{% load user_tags %}{% if user|has_group:"admin" %}admin{% endif %}'
+        )
+
+        with self.assertNumQueries(0):
+            self.assertEqual(template.render(Context({"user": user})), "admin")
+
+    def test_group_changes_change_the_etag(self):
+        campaign = Campaign.objects.create(name="Test Campaign")
+        url = reverse("campaign_detail_v2", args=[campaign.id])
+        self.client.get(url)
+        etag = self.client.get(url)["ETag"]
+
+        self.user.groups.add(self.admin)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,282 @@
+import threading
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.signals import request_finished
+from django.db import close_old_connections, connection
+from django.test import Client, TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Aircraft, Airframe, Campaign, Flight, Mission, Package
+from ..services.roles import roles_for
+from ..services.signup import SeatClaim, SignupRoster, claim_seat, user_seats
+from ..services import signup_events
+from ..services.signup_events import (
+    InProcessBroker,
+    SeatEventStream,
+    open_stream,
+    stream_slots,
+)
+
+
+def free_stream_slots():
+    taken = 0
+    while stream_slots.acquire(blocking=False):
+        taken += 1
+    for _ in range(taken):
+        stream_slots.release()
+    return taken
+
+
+class SignupRosterTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="testuser", password="12345")
+        self.client.login(username="testuser", password="12345")
+        # Roles are cached across requests, so every measured request reads them
+        # from the cache.
+        roles_for(self.user)
+        self.other = User.objects.create_user(username="wingman", password="12345")
+        self.airframe = Airframe.objects.create(
+            name="F-14B", stations=2, multicrew=True
+        )
+        campaign = Campaign.objects.create(name="Test Campaign")
+        self.mission = Mission.objects.create(
+            campaign=campaign, name="Test Mission", created_by=self.user
+        )
+
+    def grow_mission(self, count):
+        for i in range(count):
+            package = Package.objects.create(mission=self.mission, name=f"Package {i}")
+            for j in range(2):
+                flight = Flight.objects.create(
+                    package=package, airframe=self.airframe, callsign=f"Flight {i}-{j}"
+                )
+                Aircraft.objects.create(
+                    flight=flight, type=self.airframe, pilot=self.other
+                )
+                Aircraft.objects.create(flight=flight, type=self.airframe)
+
+    def count_page_queries(self):
+        url = reverse("mission_signup_v2", args=[self.mission.id])
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_roster_loads_in_three_queries(self):
+        self.grow_mission(3)
+        aircraft = Aircraft.objects.filter(pilot__isnull=True).first()
+        aircraft.rio_wso = self.user
+        aircraft.save()
+
+        with self.assertNumQueries(3):
+            roster = SignupRoster(self.mission, self.user)
+            crews = [
+                (seat.type.name, str(seat.pilot), str(seat.rio_wso))
+                for seat in roster.aircraft
+            ]
+
+        self.assertEqual(len(crews), 12)
+        self.assertEqual(roster.has_seat, 1)
+        self.assertEqual(roster.seats, [aircraft])
+
+    def test_signup_view_query_count_is_constant(self):
+        self.grow_mission(1)
+        small_mission_queries = self.count_page_queries()
+
+        self.grow_mission(5)
+        large_mission_queries = self.count_page_queries()
+
+        self.assertEqual(small_mission_queries, large_mission_queries)
+
+
+class SeatClaimTest(TransactionTestCase):
+    def setUp(self):
+        airframe = Airframe.objects.create(name="F-14B", stations=2, multicrew=True)
+        campaign = Campaign.objects.create(name="Test Campaign")
+        self.mission = Mission.objects.create(campaign=campaign, name="Test Mission")
+        package = Package.objects.create(mission=self.mission, name="Package 1")
+        flight = Flight.objects.create(
+            package=package, airframe=airframe, callsign="Enfield 1"
+        )
+        self.aircraft = Aircraft.objects.create(flight=flight, type=airframe)
+        self.spare = Aircraft.objects.create(flight=flight, type=airframe)
+        self.users = [
+            User.objects.create_user(username=f"pilot{i}", password="12345")
+            for i in range(40)
+        ]
+
+    def claim_concurrently(self, claims):
+        barrier = threading.Barrier(len(claims))
+        results = [None] * len(claims)
+
+        def claim(index, aircraft_id, seat_id, user):
+            try:
+                barrier.wait()
+                results[index] = claim_seat(aircraft_id, seat_id, user)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=claim, args=(index, *arguments))
+            for index, arguments in enumerate(claims)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    @skipUnlessDBFeature("has_select_for_update")
+    def test_only_one_concurrent_claim_wins_a_seat(self):
+        results = self.claim_concurrently(
+            [(self.aircraft.id, 1, user) for user in self.users]
+        )
+
+        self.assertEqual(results.count(SeatClaim.CLAIMED), 1)
+        self.assertEqual(results.count(SeatClaim.TAKEN), len(self.users) - 1)
+
+        self.aircraft.refresh_from_db()
+        winner = self.users[results.index(SeatClaim.CLAIMED)]
+        self.assertEqual(self.aircraft.pilot, winner)
+        self.assertIsNone(self.aircraft.rio_wso)
+
+    @skipUnlessDBFeature("has_select_for_update")
+    def test_one_user_claiming_several_seats_at_once_gets_one(self):
+        user = self.users[0]
+        results = self.claim_concurrently(
+            [
+                (aircraft.id, seat_id, user)
+                for aircraft in (self.aircraft, self.spare)
+                for seat_id in (1, 2)
+            ]
+        )
+
+        self.assertEqual(results.count(SeatClaim.CLAIMED), 1)
+        self.assertEqual(results.count(SeatClaim.ALREADY_SEATED), 3)
+        self.assertEqual(user_seats(self.mission.id, user).count(), 1)
+
+    def test_claim_only_writes_its_seat(self):
+        Aircraft.objects.filter(id=self.aircraft.id).update(tailcode="AJ-200")
+
+        with CaptureQueriesContext(connection) as context:
+            result = claim_seat(self.aircraft.id, 2, self.users[0])
+
+        self.assertEqual(result, SeatClaim.CLAIMED)
+        update = next(
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith("UPDATE")
+        )
+        self.assertNotIn("tailcode", update)
+        self.aircraft.refresh_from_db()
+        self.assertEqual(self.aircraft.tailcode, "AJ-200")
+
+    def test_user_cannot_take_a_second_seat(self):
+        user = self.users[0]
+        self.assertEqual(claim_seat(self.aircraft.id, 1, user), SeatClaim.CLAIMED)
+        self.assertEqual(claim_seat(self.spare.id, 1, user), SeatClaim.ALREADY_SEATED)
+        self.assertEqual(claim_seat(0, 1, user), SeatClaim.MISSING)
+
+
+class SignupEventsTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="testuser", password="12345")
+        self.client.login(username="testuser", password="12345")
+        airframe = Airframe.objects.create(name="F-14B", stations=2, multicrew=True)
+        campaign = Campaign.objects.create(name="Test Campaign")
+        self.mission = Mission.objects.create(campaign=campaign, name="Test Mission")
+        package = Package.objects.create(mission=self.mission, name="Package 1")
+        flight = Flight.objects.create(
+            package=package, airframe=airframe, callsign="Enfield 1"
+        )
+        self.aircraft = Aircraft.objects.create(flight=flight, type=airframe)
+        # NOTIFY is only delivered once the test's transaction commits, which it
+        # never does.
+        self.broker = InProcessBroker()
+        patcher = mock.patch.object(signup_events, "signup_broker", self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.subscription = self.broker.subscribe(self.mission.id)
+
+    def tearDown(self):
+        self.subscription.close()
+
+    def test_seat_changes_are_published_after_commit(self):
+        url = reverse("mission_signup_update", args=[self.aircraft.id, 1])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(f"{url}?returnUrl=/")
+
+        self.assertEqual(
+            self.subscription.get(timeout=0), {"aircraft_id": self.aircraft.id}
+        )
+
+        url = reverse("mission_signup_remove", args=[self.aircraft.id, 1])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(f"{url}?returnUrl=/")
+
+        self.assertEqual(
+            self.subscription.get(timeout=0), {"aircraft_id": self.aircraft.id}
+        )
+
+    def test_stream_sends_rendered_rows(self):
+        stream = iter(
+            SeatEventStream(
+                open_stream(self.mission.id),
+                lambda aircraft_id: f"<tr>\n{aircraft_id}\n</tr>",
+            )
+        )
+        self.addCleanup(stream.close)
+        self.assertEqual(next(stream), "retry: 2000\n\n")
+
+        self.broker.publish(self.mission.id, {"aircraft_id": self.aircraft.id})
+
+        self.assertEqual(
+            next(stream),
+            f"event: aircraft-{self.aircraft.id}\n"
+            f"data: <tr>\ndata: {self.aircraft.id}\ndata: </tr>\n\n",
+        )
+
+    def test_closing_an_unread_stream_gives_its_slot_back(self):
+        # Closing a response outside the test client would close the test's
+        # connection.
+        request_finished.disconnect(close_old_connections)
+        self.addCleanup(request_finished.connect, close_old_connections)
+        free = free_stream_slots()
+        response = self.client.get(
+            reverse("mission_signup_events", args=[self.mission.id])
+        )
+        self.assertEqual(free_stream_slots(), free - 1)
+
+        response.close()
+        self.assertEqual(free_stream_slots(), free)
+        response.close()
+        self.assertEqual(free_stream_slots(), free)
+
+    def test_boards_poll_once_the_streams_are_taken(self):
+        taken = 0
+        while stream_slots.acquire(blocking=False):
+            taken += 1
+        self.addCleanup(lambda: [stream_slots.release() for _ in range(taken)])
+
+        response = self.client.get(
+            reverse("mission_signup_events", args=[self.mission.id])
+        )
+        self.assertEqual(response.status_code, 204)
+
+        url = reverse("mission_signup_seats", args=[self.mission.id])
+        response = self.client.get(url)
+        self.assertContains(response, f'id="aircraft-{self.aircraft.id}"')
+        self.assertContains(
+            response, reverse("mission_signup_update", args=[self.aircraft.id, 1])
+        )
+        etag = response["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        claim_seat(self.aircraft.id, 1, self.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, "Leave Slot")
@@ -0,0 +1,271 @@
+import io
+import tempfile
+import zipfile
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import (
+    Airframe,
+    Campaign,
+    Debrief,
+    Flight,
+    FlightDebrief,
+    Mission,
+    MissionFile,
+    Package,
+)
+from ..services.coordinates import great_circle
+from ..services.tacview import (
+    DebriefWorker,
+    TacviewError,
+    callsign_key,
+    flight_summaries,
+    read_recording,
+    read_track,
+    track_archive,
+)
+
+
+def acmi():
+    lines = [
+        "FileType=text/acmi/tacview",
+        "FileVersion=2.2",
+        "0,Title=Colt\\, first sortie",
+        "0,Comments=Two\\",
+        "lines",
+        "0,ReferenceLongitude=41",
+        "0,ReferenceLatitude=42",
+        "#0",
+        "101,T=0.5|0.5|10|0|0|0,Type=Air+FixedWing,Name=F-16C_50,"
+        "Pilot=Colt 1-1 | Viper,Group=Colt One,Coalition=Enemies",
+        "102,T=1|1|5000,Type=Air+FixedWing,Name=MiG-29A,Group=Red CAP,"
+        "Coalition=Allies",
+        "201,T=0.5|0.5|10,Type=Ground+Light+Human+Air+Parachutist,Name=Pilot",
+    ]
+    # Colt One flies north at about 220 m/s, reporting every half second.
+    for step in range(1, 41):
+        lines.append(f"#{step / 2}")
+        altitude = "|3000" if step == 20 else ""
+        lines.append(f"101,T=|{0.5 + step * 0.001:.3f}{altitude}")
+        if step == 4:
+            lines.append("301,T=0.5|0.502|3000,Type=Weapon+Missile,Parent=101")
+        if step == 10:
+            lines += ["0,Event=Destroyed|102|301|", "-102", "-301"]
+    return ("\n".join(lines) + "\n").encode("utf-8-sig")
+
+
+def zipped(content, name="recording.txt.acmi"):
+    file = io.BytesIO()
+    with zipfile.ZipFile(file, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(name, content)
+    return file.getvalue()
+
+
+XML = b"""<?xml version="1.0" encoding="utf-8"?>
+<TacviewDebriefing Version="1.2.6">
+    <Mission><Title>Strike</Title><Duration>1000</Duration></Mission>
+    <Events>
+        <Event>
+            <Time>100</Time>
+            <PrimaryObject ID="7"><Type>Aircraft</Type><Name>F-14B Tomcat</Name>
+                <Pilot>DAGGER 1-1 | Jabby</Pilot><Group>Strike|80|8|F-14B|</Group>
+            </PrimaryObject>
+            <Action>HasTakenOff</Action>
+        </Event>
+        <Event>
+            <Time>400</Time>
+            <PrimaryObject ID="9"><Type>Aircraft</Type><Name>Su-33</Name>
+                <Group>BARCAP</Group></PrimaryObject>
+            <Action>HasBeenDestroyed</Action>
+            <SecondaryObject ID="12"><Type>Missile</Type><Parent>7</Parent>
+            </SecondaryObject>
+            <ParentObject ID="7"><Type>Aircraft</Type></ParentObject>
+        </Event>
+        <Event>
+            <Time>700</Time>
+            <PrimaryObject ID="7"><Type>Aircraft</Type></PrimaryObject>
+            <Action>HasLanded</Action>
+        </Event>
+    </Events>
+</TacviewDebriefing>
+"""
+
+
+def summaries_by_callsign(recording):
+    return {
+        summary.callsign: summary
+        for summary in flight_summaries(recording, recording.aircraft())
+    }
+
+
+class TacviewReaderTest(SimpleTestCase):
+    def test_acmi_tracks_and_summaries(self):
+        recording = read_recording(io.BytesIO(acmi()), interval=1.0)
+
+        self.assertEqual(recording.properties["Title"], "Colt, first sortie")
+        self.assertEqual(recording.properties["Comments"], "Two\nlines")
+        summaries = summaries_by_callsign(recording)
+        self.assertEqual(sorted(summaries), ["Colt One", "Red CAP"])
+
+        colt = summaries["Colt One"]
+        self.assertEqual(colt.aircraft[0]["pilot"], "Colt 1-1 | Viper")
+        self.assertEqual((colt.kills, colt.losses), (1, 0))
+        self.assertEqual(colt.max_altitude, 3000)
+        self.assertAlmostEqual(colt.airborne, 20, delta=0.1)
+        expected = great_circle(42.5, 41.5, 42.54, 41.5)
+        self.assertAlmostEqual(colt.distance, expected, delta=1)
+        self.assertEqual(
+            (summaries["Red CAP"].kills, summaries["Red CAP"].losses), (0, 1)
+        )
+
+    def test_zipped_recordings_read_the_same(self):
+        plain = read_recording(io.BytesIO(acmi()))
+        packed = read_recording(io.BytesIO(zipped(acmi())))
+
+        self.assertEqual(packed.format, "ACMI")
+        self.assertEqual(packed.sample_count, plain.sample_count)
+        self.assertEqual(
+            summaries_by_callsign(packed)["Colt One"].distance,
+            summaries_by_callsign(plain)["Colt One"].distance,
+        )
+
+    def test_track_archive_keeps_one_position_per_interval(self):
+        recording = read_recording(io.BytesIO(acmi()), interval=1.0)
+        aircraft = recording.aircraft()
+        index = [tracked.id for tracked in aircraft].index("101")
+
+        track = read_track(io.BytesIO(track_archive(aircraft)), index)
+
+        self.assertEqual(list(track["time"]), [float(second) for second in range(21)])
+        self.assertAlmostEqual(track["lat"][-1], 42.54)
+        self.assertAlmostEqual(track["long"][0], 41.5)
+        self.assertEqual(track["alt"].max(), 3000)
+
+    def test_xml_debriefing_events(self):
+        recording = read_recording(io.BytesIO(XML))
+
+        self.assertEqual(recording.format, "XML")
+        self.assertEqual(recording.duration, 1000)
+        summaries = summaries_by_callsign(recording)
+        strike = summaries["Strike"]
+        self.assertEqual(strike.group, "Strike|80|8|F-14B|")
+        self.assertEqual((strike.airborne, strike.kills), (600, 1))
+        self.assertEqual(summaries["BARCAP"].losses, 1)
+
+    def test_invalid_recordings_raise(self):
+        for content in (b"not a recording", b"<Tacview><Event>", zipped(b"")):
+            with self.assertRaises(TacviewError):
+                read_recording(io.BytesIO(content))
+        with self.assertRaises(TacviewError):
+            read_recording(io.BytesIO(acmi().replace(b"#0", b"#zero")))
+
+    def test_callsign_keys(self):
+        self.assertEqual(callsign_key("Colt One"), callsign_key("COLT 1"))
+        self.assertNotEqual(callsign_key("Stone 1"), callsign_key("St 11"))
+
+
+class DebriefWorkerTest(TestCase):
+    def setUp(self):
+        location = tempfile.TemporaryDirectory()
+        self.addCleanup(location.cleanup)
+        storages = {
+            **settings.STORAGES,
+            "default": {
+                "BACKEND": "django.core.files.storage.FileSystemStorage",
+                "OPTIONS": {"location": location.name},
+            },
+        }
+        override = override_settings(STORAGES=storages)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        User.objects.create_user(username="testuser", password="12345")
+        self.client.login(username="testuser", password="12345")
+        campaign = Campaign.objects.create(name="Test Campaign")
+        self.mission = Mission.objects.create(campaign=campaign, name="Mission")
+        package = Package.objects.create(mission=self.mission, name="Package")
+        self.flight = Flight.objects.create(
+            package=package,
+            airframe=Airframe.objects.create(name="F-16C"),
+            callsign="Colt 1",
+        )
+
+    def upload(self, content, file_type="TAC"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return MissionFile.objects.create(
+                mission=self.mission,
+                name="Recording",
+                file_type=file_type,
+                mission_file=SimpleUploadedFile("recording.zip.acmi", content),
+            )
+
+    def test_uploads_are_read_by_the_worker(self):
+        mission_file = self.upload(zipped(acmi()))
+        self.assertEqual(mission_file.debrief.status, Debrief.PENDING)
+
+        self.assertEqual(DebriefWorker().run_pending(), 1)
+
+        debrief = Debrief.objects.get(mission_file=mission_file)
+        self.assertEqual(debrief.status, Debrief.DONE)
+        self.assertEqual(debrief.title, "Colt, first sortie")
+        self.assertEqual(debrief.object_count, 2)
+        colt = FlightDebrief.objects.get(debrief=debrief, callsign="Colt One")
+        self.assertEqual(colt.flight, self.flight)
+        self.assertEqual(colt.kills, 1)
+
+        response = self.client.get(
+            reverse("mission_file_debrief", args=[mission_file.id])
+        )
+        self.assertContains(response, "Colt One")
+        self.assertContains(response, reverse("flight_v2", args=[self.flight.id]))
+
+        index = colt.aircraft[0]["track"]
+        url = reverse("mission_file_debrief_track", args=[mission_file.id, index])
+        self.assertEqual(len(self.client.get(url).json()["time"]), 21)
+
+    def test_new_uploads_replace_the_debrief(self):
+        mission_file = self.upload(zipped(acmi()))
+        DebriefWorker().run_pending()
+        tracks = Debrief.objects.get(mission_file=mission_file).tracks
+        self.assertTrue(tracks.storage.exists(tracks.name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            mission_file.mission_file = SimpleUploadedFile("debrief.xml", XML)
+            mission_file.save()
+        self.assertEqual(Debrief.objects.get().status, Debrief.PENDING)
+        DebriefWorker().run_pending()
+
+        debrief = Debrief.objects.get()
+        self.assertEqual(debrief.title, "Strike")
+        self.assertFalse(tracks.storage.exists(tracks.name))
+        self.assertEqual(
+            sorted(debrief.flights.values_list("callsign", flat=True)),
+            ["BARCAP", "Strike"],
+        )
+
+    def test_unreadable_recordings_fail(self):
+        mission_file = self.upload(b"not a recording")
+        DebriefWorker().run_pending()
+
+        debrief = Debrief.objects.get(mission_file=mission_file)
+        self.assertEqual(debrief.status, Debrief.FAILED)
+        response = self.client.get(
+            reverse("mission_file_debrief", args=[mission_file.id])
+        )
+        self.assertContains(response, "could not be read")
+
+    def test_files_without_a_debrief_are_queued_when_viewed(self):
+        mission_file = self.upload(zipped(acmi()), file_type="OTH")
+        MissionFile.objects.filter(id=mission_file.id).update(file_type="TAC")
+        self.assertFalse(Debrief.objects.exists())
+
+        response = self.client.get(
+            reverse("mission_file_debrief", args=[mission_file.id])
+        )
+
+        self.assertContains(response, "being read")
+        self.assertEqual(Debrief.objects.get().status, Debrief.PENDING)
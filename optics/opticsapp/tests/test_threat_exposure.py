@@ -0,0 +1,124 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import (
+    Airframe,
+    Campaign,
+    Flight,
+    Mission,
+    Package,
+    Threat,
+    ThreatReference,
+    Waypoint,
+)
+from ..services.threat_exposure import (
+    Plane,
+    PlacedThreat,
+    ThreatGrid,
+    analyze_mission,
+    mission_exposure,
+)
+from ..services.versions import versioned_cache
+
+
+class ThreatExposureTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(username="testuser", password="12345")
+        self.client.login(username="testuser", password="12345")
+        campaign = Campaign.objects.create(name="Test Campaign")
+        self.mission = Mission.objects.create(campaign=campaign, name="Mission")
+        package = Package.objects.create(mission=self.mission, name="Package")
+        self.flight = Flight.objects.create(
+            package=package,
+            airframe=Airframe.objects.create(name="F-16C"),
+            callsign="Colt 1",
+            planned_speed=480,
+        )
+        # Sixty miles north along a meridian at 20000 ft.
+        for number, lat in enumerate(("N 42 00", "N 43 00")):
+            Waypoint.objects.create(
+                flight=self.flight,
+                name=f"WP{number}",
+                number=number,
+                lat=lat,
+                long="E 42 00",
+                elevation="20000",
+            )
+        self.sa6 = ThreatReference.objects.create(
+            name="SA-6", nato_code="Gainful", range_min=2, range_max=10, alt_max=30000
+        )
+        self.sa8 = ThreatReference.objects.create(
+            name="SA-8", nato_code="Gecko", range_max=5, alt_max=15000
+        )
+
+    def place(self, name, reference, lat="N 42 30", long="E 42 00"):
+        return Threat.objects.create(
+            mission=self.mission, name=name, threat_name=reference, lat=lat, long=long
+        )
+
+    def test_rings_crossed_by_the_route(self):
+        self.place("Site 1", self.sa6)
+        self.place("Site 2", self.sa8, long="E 42 05")
+        self.place("Far away", self.sa6, lat="N 50 00")
+        self.place("Unknown", self.sa6, lat=None, long=None)
+
+        result = analyze_mission(self.mission.id)
+
+        self.assertEqual(result["unplaced"], ["Unknown"])
+        exposure = result["flights"][self.flight.id]
+        site1, site2 = exposure["exposures"]
+        self.assertEqual((site1.threat, site1.leg, site1.above), ("Site 1", 1, False))
+        self.assertAlmostEqual(site1.enter, 20, delta=0.1)
+        self.assertAlmostEqual(site1.exit, 40, delta=0.1)
+        # Both sides of the inner ring, outside the minimum range.
+        self.assertAlmostEqual(site1.distance, 16, delta=0.1)
+        self.assertAlmostEqual(site1.time, 120, delta=1)
+        # Abeam 3.7 nm east, planned above its ceiling.
+        self.assertTrue(site2.above)
+        self.assertAlmostEqual(site2.distance, 6.7, delta=0.1)
+        self.assertEqual(exposure["distance"], site1.distance)
+
+    def test_grid_only_returns_nearby_threats(self):
+        threats = [
+            self.place(f"SAM {lat}", self.sa6, lat=str(lat)) for lat in range(30, 60)
+        ]
+        placed = [PlacedThreat(threat) for threat in threats]
+        grid = ThreatGrid(placed, Plane(45, 42))
+
+        near = grid.near((41.9, 42), (43.1, 42))
+
+        self.assertEqual([placed[index].name for index in near], ["SAM 42", "SAM 43"])
+
+    def test_results_are_cached_until_the_mission_changes(self):
+        def exposures():
+            return mission_exposure(self.mission.id)["flights"][self.flight.id][
+                "exposures"
+            ]
+
+        threat = self.place("Site 1", self.sa6)
+        exposures()
+        hits = versioned_cache.hits
+        self.assertEqual(len(exposures()), 1)
+        self.assertEqual(versioned_cache.hits, hits + 1)
+
+        threat.lat = "N 45 00"
+        threat.save()
+        self.assertEqual(exposures(), [])
+
+        threat.lat = "N 42 30"
+        threat.save()
+        self.sa6.alt_max = 10000
+        self.sa6.save()
+        (exposure,) = exposures()
+        self.assertTrue(exposure.above)
+
+    def test_flight_page_shows_the_exposure(self):
+        self.place("Site 1", self.sa6)
+
+        response = self.client.get(reverse("flight_v2", args=[self.flight.id]))
+
+        self.assertContains(response, "Threat Exposure")
+        self.assertContains(response, "Site 1")
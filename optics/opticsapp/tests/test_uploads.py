@@ -0,0 +1,122 @@
+import hashlib
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Campaign, Mission, MissionFile
+from ..services.uploads import (
+    UploadError,
+    finish_upload,
+    read_ticket,
+    receive_local_upload,
+    start_upload,
+)
+
+CONTENT = b"mission data"
+
+
+class DirectUploadTest(TestCase):
+    def setUp(self):
+        location = tempfile.TemporaryDirectory()
+        self.addCleanup(location.cleanup)
+        storages = {
+            **settings.STORAGES,
+            "default": {
+                "BACKEND": "django.core.files.storage.FileSystemStorage",
+                "OPTIONS": {"location": location.name},
+            },
+        }
+        override = override_settings(STORAGES=storages)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user(username="testuser", password="12345")
+        self.client.login(username="testuser", password="12345")
+        campaign = Campaign.objects.create(name="Test Campaign")
+        self.mission = Mission.objects.create(campaign=campaign, name="Mission")
+
+    def start(self, size=len(CONTENT)):
+        response = self.client.post(
+            reverse("mission_file_upload_start", args=[self.mission.id]),
+            {"filename": "../op.miz", "size": size},
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def send(self, upload, content=CONTENT):
+        response = self.client.post(
+            upload["url"],
+            {**upload["fields"], "file": SimpleUploadedFile("op.miz", content)},
+        )
+        self.assertEqual(response.status_code, 201)
+        return response["ETag"]
+
+    def finish(self, upload, etag):
+        return self.client.post(
+            reverse("mission_file_upload_finish"),
+            {
+                "ticket": upload["ticket"],
+                "etag": etag,
+                "name": "Strike",
+                "file_type": "MIZ",
+            },
+        )
+
+    def test_upload_creates_the_mission_file(self):
+        upload = self.start()
+        etag = self.send(upload)
+        self.assertEqual(etag, f'"{hashlib.md5(CONTENT).hexdigest()}"')
+
+        response = self.finish(upload, etag)
+
+        self.assertEqual(response.status_code, 200)
+        mission_file = MissionFile.objects.get(id=response.json()["id"])
+        self.assertEqual(mission_file.mission, self.mission)
+        self.assertEqual(mission_file.uploaded_by, self.user)
+        self.assertRegex(mission_file.mission_file.name, r"^uploads/\w+/op.miz$")
+        with mission_file.mission_file.open("rb") as stored:
+            self.assertEqual(stored.read(), CONTENT)
+
+    def test_mismatching_upload_is_rejected_and_deleted(self):
+        upload = start_upload(self.mission, self.user, "op.miz", len(CONTENT))
+        receive_local_upload(
+            upload["ticket"], self.user, SimpleUploadedFile("op.miz", CONTENT)
+        )
+        name = read_ticket(upload["ticket"], self.user)["name"]
+        self.assertTrue(default_storage.exists(name))
+
+        with self.assertRaises(UploadError):
+            finish_upload(upload["ticket"], self.user, '"0000"', "Strike", "MIZ")
+
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(MissionFile.objects.exists())
+
+    def test_announced_size_is_enforced(self):
+        upload = self.start(size=len(CONTENT) + 1)
+        response = self.client.post(
+            upload["url"],
+            {**upload["fields"], "file": SimpleUploadedFile("op.miz", CONTENT)},
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(
+            reverse("mission_file_upload_start", args=[self.mission.id]),
+            {"filename": "op.miz", "size": 0},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_tickets_belong_to_their_user(self):
+        upload = self.start()
+        self.send(upload)
+        other = User.objects.create_user(username="other", password="12345")
+
+        with self.assertRaises(UploadError):
+            finish_upload(upload["ticket"], other, None, "Strike", "MIZ")
+        with self.assertRaises(UploadError):
+            finish_upload("forged", self.user, None, "Strike", "MIZ")
+        self.assertFalse(MissionFile.objects.exists())
@@ -0,0 +1,150 @@
+import os
+import tempfile
+
+import redis
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Aircraft, Airframe, Campaign, Flight, Mission, Package, Target
+from ..services.versions import VersionedCache, versioned_cache
+
+LOCMEM = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+
+
+@override_settings(CACHES={"default": LOCMEM})
+class VersionedCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username="testuser", password="12345")
+        self.client.login(username="testuser", password="12345")
+        self.airframe = Airframe.objects.create(name="F-14B", stations=2)
+        self.campaign = Campaign.objects.create(name="Test Campaign")
+        self.mission = Mission.objects.create(campaign=self.campaign, name="Mission")
+        self.package = Package.objects.create(mission=self.mission, name="Package 1")
+        self.flight = Flight.objects.create(
+            package=self.package, airframe=self.airframe, callsign="Enfield 1"
+        )
+
+    def tree_versions(self):
+        return [
+            versioned_cache.version("campaign", self.campaign.id),
+            versioned_cache.version("mission", self.mission.id),
+            versioned_cache.version("package", self.package.id),
+            versioned_cache.version("flight", self.flight.id),
+        ]
+
+    def assert_all_bumped(self, before):
+        for old, new in zip(before, self.tree_versions()):
+            self.assertNotEqual(old, new)
+
+    def test_leaf_changes_bump_every_ancestor(self):
+        before = self.tree_versions()
+        aircraft = Aircraft.objects.create(flight=self.flight, type=self.airframe)
+        self.assert_all_bumped(before)
+
+        before = self.tree_versions()
+        aircraft.delete()
+        self.assert_all_bumped(before)
+
+        before = self.tree_versions()
+        self.flight.comments.create(comment="Check six", user=self.user)
+        self.assert_all_bumped(before)
+
+    def test_target_assignment_bumps_the_flight(self):
+        target = Target.objects.create(mission=self.mission, name="Bridge")
+        before = self.tree_versions()
+
+        self.flight.targets.add(target)
+        self.assert_all_bumped(before)
+
+        before = self.tree_versions()
+        target.flight_set.clear()
+        self.assert_all_bumped(before)
+
+    def test_bumps_are_repeated_once_the_change_commits(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.flight.callsign = "Enfield 2"
+            self.flight.save()
+            # Another connection still reads the old row before the commit.
+            versioned_cache.get_or_set("flight", self.flight.id, lambda: "Enfield 1")
+
+        value = versioned_cache.get_or_set(
+            "flight", self.flight.id, lambda: self.flight.callsign
+        )
+        self.assertEqual(value, "Enfield 2")
+
+    def test_flight_page_is_served_from_cache_until_it_changes(self):
+        url = reverse("flight_v2", args=[self.flight.id])
+        with CaptureQueriesContext(connection) as cold:
+            self.client.get(url)
+        hits = versioned_cache.hits
+
+        with CaptureQueriesContext(connection) as warm:
+            self.client.get(url)
+        # The page itself, its leg table, the mission's threat exposure and the
+        # roles of the signed-in user.
+        self.assertEqual(versioned_cache.hits, hits + 4)
+        self.assertLess(len(warm.captured_queries), len(cold.captured_queries))
+
+        self.flight.callsign = "Enfield 2"
+        self.flight.save()
+        response = self.client.get(url)
+        self.assertContains(response, "Enfield 2")
+
+
+class VersionedCacheBackendTest(TestCase):
+    def assert_versioned(self, versioned):
+        versioned.cache.clear()
+        loads = []
+
+        def loader():
+            loads.append(1)
+            return {"name": "Enfield 1"}
+
+        version = versioned.version("flight", 1)
+        self.assertEqual(versioned.version("flight", 1), version)
+        value = versioned.get_or_set("flight", 1, loader)
+        self.assertEqual(value, {"name": "Enfield 1"})
+        versioned.get_or_set("flight", 1, loader)
+        self.assertEqual(len(loads), 1)
+
+        versioned.bump("flight", 1)
+        self.assertNotEqual(versioned.version("flight", 1), version)
+        versioned.get_or_set("flight", 1, loader)
+        self.assertEqual(len(loads), 2)
+
+        stats = versioned.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["bumps"]), (1, 2, 1))
+
+    def test_locmem_backend(self):
+        with override_settings(CACHES={"default": LOCMEM, "versions": LOCMEM}):
+            self.assert_versioned(VersionedCache(alias="versions"))
+
+    def test_file_backend(self):
+        with tempfile.TemporaryDirectory() as location:
+            backend = {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": location,
+            }
+            with override_settings(CACHES={"default": LOCMEM, "versions": backend}):
+                self.assert_versioned(VersionedCache(alias="versions"))
+
+    def test_redis_backend(self):
+        url = os.environ.get("TEST_REDIS_URL", "redis://127.0.0.1:6379/15")
+        try:
+            redis.Redis.from_url(url, socket_connect_timeout=1).ping()
+        except redis.RedisError:
+            self.skipTest(f"No Redis server at {url}, set TEST_REDIS_URL.")
+
+        # The test flushes this database.
+        backend = {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": url,
+        }
+        with override_settings(CACHES={"default": LOCMEM, "versions": backend}):
+            self.assert_versioned(VersionedCache(alias="versions"))
@@ -16,6 +16,11 @@ urlpatterns = [
         views.download_mission_card,
         name="pdf_download",
     ),
+    path(
+        "pdf_bundle/mission/<int:mission_id>",
+        views.mission_cards_bundle,
+        name="mission_cards_bundle",
+    ),
 ]
 
 # Dashboard URL Patterns - V2
@@ -101,6 +106,46 @@ urlpatterns += [
         "v2/mission/copy/<int:link_id>", views.mission_copy_v2, name="mission_copy_v2"
     ),
     path("v2/mission/add/file", views.mission_file_add, name="mission_file_add"),
+    path(
+        "v2/mission/<int:link_id>/file/upload",
+        views.mission_file_upload_start,
+        name="mission_file_upload_start",
+    ),
+    path(
+        "v2/mission/file/search",
+        views.mission_file_search,
+        name="mission_file_search",
+    ),
+    path(
+        "v2/mission/file/<int:link_id>/import",
+        views.mission_file_import,
+        name="mission_file_import",
+    ),
+    path(
+        "v2/mission/file/<int:link_id>/debrief",
+        views.mission_file_debrief,
+        name="mission_file_debrief",
+    ),
+    path(
+        "v2/mission/file/<int:link_id>/debrief/track/<int:index>",
+        views.mission_file_debrief_track,
+        name="mission_file_debrief_track",
+    ),
+    path(
+        "v2/mission/file/<int:link_id>/download",
+        views.mission_file_download,
+        name="mission_file_download",
+    ),
+    path(
+        "v2/mission/file/upload/finish",
+        views.mission_file_upload_finish,
+        name="mission_file_upload_finish",
+    ),
+    path(
+        "v2/mission/file/upload/local",
+        views.mission_file_upload_local,
+        name="mission_file_upload_local",
+    ),
     path(
         "v2/mission/file/delete/<int:link_id>",
         views.mission_file_delete,
@@ -127,6 +172,16 @@ urlpatterns += [
         views.mission_signup_v2,
         name="mission_signup_v2",
     ),
+    path(
+        "v2/mission/signup/<int:link_id>/events",
+        views.mission_signup_events,
+        name="mission_signup_events",
+    ),
+    path(
+        "v2/mission/signup/<int:link_id>/seats",
+        views.mission_signup_seats,
+        name="mission_signup_seats",
+    ),
     path(
         "mission/signup/update/<int:link_id>/<int:seat_id>",
         views.mission_signup_update,
@@ -9,8 +9,12 @@ from django.http import HttpResponseRedirect
 from django.shortcuts import render
 from django.urls import reverse, reverse_lazy
 
+from ..decorators import conditional_page
 from ..forms import CampaignForm
-from ..models import Campaign, Comment, UserProfile
+from ..models import Campaign, Comment
+from ..services.campaigns import campaign_cards
+from ..services.detail import campaign_detail
+from ..services.page_versions import campaign_page
 
 logger = logging.getLogger(__name__)
 
@@ -27,19 +31,16 @@ def campaigns_all(request):
             A rendered HTML page with context containing campaign data, whether the user is an admin and breadcrumbs.
     """
 
-    campaigns_queryset = Campaign.objects.filter(
-        status__name__iexact="Active"
-    ).order_by("status", "name")
+    is_admin = request.roles.is_admin
+    campaigns = campaign_cards(request.user, is_admin, status="Active")
 
     logger.info("Retrieved all campaigns.")
 
-    user_profile = UserProfile.objects.get(user=request.user)
-
     breadcrumbs = {"Home": ""}
 
     context = {
-        "campaigns": campaigns_queryset,
-        "isAdmin": user_profile.is_admin(),
+        "campaigns": campaigns,
+        "isAdmin": is_admin,
         "breadcrumbs": breadcrumbs,
     }
 
@@ -50,25 +51,21 @@ def campaigns_all(request):
 def campaigns_filter(request):
     filter = request.GET.get("filter")
 
-    if filter == "All":
-        campaigns_queryset = Campaign.objects.order_by("status", "name")
-    else:
-        campaigns_queryset = Campaign.objects.filter(
-            status__name__iexact=filter
-        ).order_by("status", "name")
-
-    user_profile = UserProfile.objects.get(user=request.user)
+    is_admin = request.roles.is_admin
+    campaigns = campaign_cards(
+        request.user, is_admin, status=None if filter == "All" else filter
+    )
 
     breadcrumbs = {"Home": ""}
 
     logger.info(
-        "Filtered campaigns by: " + filter,
-        extra={"retrieved_campaigns": str(campaigns_queryset)},
+        f"Filtered campaigns by: {filter}",
+        extra={"retrieved_campaigns": len(campaigns)},
     )
 
     context = {
-        "campaigns": campaigns_queryset,
-        "isAdmin": user_profile.is_admin(),
+        "campaigns": campaigns,
+        "isAdmin": is_admin,
         "breadcrumbs": breadcrumbs,
     }
 
@@ -76,19 +73,19 @@ def campaigns_filter(request):
 
 
 @login_required(login_url="account_login")
+@conditional_page(campaign_page)
 def campaign_detail_v2(request, link_id):
     start_time = time.time()
     logger.info(f"Retrieving campaign object.[{link_id}]")
 
-    user_profile = UserProfile.objects.get(user=request.user)
-    isAdmin = user_profile.is_admin()
+    isAdmin = request.roles.is_admin
 
     try:
-        campaign = Campaign.objects.get(id=link_id)
-        missions = campaign.mission_set.all().order_by("number")
+        campaign = campaign_detail(link_id)
+        # Ordered by number in the cached prefetch.
+        missions = campaign.mission_set.all()
         comments = campaign.comments.all()
         breadcrumbs = {"Campaigns": reverse_lazy("campaigns"), campaign.name: ""}
-        campaign.refresh_from_db()
 
         end_time = time.time()
         duration = end_time - start_time
@@ -108,7 +105,7 @@ def campaign_detail_v2(request, link_id):
         breadcrumbs = {"Campaigns": reverse_lazy("campaigns")}
         logger.error(
             f"Campaign object [{link_id}] does not exist.",
-            extra={"user": user_profile.user},
+            extra={"user": request.user},
         )
     except Exception as e:
         logger.error(f"An error occurred: {e}", extra={"campaign_id": link_id})
@@ -213,12 +210,12 @@ def campaign_delete_v2(request, link_id):
         extra={"campaign_name": campaign_name, "user": request.user},
     )
     # messages.success(request, "Campaign successfully deleted.")
-    campaigns_queryset = Campaign.objects.order_by("status", "name")
-    user_profile = UserProfile.objects.get(user=request.user)
+    is_admin = request.roles.is_admin
+    campaigns = campaign_cards(request.user, is_admin)
 
     context = {
-        "campaigns": campaigns_queryset,
-        "isAdmin": user_profile.is_admin(),
+        "campaigns": campaigns,
+        "isAdmin": is_admin,
     }
 
     return render(request, "v2/campaign/includes/campaign_card.html", context=context)
@@ -12,7 +12,6 @@ from django.urls import reverse
 from ..models import (
     Flight,
     FlightImagery,
-    UserProfile,
     Comment,
     Package,
     Target,
@@ -20,18 +19,25 @@ from ..models import (
     Airframe,
     AirframeDefaults,
 )
+from ..decorators import conditional_page
 from ..forms import FlightForm, FlightImageryForm
+from ..services.detail import flight_detail
+from ..services.flight_plan import flight_legs
+from ..services.page_versions import flight_page
+from ..services.threat_exposure import mission_exposure
 
 
 @login_required(login_url="account_login")
+@conditional_page(flight_page)
 def flight_v2(request, link_id):
-    flight = Flight.objects.get(id=link_id)
+    flight = flight_detail(link_id)
     aircraft = flight.aircraft_set.all()
-    waypoints = flight.waypoint_set.all().order_by("number")
+    # Already ordered by number in the cached prefetch.
+    waypoints = flight.waypoint_set.all()
     targets = flight.targets.all()
     comments = flight.comments.all()
     imagery = flight.flightimagery_set.all()
-    user_profile = UserProfile.objects.get(user=request.user)
+    exposure = mission_exposure(flight.package.mission.id)
 
     breadcrumbs = {
         "Home": reverse("campaigns"),
@@ -49,9 +55,12 @@ def flight_v2(request, link_id):
         "flight_object": flight,
         "aircraft_object": aircraft,
         "waypoint_object": waypoints,
+        "leg_object": flight_legs(flight),
+        "exposure_object": exposure["flights"].get(flight.id),
+        "unplaced_threats": exposure["unplaced"],
         "target_object": targets,
         "imagery_object": imagery,
-        "isAdmin": user_profile.is_admin(),
+        "isAdmin": request.roles.is_admin,
         "comments": comments,
         "breadcrumbs": breadcrumbs,
     }
@@ -1,26 +1,67 @@
+import calendar
+import hashlib
+import json
 import logging
 import os
 import time
 
 from django.conf import settings
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.core import serializers
 from django.core.mail import send_mail
-from django.http import HttpResponse, HttpResponseRedirect
-from django.shortcuts import render
+from django.core.paginator import Paginator
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.shortcuts import get_object_or_404, render
+from django.template.loader import render_to_string
 from django.templatetags.static import static
 from django.urls import reverse
-
-from ..forms import MissionFileForm, MissionForm, MissionImageryForm
+from django.views.decorators.http import require_POST
+
+from ..decorators import conditional_page
+from ..forms import (
+    MissionFileForm,
+    MissionFileSearchForm,
+    MissionForm,
+    MissionImageryForm,
+)
 from ..models import (
     Aircraft,
     Campaign,
     Comment,
+    Debrief,
     Mission,
     MissionFile,
+    MissionFileMetadata,
     MissionImagery,
     Package,
-    UserProfile,
+)
+from ..services.detail import mission_detail
+from ..services.downloads import serve_file
+from ..services.file_metadata import search as search_files
+from ..services.liberation import LiberationError, LiberationImporter
+from ..services.miz import MizError, MizImporter
+from ..services.page_versions import mission_page, mission_signup_page
+from ..services.signup import (
+    SeatClaim,
+    SignupRoster,
+    aircraft_mission_id,
+    claim_seat,
+    release_seat,
+    user_seats,
+)
+from ..services.signup_events import SeatEventStream, open_stream, publish_seat_change
+from ..services.tacview import queue, read_track
+from ..services.uploads import (
+    UploadError,
+    finish_upload,
+    receive_local_upload,
+    start_upload,
 )
 
 logger = logging.getLogger(__name__)
@@ -29,15 +70,17 @@ logger = logging.getLogger(__name__)
 
 
 @login_required(login_url="account_login")
+@conditional_page(mission_page)
 def mission_v2(request, link_id):
     start_time = time.time()
     logger.info(f"Retrieving mission object.[{link_id}]")
 
-    user_profile = UserProfile.objects.get(user=request.user)
-    isAdmin = user_profile.is_admin()
+    isAdmin = request.roles.is_admin
 
     try:
-        mission_queryset = Mission.objects.get(id=link_id)
+        # Everything below is served from the prefetch cache filled by with_detail(),
+        # itself cached until something in the mission changes.
+        mission_queryset = mission_detail(link_id)
         mission_files_queryset = mission_queryset.missionfile_set.all()
         comments = mission_queryset.comments.all()
         packages = mission_queryset.package_set.all()
@@ -84,7 +127,7 @@ def mission_v2(request, link_id):
         breadcrumbs = {"Campaigns": reverse("campaigns"), "Mission": "Not found"}
         logger.error(
             f"Mission object [{link_id}]does not exist.",
-            extra={"user": user_profile.user},
+            extra={"user": request.user},
         )
         # return HttpResponse(status=404)
     except Exception as e:
@@ -188,13 +231,7 @@ def mission_delete_v2(request, link_id):
     mission = Mission.objects.get(id=link_id)
     returnURL = request.GET.get("returnUrl")
 
-    mission_files = mission.missionfile_set.all()
-
-    # Check to see if an AO Image exists.
-    if mission_files:
-        for file in mission_files:
-            file.delete()
-
+    # Files are deleted with the cascade once no copied mission still uses them.
     if mission.discord_msg_id:
         mission.delete_discord_event()
     mission.delete()
@@ -311,6 +348,206 @@ def mission_file_add(request):
     return HttpResponseRedirect(returnURL)
 
 
+# Large files go straight from the browser to the storage bucket: start issues
+# presigned upload parameters, finish verifies the object and creates the row.
+
+
+@login_required(login_url="account_login")
+@require_POST
+def mission_file_upload_start(request, link_id):
+    try:
+        mission = Mission.objects.get(id=link_id)
+        upload = start_upload(
+            mission,
+            request.user,
+            request.POST.get("filename", ""),
+            int(request.POST.get("size", 0)),
+        )
+    except Mission.DoesNotExist:
+        return JsonResponse({"error": "Mission not found."}, status=404)
+    except (UploadError, ValueError) as err:
+        return JsonResponse({"error": str(err)}, status=400)
+
+    return JsonResponse(upload)
+
+
+@login_required(login_url="account_login")
+@require_POST
+def mission_file_upload_finish(request):
+    file_type = request.POST.get("file_type")
+    if file_type not in dict(MissionFile.FILE_TYPES):
+        file_type = "OTH"
+
+    try:
+        mission_file = finish_upload(
+            request.POST.get("ticket", ""),
+            request.user,
+            request.POST.get("etag"),
+            request.POST.get("name", "")[:100],
+            file_type,
+            parts=json.loads(request.POST.get("parts") or "[]"),
+        )
+    except (UploadError, ValueError) as err:
+        logger.warning(
+            f"Mission file upload rejected: {err}", extra={"user": request.user}
+        )
+        return JsonResponse({"error": str(err)}, status=400)
+
+    logger.info(
+        f"Mission file uploaded [{mission_file.id} - {mission_file.name}].",
+        extra={"mission_id": mission_file.mission_id, "user": request.user},
+    )
+    return JsonResponse({"id": mission_file.id, "url": mission_file.mission_file.url})
+
+
+@login_required(login_url="account_login")
+@require_POST
+def mission_file_upload_local(request):
+    """Receives uploads when the default storage is not S3, answering like S3."""
+    try:
+        etag = receive_local_upload(
+            request.POST.get("ticket", ""), request.user, request.FILES["file"]
+        )
+    except (UploadError, KeyError) as err:
+        return HttpResponse(str(err), status=400)
+
+    return HttpResponse(
+        f"<PostResponse><ETag>{etag}</ETag></PostResponse>",
+        status=201,
+        content_type="application/xml",
+        headers={"ETag": etag},
+    )
+
+
+@login_required(login_url="account_login")
+def mission_file_download(request, link_id):
+    try:
+        mission_file = MissionFile.objects.get(id=link_id)
+    except MissionFile.DoesNotExist:
+        raise Http404("Mission file not found.")
+    if not mission_file.mission_file:
+        raise Http404("Mission file has no stored file.")
+
+    name = mission_file.mission_file.name
+    # Stored names are never rewritten, a new upload always gets a new name.
+    version = hashlib.sha1(f"{name}:{mission_file.name}".encode()).hexdigest()
+    return serve_file(
+        request,
+        mission_file.mission_file,
+        os.path.basename(name),
+        version,
+        calendar.timegm(mission_file.date_modified.utctimetuple()),
+    )
+
+
+@login_required(login_url="account_login")
+@require_POST
+def mission_file_import(request, link_id):
+    """
+    Creates the flights of a mission from its uploaded .miz file or Liberation
+    save. A .miz also fills in the weather.
+    """
+    returnURL = request.GET.get("returnUrl")
+    mission_file = get_object_or_404(
+        MissionFile.objects.select_related("mission"), id=link_id
+    )
+
+    try:
+        with mission_file.mission_file.open("rb") as file:
+            if mission_file.file_type == "LIB":
+                result = LiberationImporter(mission_file.mission, request.user).run(
+                    file
+                )
+            else:
+                result = MizImporter(mission_file.mission, request.user).run(
+                    file, f"Imported from {mission_file.name}"
+                )
+    except (MizError, LiberationError) as err:
+        messages.error(request, f"Could not import {mission_file.name}: {err}")
+        return HttpResponseRedirect(returnURL)
+
+    message = (
+        f"Imported {result['flights']} flights, {result['aircraft']} aircraft and "
+        f"{result['waypoints']} waypoints from {mission_file.name}."
+    )
+    if "updated" in result:
+        message += (
+            f" Updated {result['updated']} and removed {result['deleted']} "
+            "existing rows."
+        )
+    messages.success(request, message)
+    return HttpResponseRedirect(returnURL)
+
+
+@login_required(login_url="account_login")
+def mission_file_debrief(request, link_id):
+    """Shows the flights read from an uploaded Tacview recording."""
+    try:
+        mission_file = MissionFile.objects.select_related("mission").get(
+            id=link_id, file_type="TAC"
+        )
+    except MissionFile.DoesNotExist:
+        raise Http404("Tacview file not found.")
+
+    debrief = Debrief.objects.filter(mission_file=mission_file).first()
+    if debrief is None and mission_file.mission_file:
+        # Recordings uploaded before debriefs were read, and copies of missions.
+        queue(mission_file)
+        debrief = Debrief.objects.filter(mission_file=mission_file).first()
+
+    flight_debriefs = []
+    if debrief is not None and debrief.status == Debrief.DONE:
+        flight_debriefs = debrief.flights.select_related("flight")
+
+    context = {
+        "mission_object": mission_file.mission,
+        "mission_file": mission_file,
+        "debrief": debrief,
+        "flight_debriefs": flight_debriefs,
+    }
+    return render(request, "v2/mission/debrief.html", context)
+
+
+@login_required(login_url="account_login")
+def mission_file_debrief_track(request, link_id, index):
+    """Returns the time, lat, long and alt columns of one aircraft's track."""
+    debrief = Debrief.objects.filter(mission_file=link_id, status=Debrief.DONE).first()
+    if debrief is None or not debrief.tracks or index >= debrief.object_count:
+        raise Http404("Track not found.")
+
+    with debrief.tracks.open("rb") as file:
+        track = read_track(file, index)
+    return JsonResponse({name: column.tolist() for name, column in track.items()})
+
+
+@login_required(login_url="account_login")
+def mission_file_search(request):
+    """Finds uploaded mission files by theatre, in-game start date and unit type."""
+    theatres = (
+        MissionFileMetadata.objects.filter(status=MissionFileMetadata.DONE)
+        .exclude(theatre="")
+        .order_by("theatre")
+        .values_list("theatre", flat=True)
+        .distinct()
+    )
+    form = MissionFileSearchForm(request.GET, theatres=theatres)
+    results = None
+    if form.is_valid():
+        results = Paginator(search_files(**form.cleaned_data), per_page=25).get_page(
+            request.GET.get("page", 1)
+        )
+    query = request.GET.copy()
+    query.pop("page", None)
+
+    context = {
+        "form": form,
+        "results": results,
+        "query": query.urlencode(),
+        "breadcrumbs": {"Home": reverse("index"), "Mission Files": ""},
+    }
+    return render(request, "v2/mission/file_search.html", context)
+
+
 @login_required(login_url="account_login")
 def mission_file_delete(request, link_id):
     mission_file_obj = MissionFile.objects.get(id=link_id)
@@ -389,28 +626,16 @@ def mission_imagery_delete_v2(request, link_id):
 
 
 @login_required(login_url="account_login")
+@conditional_page(mission_signup_page)
 def mission_signup_v2(request, link_id):  # link_id is the mission ID
     logger.info(f"{request.user} has launched signup for [{link_id}]")
 
-    mission = Mission.objects.get(id=link_id)
-    comments = mission.comments.all()
-    packages = mission.package_set.all()
-
-    has_seat = 0
-    package_list = serializers.serialize("python", packages)
-    for package in package_list:
-        has_seat += (
-            Aircraft.objects.filter(flight__package__id=package["pk"])
-            .filter(pilot=request.user)
-            .count()
-        )
-        has_seat += (
-            Aircraft.objects.filter(flight__package__id=package["pk"])
-            .filter(rio_wso=request.user)
-            .count()
-        )
-    campaign = Campaign.objects.get(mission=mission)
-    is_owner = campaign.created_by == request.user
+    mission = Mission.objects.select_related(
+        "campaign", "created_by__profile", "modified_by"
+    ).get(id=link_id)
+    comments = list(mission.comments.select_related("user__profile"))
+    roster = SignupRoster(mission, request.user)
+    is_owner = mission.campaign.created_by_id == request.user.id
 
     breadcrumbs = {
         "Campaigns": reverse("campaigns"),
@@ -423,16 +648,80 @@ def mission_signup_v2(request, link_id):  # link_id is the mission ID
 
     context = {
         "mission_object": mission,
-        "package_object": packages,
-        "has_seat": has_seat,
+        "package_object": roster.packages,
+        "has_seat": roster.has_seat,
         "is_owner": is_owner,
         "comments": comments,
         "breadcrumbs": breadcrumbs,
+        "return_url": request.path,
+        "poll_interval": settings.SIGNUP_EVENTS["POLL_INTERVAL"],
     }
 
     return render(request, "v2/mission/mission_signup.html", context)
 
 
+@login_required(login_url="account_login")
+@conditional_page(mission_signup_page)
+def mission_signup_seats(request, link_id):
+    """
+    The packages and seats of the signup board, polled by boards without a live
+    stream. Unchanged boards are answered with a 304 from a single rollup query.
+    """
+    mission = Mission.objects.select_related("campaign").get(id=link_id)
+    roster = SignupRoster(mission, request.user)
+
+    context = {
+        "package_object": roster.packages,
+        "has_seat": roster.has_seat,
+        "is_owner": mission.campaign.created_by_id == request.user.id,
+        "return_url": reverse("mission_signup_v2", args=(mission.id,)),
+    }
+    return render(request, "v2/mission/includes/signup_board.html", context)
+
+
+@login_required(login_url="account_login")
+def mission_signup_events(request, link_id):
+    """
+    Server-sent events for the signup board of a mission.
+
+    Every seat change is pushed as the re-rendered aircraft row, which htmx swaps
+    into the page in place of polling the whole signup sheet. When this process has
+    no stream slot left the request gets a 204, which stops the browser's
+    EventSource, and the board keeps polling ``mission_signup_seats`` instead.
+    """
+    mission = Mission.objects.select_related("campaign").get(id=link_id)
+    subscription = open_stream(mission.id)
+    if subscription is None:
+        return HttpResponse(status=204)
+    is_owner = mission.campaign.created_by_id == request.user.id
+    return_url = reverse("mission_signup_v2", args=(mission.id,))
+
+    def render_aircraft(aircraft_id):
+        aircraft = (
+            Aircraft.objects.select_related("type", "pilot", "rio_wso")
+            .filter(id=aircraft_id, flight__package__mission=mission)
+            .first()
+        )
+        if aircraft is None:
+            return None
+        context = {
+            "aircraft": aircraft,
+            "user": request.user,
+            "has_seat": user_seats(mission.id, request.user).exists(),
+            "is_owner": is_owner,
+            "return_url": return_url,
+        }
+        return render_to_string("v2/mission/includes/signup_aircraft.html", context)
+
+    response = StreamingHttpResponse(
+        SeatEventStream(subscription, render_aircraft),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
 # Flagged for deletion
 # @login_required(login_url="account_login")
 # def mission_signup(request, link_id):  # link_id is the mission ID
@@ -468,17 +757,17 @@ def mission_signup_v2(request, link_id):  # link_id is the mission ID
 def mission_signup_update(request, link_id, seat_id):
 
     returnURL = request.GET.get("returnUrl")
-    aircraft = Aircraft.objects.get(pk=link_id)
-    if seat_id == 1:
-        aircraft.pilot = request.user
+    result = claim_seat(link_id, seat_id, request.user)
+
+    if result == SeatClaim.CLAIMED:
+        logger.info(f"{request.user} has signed up for aircraft [{link_id}]")
+        publish_seat_change(aircraft_mission_id(link_id), link_id)
+    elif result == SeatClaim.TAKEN:
+        messages.warning(request, "Sorry, that seat has just been taken.")
+    elif result == SeatClaim.ALREADY_SEATED:
+        messages.warning(request, "You already have a seat in this mission.")
     else:
-        aircraft.rio_wso = request.user
-
-    aircraft.save()
-
-    logger.info(
-        f"{request.user} has signed up for [{aircraft.type.name}] in mission [{aircraft.flight.package.mission.name}]"
-    )
+        messages.error(request, "That aircraft no longer exists.")
 
     return HttpResponseRedirect(returnURL)
 
@@ -486,12 +775,7 @@ def mission_signup_update(request, link_id, seat_id):
 @login_required(login_url="account_login")
 def mission_signup_remove(request, link_id, seat_id):
     returnURL = request.GET.get("returnUrl")
-    aircraft = Aircraft.objects.get(pk=link_id)
-    if seat_id == 1:
-        aircraft.pilot = None
-    else:
-        aircraft.rio_wso = None
-
-    aircraft.save()
+    if release_seat(link_id, seat_id):
+        publish_seat_change(aircraft_mission_id(link_id), link_id)
 
     return HttpResponseRedirect(returnURL)
@@ -6,15 +6,18 @@ from django.http import HttpResponse, HttpResponseRedirect
 from django.urls import reverse
 import requests
 
-from ..models import Package, Mission, PackageImagery, UserProfile, Comment
+from ..models import Package, Mission, PackageImagery, Comment
+from ..decorators import conditional_page
 from ..forms import PackageForm, PackageImageryForm
+from ..services.detail import package_detail
+from ..services.page_versions import package_page
 
 @login_required(login_url="account_login")
+@conditional_page(package_page)
 def package_v2(request, link_id):
-	package = Package.objects.get(id=link_id)
+	package = package_detail(link_id)
 	flights = package.flight_set.all()
 	comments = package.comments.all()
-	user_profile = UserProfile.objects.get(user=request.user)
 	imagery = package.packageimagery_set.all()
 	
 	breadcrumbs = {'Home': reverse('campaigns'),  package.mission.campaign.name: reverse('campaign_detail_v2', args=(package.mission.campaign.id,)), package.mission.name: reverse('mission_v2', args=(package.mission.id,)), package.name:''}
@@ -24,7 +27,7 @@ def package_v2(request, link_id):
 			   'flight_object': flights,
 			   "imagery_object": imagery,
 			   "comments": comments,
-			   "isAdmin": user_profile.is_admin(),
+			   "isAdmin": request.roles.is_admin,
 			   'breadcrumbs': breadcrumbs,
 			   }
 
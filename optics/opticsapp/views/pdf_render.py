@@ -1,66 +1,114 @@
 from io import BytesIO
 
-from django.http import HttpResponse
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django.template.loader import get_template
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
 from xhtml2pdf import pisa
 
-from ..models import Mission, Flight
+from ..models import Mission
+from ..services.mission_cards import (
+    MissionCardData,
+    merge_pdfs,
+    render_mission_cards,
+    stream_zip,
+)
+from ..services.pdf_cache import (
+    MISSION_CARD_TEMPLATE,
+    mission_card_fingerprint,
+    pdf_cache,
+)
+from ..services.pdf_resources import link_callback
 
 
 def render_to_pdf(template_src, context_dict={}):
     template = get_template(template_src)
     html = template.render(context_dict)
     result = BytesIO()
-    pdf = pisa.pisaDocument(BytesIO(html.encode("utf-8")), result)
+    pdf = pisa.pisaDocument(
+        BytesIO(html.encode("utf-8")), result, link_callback=link_callback
+    )
     if not pdf.err:
         return HttpResponse(result.getvalue(), content_type="application/pdf")
     return None
 
 
-def generate_pdf(request,mission_id, flight_id):
-    mission = Mission.objects.get(id=mission_id)
-    flight = Flight.objects.get(id=flight_id)
-    packages = mission.package_set.all()
-    aircraft = flight.aircraft_set.all().order_by("-flight_lead")
-    waypoints = flight.waypoint_set.all().order_by('number')
-    supports = mission.support_set.all()
-    targets = flight.targets.all()
-    threats = mission.threat_set.all()
-    # threat_details = threats.threat_name.harm_code
-    # target_urls = []
-    target_urls = {}
-    if targets:
-        for target in targets:
-            if target.target_image:
-                # target_urls.append(request.build_absolute_uri(target.target_image.url))
-                target_urls[target.name] = request.build_absolute_uri(
-                    target.target_image.url
-                )
-
-    data = {
-        "mission_object": mission,
-        "flight_object": flight,
-        "packages_object": packages,
-        "aircraft_object": aircraft,
-        "waypoints_object": waypoints,
-        "support_object": supports,
-        "target_object": targets,
-        "threat_object": threats,
-        "urls": target_urls,
-    }
-    pdf = render_to_pdf("mission_card/mission_card_2.html", data)
+def generate_pdf(request, mission_id, flight_id):
+    data = MissionCardData(mission_id)
+    flight = data.flight(flight_id)
+    pdf = render_to_pdf(MISSION_CARD_TEMPLATE, data.context(flight))
     return pdf
 
 
+def mission_card_etag(request, mission_id, flight_id):
+    # Kept on the request so the view does not compute the fingerprint twice.
+    request.mission_card_key = mission_card_fingerprint(mission_id, flight_id)
+    return request.mission_card_key
+
+
+def cached_mission_card(request, mission_id, flight_id):
+    """
+    Returns the mission card PDF bytes, rendering them only when the fingerprint of
+    the mission data has no cached artifact.
+    """
+    key = getattr(request, "mission_card_key", None) or mission_card_fingerprint(
+        mission_id, flight_id
+    )
+    pdf = pdf_cache.get(key) if key else None
+    if pdf is None:
+        response = generate_pdf(request, mission_id, flight_id)
+        if response is None:
+            return None
+        pdf = response.content
+        if key:
+            pdf_cache.put(key, pdf)
+    return pdf
+
+
+@condition(etag_func=mission_card_etag)
 def download_mission_card(request, mission_id, flight_id):
-    pdf = generate_pdf(request, mission_id, flight_id)
+    pdf = cached_mission_card(request, mission_id, flight_id)
+    if pdf is None:
+        return HttpResponse(status=500)
     response = HttpResponse(pdf, content_type="application/pdf")
     filename = "mission-card.pdf"
     content = "attachment; filename=%s" % filename
     response["Content-Disposition"] = content
+    # Browsers revalidate with If-None-Match and get a 304 while the card is unchanged.
+    patch_cache_control(response, private=True, no_cache=True)
     return response
 
 
+@condition(etag_func=mission_card_etag)
 def view_mission_card(request, mission_id, flight_id):
-    pdf = generate_pdf(request,mission_id, flight_id)
-    return HttpResponse(pdf, content_type="application/pdf")
+    pdf = cached_mission_card(request, mission_id, flight_id)
+    if pdf is None:
+        return HttpResponse(status=500)
+    response = HttpResponse(pdf, content_type="application/pdf")
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@login_required(login_url="account_login")
+def mission_cards_bundle(request, mission_id):
+    """
+    Returns the mission cards of every flight in the mission.
+
+    ``?format=zip`` (the default) streams a ZIP archive as each card finishes.
+    ``?format=pdf`` returns one merged PDF, which can only be sent once every card
+    has been rendered.
+    """
+    mission = get_object_or_404(Mission, id=mission_id)
+    cards = render_mission_cards(mission_id)
+    filename = f"mission-cards-{mission.id}"
+
+    if request.GET.get("format") == "pdf":
+        response = HttpResponse(merge_pdfs(list(cards)), content_type="application/pdf")
+        response["Content-Disposition"] = f"attachment; filename={filename}.pdf"
+        return response
+
+    response = StreamingHttpResponse(stream_zip(cards), content_type="application/zip")
+    response["Content-Disposition"] = f"attachment; filename={filename}.zip"
+    return response
@@ -1,6 +1,5 @@
 import os
 
-from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.shortcuts import render, redirect
@@ -8,10 +7,9 @@ from django.urls import reverse
 from django.contrib import messages
 from optics.opticsapp.forms import ProfileForm
 from optics.opticsapp.models import Comment, UserProfile
+from optics.opticsapp.services.avatars import avatar_catalog
 from collections import namedtuple
 
-import boto3
-
 
 @login_required(login_url="account_login")
 def own_profile_view(request):
@@ -36,24 +34,8 @@ def own_profile_view(request):
 
 @login_required(login_url="account_login")
 def select_avatar(request):
-    context = {}
-    new_file = []
-
-    s3 = boto3.resource("s3")
-    bucket = s3.Bucket(settings.AWS_STORAGE_BUCKET_NAME)
-    files = [
-        obj.key for obj in bucket.objects.filter(Prefix="static/assets/img/avatars/")
-    ]
-
-    # This code below retired as we no longer reference local file system and instead use S3.
-    # files = os.listdir(os.path.join(settings.STATIC_ROOT, "assets/img/avatars/"))
-    for file in files:
-        # We need to take out the static/ part of the file path to make the URI in S3 resolve correctly.
-        new_file.append(file.replace("static/", ""))
-
-    print(new_file)
-
-    context = {"files": new_file}
+    # Static file names such as assets/img/avatars/pilot1.png, listed from S3 once.
+    context = {"files": avatar_catalog.files()}
     return render(request, "v2/profile/avatar_selection.html", context=context)
 
 
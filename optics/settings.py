@@ -129,6 +129,8 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    # Loads the user's profile and groups once per request as request.roles:
+    "optics.opticsapp.middleware.RolesMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     # Whitenoise not required when S3 is serving the static files.
@@ -244,6 +246,93 @@ AWS_STORAGE_BUCKET_NAME = config("AWS_STORAGE_BUCKET_NAME")
 AWS_S3_REGION_NAME = config("AWS_S3_REGION_NAME")
 # Cloudfront URL
 AWS_S3_CUSTOM_DOMAIN = config("AWS_S3_CUSTOM_DOMAIN")
+# Files read back from the bucket, such as recordings read by the debrief worker,
+# are spooled to disk above this many bytes instead of being held in memory.
+AWS_S3_MAX_MEMORY_SIZE = 16 * 1024 * 1024
+
+# Cache backend, chosen with CACHE_BACKEND.
+# "locmem" is per process, so only use it with a single worker. "file" is shared by
+# the workers of one instance and "redis" by every instance.
+CACHE_BACKENDS = {
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "optics",
+    },
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(BASE_DIR, "cache"),
+    },
+    "redis": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": config("REDIS_URL", default="redis://127.0.0.1:6379"),
+    },
+}
+CACHES = {"default": CACHE_BACKENDS[config("CACHE_BACKEND", default="file")]}
+
+# The avatar picker's S3 listing, re-listed in the background once older than TTL
+# seconds. Rebuild it with "manage.py build_avatar_catalog". The deploy runs it
+# before starting the web process but boots anyway if it fails; the first picker
+# request then lists the bucket itself.
+AVATAR_CATALOG = {
+    "ALIAS": "default",
+    "TTL": config("AVATAR_CATALOG_TTL", default=3600, cast=int),
+}
+
+# Mission files are uploaded from the browser straight to the S3 bucket, which needs
+# a CORS rule allowing POST and PUT from the site and exposing the ETag header.
+# Files above MULTIPART_THRESHOLD bytes are sent in PART_SIZE parts.
+DIRECT_UPLOADS = {
+    "MAX_SIZE": config("DIRECT_UPLOADS_MAX_SIZE", default=500 * 1024 * 1024, cast=int),
+    "EXPIRES": config("DIRECT_UPLOADS_EXPIRES", default=3600, cast=int),
+    "MULTIPART_THRESHOLD": 100 * 1024 * 1024,
+    "PART_SIZE": 16 * 1024 * 1024,
+}
+
+# Mission file downloads. With S3 storage, binary files are redirected to a URL
+# presigned against the bucket, not AWS_S3_CUSTOM_DOMAIN, valid for EXPIRES seconds
+# (S3 answers Range requests itself). Text formats are streamed gzipped by the app
+# to clients accepting it.
+DOWNLOADS = {
+    "REDIRECT": config("DOWNLOADS_REDIRECT", default=True, cast=bool),
+    "EXPIRES": config("DOWNLOADS_EXPIRES", default=300, cast=int),
+    "CHUNK_SIZE": 64 * 1024,
+}
+
+# Tacview debriefs, built by "manage.py run_worker debriefs". Tracks keep one position
+# per TRACK_INTERVAL seconds for each aircraft. Recordings without takeoff and landing
+# events count an aircraft as airborne while it moves faster than AIRBORNE_SPEED m/s.
+DEBRIEFS = {
+    "TRACK_INTERVAL": config("DEBRIEFS_TRACK_INTERVAL", default=1.0, cast=float),
+    "AIRBORNE_SPEED": 30.0,
+}
+
+# Detail pages are cached per campaign tree version. TIMEOUT bounds how long data
+# outside the tree (user profiles, reference tables) can lag behind.
+VERSIONED_CACHE = {
+    "ALIAS": "default",
+    "TIMEOUT": config("VERSIONED_CACHE_TIMEOUT", default=3600, cast=int),
+}
+
+# Mission card PDF cache.
+# STORAGE is "local" (a directory on this instance) or "default" (the S3 storage above).
+PDF_CACHE = {
+    "STORAGE": config("PDF_CACHE_STORAGE", default="local"),
+    "LOCATION": os.path.join(BASE_DIR, "pdf_cache"),
+    "MAX_BYTES": config("PDF_CACHE_MAX_BYTES", default=200 * 1024 * 1024, cast=int),
+    "MAX_ENTRIES": config("PDF_CACHE_MAX_ENTRIES", default=2000, cast=int),
+}
+
+# Signup board live updates.
+# "postgres" (LISTEN/NOTIFY) reaches the boards of every worker and falls back to
+# "memory", which only reaches boards served by the same process, on other databases.
+# Each open stream holds a worker thread and a database connection, so a process
+# serves at most MAX_STREAMS of them; the other boards poll every POLL_INTERVAL
+# seconds with a conditional GET.
+SIGNUP_EVENTS = {
+    "BACKEND": config("SIGNUP_EVENTS_BACKEND", default="postgres"),
+    "MAX_STREAMS": config("SIGNUP_EVENTS_MAX_STREAMS", default=8, cast=int),
+    "POLL_INTERVAL": config("SIGNUP_EVENTS_POLL_INTERVAL", default=30, cast=int),
+}
 
 # Message tags used by ?
 MESSAGE_TAGS = {
@@ -255,8 +344,11 @@ MESSAGE_TAGS = {
 }
 
 # Image resize settings
+# Uploads keep their own format; forcing PNG turned photos into multi-megabyte
+# files. Pages are served the WebP/JPEG renditions built by "run_worker renditions".
 DJANGORESIZED_DEFAULT_FORMAT_EXTENSIONS = {"PNG": ".png"}
-DJANGORESIZED_DEFAULT_FORCE_FORMAT = "PNG"
+DJANGORESIZED_DEFAULT_FORCE_FORMAT = None
+DJANGORESIZED_DEFAULT_QUALITY = 90
 
 # Email Settings
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
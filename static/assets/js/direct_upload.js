@@ -0,0 +1,105 @@
+document.addEventListener('DOMContentLoaded', () => {
+    // Uploads mission files straight to the storage bucket instead of through the
+    // app server. Without this script the form posts to mission_file_add as before.
+    var form = document.getElementById("missionFileForm");
+    if (!form || !window.fetch) {
+        return;
+    }
+    var csrfToken = form.querySelector("[name=csrfmiddlewaretoken]").value;
+
+    function post(url, data) {
+        var body = new FormData();
+        for (const key in data) {
+            body.append(key, data[key]);
+        }
+        return fetch(url, {
+            method: "POST",
+            body: body,
+            headers: {"X-CSRFToken": csrfToken},
+            credentials: "same-origin",
+        }).then((response) => response.json().then((json) => {
+            if (!response.ok) {
+                throw new Error(json.error);
+            }
+            return json;
+        }));
+    }
+
+    function sameOrigin(url) {
+        return new URL(url, window.location.href).origin === window.location.origin;
+    }
+
+    function uploadPost(upload, file) {
+        var body = new FormData();
+        for (const key in upload.fields) {
+            body.append(key, upload.fields[key]);
+        }
+        // S3 ignores every field after the file.
+        body.append("file", file);
+        var options = {method: "POST", body: body};
+        if (sameOrigin(upload.url)) {
+            options.headers = {"X-CSRFToken": csrfToken};
+            options.credentials = "same-origin";
+        }
+        return fetch(upload.url, options).then((response) => response.text().then((text) => {
+            if (!response.ok) {
+                throw new Error("The upload failed (" + response.status + ").");
+            }
+            var etag = new DOMParser().parseFromString(text, "application/xml")
+                .getElementsByTagName("ETag")[0];
+            return {etag: etag ? etag.textContent : response.headers.get("ETag")};
+        }));
+    }
+
+    function uploadParts(upload, file) {
+        var parts = [];
+        // One part at a time keeps the memory use at a single part.
+        var chain = Promise.resolve();
+        for (const part of upload.parts) {
+            chain = chain.then(() => {
+                var start = (part.part_number - 1) * upload.part_size;
+                return fetch(part.url, {
+                    method: "PUT",
+                    body: file.slice(start, start + upload.part_size),
+                }).then((response) => {
+                    if (!response.ok) {
+                        throw new Error("The upload failed (" + response.status + ").");
+                    }
+                    parts.push({part_number: part.part_number, etag: response.headers.get("ETag")});
+                });
+            });
+        }
+        return chain.then(() => ({etag: "", parts: parts}));
+    }
+
+    form.addEventListener("submit", function(event) {
+        var file = form.querySelector("[name=mission_file]").files[0];
+        if (!file) {
+            return;
+        }
+        event.preventDefault();
+        var button = form.closest(".modal-content").querySelector("[type=submit]");
+        button.disabled = true;
+        button.textContent = "Uploading...";
+
+        post(form.dataset.uploadStart, {filename: file.name, size: file.size})
+            .then((upload) => {
+                var sent = upload.method === "multipart"
+                    ? uploadParts(upload, file)
+                    : uploadPost(upload, file);
+                return sent.then((result) => post(form.dataset.uploadFinish, {
+                    ticket: upload.ticket,
+                    etag: result.etag,
+                    parts: JSON.stringify(result.parts || []),
+                    name: form.querySelector("[name=name]").value || file.name,
+                    file_type: form.querySelector("[name=file_type]").value,
+                }));
+            })
+            .then(() => window.location.reload())
+            .catch((error) => {
+                button.disabled = false;
+                button.textContent = "Add File";
+                alert(error.message);
+            });
+    });
+});